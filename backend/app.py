@@ -3,17 +3,28 @@ Servidor Flask para Sistema Multi-Agente de Supermercado
 Gestiona la comunicación entre frontend y los agentes comprador y cajero.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+import atexit
+import json
+import queue
 import sys
 import os
+import threading
 
 # Agregar directorio actual al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from models.agente_comprador import AgenteComprador
-from models.agente_cajero import AgenteCajero
+from models.agente_cajero import AgenteCajeroConLoop
 from utils.canal_comunicacion import gestor_canales_global
+from utils.modelo_sucursal import DIRECTORIO_MAPAS, registro_modelos_global
+from utils.cache import cache_rutas_global, cache_listas_global
+from utils.planificacion_cooperativa import gestor_reservas_global
+from utils.ejecucion_paralela import buscador_rutas_global, generador_listas_global
+from utils.algoritmos_busqueda import MOTORES_LISTAS
+from utils.telemetria import registro_trazas_global
+from utils.tabla_precios import registro_precios_global
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'supermercado_multiagente_2025'
@@ -27,9 +38,30 @@ agentes_cajeros = {}  # {cajero_id: instancia}
 facturas_recibidas = {}  # {comprador_id: factura}
 
 
+def configurar_historial_mensajes():
+    """
+    Configura el historial de mensajes de los canales desde variables de entorno:
+    - SUPERMERCADO_HISTORIAL_CAPACIDAD: mensajes en memoria por canal (1000)
+    - SUPERMERCADO_HISTORIAL_DIR: directorio del volcado NDJSON de los
+      mensajes que salen del historial en memoria, por desalojo o al cerrar
+      (sin definir = desactivado)
+    """
+    capacidad = os.environ.get('SUPERMERCADO_HISTORIAL_CAPACIDAD')
+    directorio = os.environ.get('SUPERMERCADO_HISTORIAL_DIR')
+    
+    try:
+        gestor_canales_global.configurar_historial(
+            capacidad=int(capacidad) if capacidad else None,
+            directorio=directorio
+        )
+    except (OSError, ValueError) as e:
+        print(f"✗ Configuración de historial inválida, se usan los valores por defecto: {e}")
+
+
 def inicializar_cajeros():
     """
     Inicializa los cajeros automáticamente leyendo los mapas JSON.
+    Cada cajero atiende su cola de mensajes en un hilo propio.
     """
     import os
     import json
@@ -72,12 +104,13 @@ def inicializar_cajeros():
     
     for config in cajeros_config:
         try:
-            # Crear agente cajero
-            cajero = AgenteCajero(
+            # Crear agente cajero con su cola y su hilo de atención
+            cajero = AgenteCajeroConLoop(
                 cajero_id=config["cajero_id"],
                 sucursal_id=config["sucursal_id"],
                 posicion=config["posicion"]
             )
+            cajero.iniciar()
             
             # Registrar en el canal de comunicación
             gestor_canales_global.registrar_cajero_en_sucursal(
@@ -97,6 +130,19 @@ def inicializar_cajeros():
     print("="*70)
     print(f"Total de cajeros activos: {len(agentes_cajeros)}")
     print("="*70 + "\n")
+    
+    # atexit ejecuta en orden inverso: el historial se cierra después de
+    # que los cajeros respondan los pedidos encolados
+    atexit.register(gestor_canales_global.cerrar)
+    atexit.register(detener_cajeros)
+
+
+def detener_cajeros():
+    """
+    Detiene los ciclos de los cajeros atendiendo antes los pedidos encolados.
+    """
+    for cajero in agentes_cajeros.values():
+        cajero.detener(timeout=5.0)
 
 
 # ========== RUTAS DE INFORMACIÓN GENERAL ==========
@@ -125,7 +171,10 @@ def obtener_estado_general():
     return jsonify({
         "compradores_activos": len(agentes_compradores),
         "cajeros_activos": len(agentes_cajeros),
-        "canales": gestor_canales_global.obtener_estadisticas_global()
+        "canales": gestor_canales_global.obtener_estadisticas_global(),
+        "cache_rutas": cache_rutas_global.obtener_estadisticas(),
+        "cache_listas": cache_listas_global.obtener_estadisticas(),
+        "tablas_precios": registro_precios_global.obtener_estadisticas()
     })
 
 
@@ -189,7 +238,13 @@ def generar_listas():
     Genera las tres listas de compras para el comprador.
     
     Body: {
-        "comprador_id": str
+        "comprador_id": str,
+        "motor": "temple" | "multicadena" | "exacto",  # opcional
+        "semilla": int,  # opcional, para listas reproducibles
+        "usar_cache": bool,  # opcional (por defecto true)
+        "limite_ms": float,  # opcional, tiempo máximo de generación
+        "telemetria": bool,  # opcional, guarda la traza de convergencia
+        "stream": bool  # opcional, responde NDJSON con la traza en vivo
     }
     """
     try:
@@ -200,17 +255,82 @@ def generar_listas():
             return jsonify({"error": "Comprador no encontrado"}), 404
         
         comprador = agentes_compradores[comprador_id]
-        resultado = comprador.generar_listas_compras()
+        semilla = data.get('semilla')
+        if semilla is not None and not isinstance(semilla, int):
+            raise ValueError("semilla debe ser un entero")
+        
+        limite_ms = data.get('limite_ms')
+        if limite_ms is not None:
+            if isinstance(limite_ms, bool) or not isinstance(limite_ms, (int, float)) or limite_ms <= 0:
+                raise ValueError("limite_ms debe ser un número mayor que 0")
+        
+        motor = data.get('motor')
+        if motor is not None and motor not in MOTORES_LISTAS:
+            raise ValueError(f"Motor de listas desconocido: {motor}")
+        
+        opciones = {
+            "motor": motor,
+            "semilla": semilla,
+            "usar_cache": bool(data.get('usar_cache', True)),
+            "limite_ms": limite_ms
+        }
+        
+        if data.get('stream'):
+            return transmitir_generacion_ndjson(comprador, opciones)
+        
+        resultado = comprador.generar_listas_compras(
+            telemetria=bool(data.get('telemetria', False)),
+            **opciones
+        )
         
         return jsonify({
             "success": True,
             "listas": resultado
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def transmitir_generacion_ndjson(comprador, opciones):
+    """
+    Genera las listas en un hilo y transmite su traza como NDJSON mientras
+    se ejecuta: una línea {"evento": "muestra", "tipo_lista", ...} por
+    nivel de temperatura y al final {"evento": "resultado", "listas"} o
+    {"evento": "error", "error"}.
+    
+    Args:
+        comprador: Agente comprador
+        opciones: Argumentos de generar_listas_compras
+    """
+    eventos = queue.Queue()
+    
+    def observador(tipo_lista, muestra):
+        eventos.put({"evento": "muestra", "tipo_lista": tipo_lista, **muestra})
+    
+    def generar():
+        try:
+            resultado = comprador.generar_listas_compras(observador=observador, **opciones)
+            eventos.put({"evento": "resultado", "success": True, "listas": resultado})
+        except Exception as e:
+            eventos.put({"evento": "error", "error": str(e)})
+        finally:
+            eventos.put(None)
+    
+    threading.Thread(target=generar, daemon=True).start()
+    
+    def lineas():
+        while True:
+            evento = eventos.get()
+            if evento is None:
+                break
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+    
+    return Response(stream_with_context(lineas()), mimetype='application/x-ndjson')
+
+
 @app.route('/api/comprador/seleccionar-lista', methods=['POST'])
 def seleccionar_lista():
     """
@@ -275,26 +395,104 @@ def iniciar_recoleccion():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/comprador/actualizar-obstaculos', methods=['POST'])
+def actualizar_obstaculos():
+    """
+    Informa al comprador de obstáculos que aparecen o desaparecen durante
+    el recorrido y devuelve la ruta restante reparada.
+    
+    Body: {
+        "comprador_id": str,
+        "bloquear": [[fila, columna], ...],  # opcional
+        "liberar": [[fila, columna], ...],   # opcional
+        "destino": [fila, columna]           # opcional
+    }
+    """
+    try:
+        data = request.get_json()
+        comprador_id = data.get('comprador_id')
+        
+        if comprador_id not in agentes_compradores:
+            return jsonify({"error": "Comprador no encontrado"}), 404
+        
+        comprador = agentes_compradores[comprador_id]
+        
+        resultado = comprador.actualizar_obstaculos(
+            bloquear=data.get('bloquear'),
+            liberar=data.get('liberar'),
+            destino=data.get('destino')
+        )
+        
+        return jsonify({
+            "success": True,
+            "resultado": resultado
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/comprador/planificar-cooperativo', methods=['POST'])
+def planificar_cooperativo():
+    """
+    Planifica y reserva el recorrido del comprador sin colisiones con los
+    demás compradores de la sucursal (requiere haber iniciado la recolección).
+    
+    Body: {
+        "comprador_id": str,
+        "t_inicio": int  # opcional, instante simulado de salida
+    }
+    """
+    try:
+        data = request.get_json()
+        comprador_id = data.get('comprador_id')
+        
+        if comprador_id not in agentes_compradores:
+            return jsonify({"error": "Comprador no encontrado"}), 404
+        
+        comprador = agentes_compradores[comprador_id]
+        recorrido = comprador.planificar_recorrido_cooperativo(int(data.get('t_inicio', 0)))
+        
+        return jsonify({
+            "success": True,
+            "recorrido": recorrido,
+            "reservas": gestor_reservas_global.obtener_estadisticas(comprador.sucursal_id)
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/comprador/ir-a-cajero', methods=['POST'])
 def ir_a_cajero():
     """
-    Busca el cajero más cercano y se mueve hacia él.
+    Busca cajero y se mueve hacia él. Por defecto ("cercano") elige el más
+    cercano; con "espera", el de menor tiempo esperado (distancia + cola).
     
     Body: {
-        "comprador_id": str
+        "comprador_id": str,
+        "politica_cajero": str  # opcional, "cercano" (por defecto) o "espera"
     }
     """
     try:
         data = request.get_json()
         comprador_id = data.get('comprador_id')
+        politica_cajero = data.get('politica_cajero', 'cercano')
+        
+        if politica_cajero not in AgenteComprador.POLITICAS_CAJERO:
+            raise ValueError(f"Política de cajero desconocida: {politica_cajero}")
         
         if comprador_id not in agentes_compradores:
             return jsonify({"error": "Comprador no encontrado"}), 404
         
         comprador = agentes_compradores[comprador_id]
         
-        # Buscar cajero más cercano
-        info_cajero = comprador.buscar_cajero_mas_cercano()
+        # Buscar cajero
+        info_cajero = comprador.buscar_cajero(politica_cajero)
         
         # Moverse al cajero
         resultado = comprador.moverse_a_cajero(info_cajero['ruta_a_cajero'])
@@ -305,39 +503,76 @@ def ir_a_cajero():
             "movimiento": resultado
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def leer_timeout_factura(data: dict):
+    """
+    Lee el plazo de espera de la factura del body de la petición.
+    
+    Args:
+        data: Body JSON de la petición
+        
+    Returns:
+        Segundos de espera, o None para usar AgenteComprador.TIMEOUT_FACTURA_S
+    """
+    timeout_s = data.get('timeout_s')
+    if timeout_s is not None:
+        if isinstance(timeout_s, bool) or not isinstance(timeout_s, (int, float)) or timeout_s <= 0:
+            raise ValueError("timeout_s debe ser un número mayor que 0")
+    return timeout_s
+
+
+def codigo_error_cajero(respuesta: dict) -> int:
+    """
+    Código HTTP para una respuesta de error del cajero.
+    
+    Args:
+        respuesta: Mensaje de error del cajero ({"tipo": "error", "mensaje", ...})
+        
+    Returns:
+        409 si el pedido tiene un producto fuera del inventario; 503 si el
+        cajero no pudo atenderlo (cola llena u ocupado)
+    """
+    return 409 if 'producto_id' in respuesta else 503
+
+
 @app.route('/api/comprador/comunicar-cajero', methods=['POST'])
 def comunicar_cajero():
     """
     Comprador se comunica con el cajero para procesar productos.
+    Espera la factura solo hasta que el cajero responde, con un plazo máximo.
     
     Body: {
         "comprador_id": str,
-        "cajero_id": str
+        "cajero_id": str,
+        "timeout_s": float  # opcional, plazo máximo de espera de la factura
     }
     """
     try:
         data = request.get_json()
         comprador_id = data.get('comprador_id')
         cajero_id = data.get('cajero_id')
+        timeout_s = leer_timeout_factura(data)
         
         if comprador_id not in agentes_compradores:
             return jsonify({"error": "Comprador no encontrado"}), 404
         
         comprador = agentes_compradores[comprador_id]
         
-        # Enviar mensaje al cajero
+        # Enviar mensaje al cajero y esperar su respuesta
         mensaje = comprador.comunicar_con_cajero(cajero_id)
+        factura = comprador.esperar_factura(timeout_s)
         
-        # Esperar factura (en una implementación real sería asíncrono)
-        import time
-        time.sleep(0.5)  # Dar tiempo al cajero para procesar
-        
-        # Obtener factura
-        factura = facturas_recibidas.get(comprador_id)
+        if factura and factura.get('tipo') == 'error':
+            return jsonify({
+                "success": False,
+                "error": factura.get('mensaje', "El cajero rechazó el pedido"),
+                "respuesta_cajero": factura
+            }), codigo_error_cajero(factura)
         
         if factura:
             resultado = comprador.recibir_factura(factura)
@@ -351,8 +586,10 @@ def comunicar_cajero():
             return jsonify({
                 "success": False,
                 "error": "No se recibió factura del cajero"
-            }), 500
+            }), 504
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -385,7 +622,9 @@ def proceso_completo():
         "comprador_id": str,
         "sucursal_id": str,
         "presupuesto": float,
-        "tipo_lista": str  # "exacta", "superior", "inferior"
+        "tipo_lista": str,  # "exacta", "superior", "inferior"
+        "politica_cajero": str,  # opcional, "cercano" (por defecto) o "espera"
+        "timeout_s": float  # opcional, plazo máximo de espera de la factura
     }
     """
     try:
@@ -394,6 +633,11 @@ def proceso_completo():
         sucursal_id = data.get('sucursal_id')
         presupuesto = data.get('presupuesto')
         tipo_lista = data.get('tipo_lista', 'exacta')
+        politica_cajero = data.get('politica_cajero', 'cercano')
+        timeout_s = leer_timeout_factura(data)
+        
+        if politica_cajero not in AgenteComprador.POLITICAS_CAJERO:
+            raise ValueError(f"Política de cajero desconocida: {politica_cajero}")
         
         # 1. Crear comprador e ingresar a sucursal
         comprador = AgenteComprador(comprador_id)
@@ -420,16 +664,21 @@ def proceso_completo():
         recoleccion = comprador.ejecutar_recoleccion(plan['plan_recoleccion'])
         
         # 5. Ir a cajero
-        info_cajero = comprador.buscar_cajero_mas_cercano()
+        info_cajero = comprador.buscar_cajero(politica_cajero)
         movimiento_cajero = comprador.moverse_a_cajero(info_cajero['ruta_a_cajero'])
         
         # 6. Comunicar con cajero
         mensaje = comprador.comunicar_con_cajero(info_cajero['cajero']['id'])
+        factura = comprador.esperar_factura(timeout_s)
         
-        import time
-        time.sleep(0.5)
+        if factura and factura.get('tipo') == 'error':
+            return jsonify({
+                "success": False,
+                "error": factura.get('mensaje', "El cajero rechazó el pedido"),
+                "cajero": info_cajero['cajero']['id'],
+                "respuesta_cajero": factura
+            }), codigo_error_cajero(factura)
         
-        factura = facturas_recibidas.get(comprador_id)
         estado_final = comprador.recibir_factura(factura) if factura else None
         
         return jsonify({
@@ -448,6 +697,8 @@ def proceso_completo():
             }
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -502,7 +753,8 @@ def obtener_estado_sucursal(sucursal_id):
             "sucursal_id": sucursal_id,
             "cajeros": cajeros,
             "compradores": compradores,
-            "canal": stats_canal
+            "canal": stats_canal,
+            "reservas": gestor_reservas_global.obtener_estadisticas(sucursal_id)
         })
         
     except Exception as e:
@@ -538,6 +790,95 @@ def obtener_mapa(sucursal_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def leer_par_ruta(par, indice: int) -> tuple:
+    """
+    Lee un par origen/destino del lote de rutas.
+    
+    Args:
+        par: Elemento del lote ({"origen": [fila, columna], "destino": [fila, columna]})
+        indice: Posición del par en el lote (para el mensaje de error)
+        
+    Returns:
+        Tupla (origen, destino) con posiciones (fila, columna)
+        
+    Raises:
+        ValueError: Si el par no tiene origen y destino de dos enteros
+    """
+    if not isinstance(par, dict):
+        raise ValueError(f"Par {indice}: se esperaba un objeto con origen y destino")
+    
+    posiciones = []
+    for campo in ('origen', 'destino'):
+        posicion = par.get(campo)
+        if (not isinstance(posicion, (list, tuple)) or len(posicion) != 2
+                or any(isinstance(v, bool) or not isinstance(v, int) for v in posicion)):
+            raise ValueError(f"Par {indice}: {campo} debe ser [fila, columna] con dos enteros")
+        posiciones.append(tuple(posicion))
+    
+    return posiciones[0], posiciones[1]
+
+
+@app.route('/api/mapas/<sucursal_id>/rutas', methods=['POST'])
+def calcular_rutas_lote(sucursal_id):
+    """
+    Calcula un lote de rutas sobre el mapa de una sucursal en paralelo.
+    Los resultados se devuelven en el mismo orden que los pares.
+    
+    Body: {
+        "pares": [{"origen": [fila, columna], "destino": [fila, columna]}, ...],
+        "motor": "a_estrella" | "jps"  # opcional
+    }
+    """
+    try:
+        ruta_mapa = os.path.join(DIRECTORIO_MAPAS, f'{sucursal_id}.json')
+        
+        if not os.path.exists(ruta_mapa):
+            return jsonify({
+                "success": False,
+                "error": f"Mapa {sucursal_id} no encontrado"
+            }), 404
+        
+        data = request.get_json()
+        pares = data.get('pares')
+        
+        if not isinstance(pares, list):
+            return jsonify({
+                "success": False,
+                "error": "Se requiere una lista de pares origen/destino"
+            }), 400
+        
+        posiciones = [leer_par_ruta(par, indice) for indice, par in enumerate(pares)]
+        
+        modelo = registro_modelos_global.obtener_modelo(sucursal_id)
+        resultados = buscador_rutas_global.buscar_lote(
+            modelo.grid,
+            posiciones,
+            motor=data.get('motor', 'a_estrella'),
+            version=modelo.version
+        )
+        
+        rutas = []
+        for par, (ruta, costo) in zip(pares, resultados):
+            rutas.append({
+                "origen": par['origen'],
+                "destino": par['destino'],
+                "ruta": ruta,
+                "costo": costo if ruta else None
+            })
+        
+        return jsonify({
+            "success": True,
+            "sucursal_id": sucursal_id,
+            "total": len(rutas),
+            "rutas": rutas
+        })
+    
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route('/api/mapas', methods=['GET'])
 def listar_mapas():
     """
@@ -570,21 +911,17 @@ def listar_mapas():
 @app.route('/api/inventarios/<sucursal_id>', methods=['GET'])
 def obtener_inventario(sucursal_id):
     """
-    Obtiene el inventario de una sucursal.
+    Obtiene el inventario de una sucursal (tabla compartida de la sucursal).
     """
     try:
-        import json
-        ruta_inventario = os.path.join('data', 'inventario', f'{sucursal_id}.json')
-        
-        if not os.path.exists(ruta_inventario):
+        try:
+            inventario = registro_precios_global.obtener(sucursal_id).inventario
+        except ValueError:
             return jsonify({
                 "success": False,
                 "error": f"Inventario {sucursal_id} no encontrado"
             }), 404
         
-        with open(ruta_inventario, 'r', encoding='utf-8') as f:
-            inventario = json.load(f)
-        
         return jsonify({
             "success": True,
             "inventario": inventario
@@ -618,6 +955,11 @@ def guardar_mapa(sucursal_id):
         with open(ruta_mapa, 'w', encoding='utf-8') as f:
             json.dump(datos, f, indent=2, ensure_ascii=False)
         
+        # Descartar distancias precalculadas y rutas del mapa anterior
+        registro_modelos_global.invalidar(sucursal_id)
+        cache_rutas_global.invalidar_sucursal(sucursal_id)
+        gestor_reservas_global.invalidar(sucursal_id)
+        
         return jsonify({
             "success": True,
             "mensaje": f"Mapa {sucursal_id} guardado exitosamente"
@@ -627,12 +969,67 @@ def guardar_mapa(sucursal_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# ========== RUTAS DE DEPURACIÓN ==========
+
+@app.route('/api/debug/trazas-listas', methods=['GET'])
+def listar_trazas_listas():
+    """Lista las últimas trazas de generación de listas (solo resumen)"""
+    return jsonify({
+        "trazas": registro_trazas_global.listar(),
+        "estadisticas": registro_trazas_global.obtener_estadisticas()
+    })
+
+
+@app.route('/api/debug/trazas-listas/<comprador_id>', methods=['GET'])
+def obtener_traza_listas(comprador_id):
+    """
+    Obtiene la última traza de convergencia del Temple Simulado de un
+    comprador: una muestra por nivel de temperatura y lista (tasa de
+    aceptación, costo actual y mejor, iteraciones y tiempo).
+    """
+    traza = registro_trazas_global.obtener(comprador_id)
+    if traza is None:
+        return jsonify({"error": "No hay traza para el comprador "
+                                 "(generar listas con \"telemetria\": true)"}), 404
+    
+    return jsonify({"success": True, "traza": traza})
+
+
+@app.route('/api/debug/conversacion/<sucursal_id>/<comprador_id>', methods=['GET'])
+def obtener_conversacion(sucursal_id, comprador_id):
+    """
+    Obtiene los mensajes entre un comprador y los cajeros de una sucursal
+    que siguen en el historial del canal, en orden de llegada.
+    """
+    if sucursal_id not in gestor_canales_global.canales:
+        return jsonify({"error": "Sucursal sin canal de comunicación"}), 404
+    
+    historial = gestor_canales_global.canales[sucursal_id].historial_mensajes
+    mensajes = historial.conversacion_comprador(comprador_id)
+    if not mensajes:
+        return jsonify({"error": "No hay mensajes del comprador en el historial"}), 404
+    
+    return jsonify({
+        "success": True,
+        "sucursal_id": sucursal_id,
+        "comprador_id": comprador_id,
+        "mensajes": mensajes
+    })
+
+
 # ========== INICIALIZACIÓN Y EJECUCIÓN ==========
 
 if __name__ == '__main__':
+    # Configurar el historial antes de crear los canales de las sucursales
+    configurar_historial_mensajes()
+    
     # Inicializar cajeros al arrancar el servidor
     inicializar_cajeros()
     
+    # Cerrar los pools de rutas por lotes y de generación de listas al salir
+    atexit.register(buscador_rutas_global.cerrar)
+    atexit.register(generador_listas_global.cerrar)
+    
     # Ejecutar servidor
     print("\n🚀 Servidor Flask iniciado")
     print("📡 Escuchando en http://localhost:5000")
@@ -0,0 +1,512 @@
+"""
+Benchmarks de los algoritmos del sistema multi-agente.
+Mide los algoritmos directamente (sin levantar el servidor Flask).
+
+Uso:
+    python benchmark_algoritmos.py            # Ejecuta todos los benchmarks
+    python benchmark_algoritmos.py jps        # Ejecuta solo uno
+"""
+
+import heapq
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.algoritmos_busqueda import (
+    BusquedaAEstrella, BusquedaJerarquica, GridOcupacion, MOTORES_LISTAS, TempleSimulado,
+    crear_motor_listas, registro_catalogos_global
+)
+from utils.modelo_sucursal import ModeloSucursal
+from utils.planificacion_cooperativa import PlanificadorCooperativo
+from utils.ejecucion_paralela import BuscadorRutasLote
+from models.agente_cajero import AgenteCajero
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def imprimir_seccion(titulo):
+    """Imprime un título de sección"""
+    print("\n" + "="*70)
+    print(f"  {titulo}")
+    print("="*70 + "\n")
+
+
+def cargar_mapa(sucursal_id):
+    """Carga el JSON del mapa de una sucursal"""
+    ruta = os.path.join(DIRECTORIO_DATOS, 'mapas', f'{sucursal_id}.json')
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def cargar_inventarios():
+    """Carga los productos de todos los inventarios: {sucursal_id: productos}"""
+    directorio = os.path.join(DIRECTORIO_DATOS, 'inventario')
+    inventarios = {}
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith('.json'):
+            with open(os.path.join(directorio, nombre), 'r', encoding='utf-8') as archivo:
+                inventarios[nombre[:-5]] = json.load(archivo)['productos']
+    return inventarios
+
+
+def lista_en_banda(solucion, presupuesto, tipo_lista):
+    """Indica si la lista está dentro de la banda de presupuesto y sin penalización de variedad"""
+    return crear_motor_listas().esta_en_banda(solucion, presupuesto, tipo_lista)
+
+
+def celdas_libres(grid):
+    """Lista las posiciones transitables de un grid"""
+    return [grid.posicion(i) for i in range(grid.total_celdas) if not grid.bloqueado[i]]
+
+
+def benchmark_jps(pares_por_mapa=500, semilla=42):
+    """
+    Compara A* y Jump Point Search en SUC002 y SUC005:
+    nodos expandidos, tiempo y longitud de camino (debe coincidir).
+    """
+    imprimir_seccion("A* vs JUMP POINT SEARCH")
+    
+    a_estrella = BusquedaAEstrella(motor="a_estrella")
+    jps = BusquedaAEstrella(motor="jps")
+    
+    for sucursal_id in ("SUC002", "SUC005"):
+        grid = GridOcupacion.desde_mapa(cargar_mapa(sucursal_id))
+        libres = celdas_libres(grid)
+        rng = random.Random(semilla)
+        pares = [(rng.choice(libres), rng.choice(libres)) for _ in range(pares_por_mapa)]
+        
+        resultados = {}
+        for nombre, motor in (("A*", a_estrella), ("JPS", jps)):
+            expandidos = 0
+            costos = []
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                _, costo = motor.buscar(origen, destino, None, None, grid=grid)
+                expandidos += motor.nodos_expandidos
+                costos.append(costo)
+            duracion = time.perf_counter() - inicio
+            resultados[nombre] = (expandidos, duracion, costos)
+        
+        iguales = resultados["A*"][2] == resultados["JPS"][2]
+        print(f"{sucursal_id} ({grid.filas}x{grid.columnas}, {pares_por_mapa} pares)")
+        for nombre, (expandidos, duracion, _) in resultados.items():
+            print(f"  {nombre:4s} nodos expandidos: {expandidos / pares_por_mapa:8.1f}/búsqueda  "
+                  f"tiempo: {duracion * 1000 / pares_por_mapa:6.3f} ms/búsqueda")
+        print(f"  Longitudes de camino idénticas: {'sí' if iguales else 'NO'}\n")
+
+
+def generar_grid_almacen(filas=300, columnas=400, largo_estante=60):
+    """
+    Genera un grid sintético tipo almacén/hipermercado: filas de estanterías
+    largas (2 celdas de alto) separadas por pasillos, con cruces cada
+    largo_estante columnas.
+    """
+    obstaculos = []
+    for fila in range(3, filas - 3, 4):
+        for columna_base in range(3, columnas - 3, largo_estante + 3):
+            for j in range(min(largo_estante, columnas - 3 - columna_base)):
+                obstaculos.append((fila, columna_base + j))
+                obstaculos.append((fila + 1, columna_base + j))
+    return GridOcupacion(filas, columnas, obstaculos)
+
+
+def benchmark_hpa(pares=200, semilla=7):
+    """
+    Compara A* plano y HPA* en un almacén sintético de 300x400 celdas:
+    preprocesamiento, tiempo por búsqueda, nodos expandidos y sobrecosto
+    de longitud frente al óptimo.
+    """
+    imprimir_seccion("A* vs HPA* (ALMACÉN 300x400)")
+    
+    grid = generar_grid_almacen()
+    libres = celdas_libres(grid)
+    rng = random.Random(semilla)
+    consultas = [(rng.choice(libres), rng.choice(libres)) for _ in range(pares)]
+    
+    inicio = time.perf_counter()
+    hpa = BusquedaJerarquica(grid)
+    preprocesamiento = time.perf_counter() - inicio
+    print(f"Preprocesamiento HPA*: {preprocesamiento * 1000:.0f} ms "
+          f"({len(hpa.grafo)} nodos abstractos, clusters de {hpa.tamano_cluster}x{hpa.tamano_cluster})")
+    
+    a_estrella = BusquedaAEstrella()
+    for nombre, motor in (("A*", a_estrella), ("HPA*", hpa)):
+        expandidos = 0
+        inicio = time.perf_counter()
+        for origen, destino in consultas:
+            if motor is a_estrella:
+                motor.buscar(origen, destino, None, None, grid=grid)
+            else:
+                motor.buscar(origen, destino)
+            expandidos += motor.nodos_expandidos
+        duracion = time.perf_counter() - inicio
+        print(f"  {nombre:5s} nodos expandidos: {expandidos / pares:8.1f}/búsqueda  "
+              f"tiempo: {duracion * 1000 / pares:6.3f} ms/búsqueda")
+    
+    sobrecosto = hpa.medir_sobrecosto(consultas)
+    print(f"\n  Sobrecosto HPA*: promedio {sobrecosto['sobrecosto_promedio_pct']}%, "
+          f"máximo {sobrecosto['sobrecosto_max_pct']}%, "
+          f"caminos óptimos {sobrecosto['caminos_optimos'] * 100:.0f}%")
+
+
+def benchmark_cooperativo(compradores=200, paradas_por_comprador=4, intervalo=2, semilla=1):
+    """
+    Planifica una oleada de compradores en SUC005 con la tabla de reservas
+    espacio-temporal: throughput, esperas insertadas y verificación de que
+    no hay colisiones (misma celda e instante, ni intercambios).
+    """
+    imprimir_seccion("PLANIFICACIÓN COOPERATIVA (SUC005)")
+    
+    modelo = ModeloSucursal(cargar_mapa("SUC005"))
+    planificador = PlanificadorCooperativo(modelo)
+    rng = random.Random(semilla)
+    zonas = [zona for zona in modelo.zonas.values() if modelo.grid.es_transitable(zona)]
+    cajeros = list(modelo.cajeros.values())
+    
+    recorridos = []
+    inicio = time.perf_counter()
+    for i in range(compradores):
+        paradas = rng.sample(zonas, min(paradas_por_comprador, len(zonas))) + [rng.choice(cajeros)]
+        recorridos.append(planificador.planificar_recorrido(
+            f"C{i}", modelo.entrada, paradas, t_inicio=i * intervalo
+        ))
+    duracion = time.perf_counter() - inicio
+    
+    # Verificar que las rutas comprometidas son ejecutables a la vez
+    ocupacion = set()
+    movimientos = set()
+    colisiones = 0
+    for recorrido in recorridos:
+        ruta = recorrido["ruta_temporal"]
+        for paso, posicion in enumerate(ruta):
+            t = recorrido["t_inicio"] + paso
+            colisiones += (posicion, t) in ocupacion
+            ocupacion.add((posicion, t))
+            if paso > 0 and ruta[paso - 1] != posicion:
+                movimientos.add((ruta[paso - 1], posicion, t - 1))
+    colisiones += sum(1 for a, b, t in movimientos if (b, a, t) in movimientos)
+    
+    estadisticas = planificador.obtener_estadisticas()
+    print(f"Compradores: {compradores} (uno cada {intervalo} instantes, "
+          f"{paradas_por_comprador} paradas + cajero)")
+    print(f"  Tiempo de planificación: {duracion * 1000 / compradores:.2f} ms/comprador")
+    print(f"  Throughput: {estadisticas['throughput_por_minuto']} compradores/minuto simulado")
+    print(f"  Esperas insertadas: {estadisticas['esperas_totales']} pasos "
+          f"({estadisticas['esperas_totales'] / compradores:.1f}/comprador)")
+    print(f"  Colisiones: {colisiones}")
+
+
+def benchmark_lote(consultas=2000, semilla=3):
+    """
+    Mide el throughput de la API por lotes sobre el almacén sintético de
+    300x400 con 1 proceso y con todos los núcleos disponibles, verificando
+    que los resultados coinciden y respetan el orden de entrada.
+    """
+    imprimir_seccion("RUTAS POR LOTES (POOL DE PROCESOS)")
+    
+    grid = generar_grid_almacen()
+    libres = celdas_libres(grid)
+    rng = random.Random(semilla)
+    pares = [(rng.choice(libres), rng.choice(libres)) for _ in range(consultas)]
+    
+    nucleos = os.cpu_count() or 1
+    referencia = None
+    for procesos in sorted({1, nucleos}):
+        buscador = BuscadorRutasLote(procesos=procesos)
+        inicio = time.perf_counter()
+        resultados = buscador.buscar_lote(grid, pares)
+        duracion = time.perf_counter() - inicio
+        buscador.cerrar()
+        
+        costos = [costo for _, costo in resultados]
+        if referencia is None:
+            referencia = costos
+        print(f"  {procesos:2d} proceso(s): {consultas / duracion:8.1f} consultas/s  "
+              f"resultados idénticos: {'sí' if costos == referencia else 'NO'}")
+
+
+def benchmark_listas(motores=None, presupuestos=(50, 100, 150, 200, 333.3), semillas=5):
+    """
+    Compara los motores de listas en los 7 inventarios: porcentaje de
+    listas dentro de la banda de presupuesto (sin penalización de
+    variedad), costo medio y tiempo por lista.
+    """
+    imprimir_seccion("MOTORES DE LISTAS DE COMPRAS")
+    
+    inventarios = cargar_inventarios()
+    for motor in motores or MOTORES_LISTAS:
+        en_banda = 0
+        total = 0
+        costos = []
+        inicio = time.perf_counter()
+        for productos in inventarios.values():
+            for presupuesto in presupuestos:
+                for tipo_lista in ("exacta", "superior", "inferior"):
+                    for semilla in range(semillas):
+                        optimizador = crear_motor_listas(motor, semilla=semilla)
+                        solucion, costo, _ = optimizador.optimizar(productos, presupuesto, tipo_lista)
+                        en_banda += lista_en_banda(solucion, presupuesto, tipo_lista)
+                        costos.append(costo)
+                        total += 1
+        duracion = time.perf_counter() - inicio
+        print(f"  {motor:12s} en banda: {en_banda * 100 / total:5.1f}%  "
+              f"costo medio: {sum(costos) / total:7.2f}  "
+              f"tiempo: {duracion * 1000 / total:6.2f} ms/lista")
+
+
+def benchmark_cadenas(cadenas=(4, 6, 8, 12, 16), presupuestos=(50, 100, 150, 200, 333.3), semillas=12):
+    """
+    Barrido del número de cadenas de TempleMultiCadena en los 7 inventarios:
+    listas en banda, costo medio, iteraciones y tiempo por lista. Las
+    cadenas se recorren una tras otra, así que cada cadena extra añade su
+    solución inicial y su parte de cada nivel sin más movimientos totales.
+    """
+    imprimir_seccion("CADENAS DEL TEMPLE MULTI-CADENA")
+    
+    inventarios = cargar_inventarios()
+    for num_cadenas in cadenas:
+        en_banda = 0
+        iteraciones = 0
+        costos = []
+        inicio = time.perf_counter()
+        for productos in inventarios.values():
+            for presupuesto in presupuestos:
+                for tipo_lista in ("exacta", "superior", "inferior"):
+                    for semilla in range(semillas):
+                        optimizador = crear_motor_listas("multicadena", semilla=semilla, num_cadenas=num_cadenas)
+                        solucion, costo, iteraciones_lista = optimizador.optimizar(productos, presupuesto, tipo_lista)
+                        en_banda += lista_en_banda(solucion, presupuesto, tipo_lista)
+                        iteraciones += iteraciones_lista
+                        costos.append(costo)
+        duracion = time.perf_counter() - inicio
+        total = len(costos)
+        print(f"  {num_cadenas:2d} cadenas  en banda: {en_banda * 100 / total:5.1f}%  "
+              f"costo medio: {sum(costos) / total:7.2f}  iteraciones: {iteraciones / total:5.0f}  "
+              f"tiempo: {duracion * 1000 / total:5.2f} ms/lista")
+
+
+def benchmark_sembrado(motores=("temple", "multicadena"), presupuestos=(50, 100, 150, 200, 333.3), semillas=5):
+    """
+    Compara la solución inicial aleatoria con el sembrado voraz (ronda por
+    categorías + relleno) en los 7 inventarios: listas iniciales en banda,
+    iteraciones del temple, costo final y listas finales en banda.
+    """
+    imprimir_seccion("SEMBRADO DEL TEMPLE SIMULADO")
+    
+    inventarios = cargar_inventarios()
+    for motor in motores:
+        for sembrador in TempleSimulado.SEMBRADORES:
+            iniciales_en_banda = 0
+            en_banda = 0
+            iteraciones = 0
+            costos = []
+            inicio = time.perf_counter()
+            for productos in inventarios.values():
+                for presupuesto in presupuestos:
+                    for tipo_lista in ("exacta", "superior", "inferior"):
+                        for semilla in range(semillas):
+                            optimizador = crear_motor_listas(motor, semilla=semilla, sembrador=sembrador)
+                            inicial = optimizador._solucion_inicial(productos, presupuesto, tipo_lista)
+                            iniciales_en_banda += lista_en_banda(inicial, presupuesto, tipo_lista)
+                            
+                            optimizador = crear_motor_listas(motor, semilla=semilla, sembrador=sembrador)
+                            solucion, costo, iteraciones_lista = optimizador.optimizar(
+                                productos, presupuesto, tipo_lista
+                            )
+                            en_banda += lista_en_banda(solucion, presupuesto, tipo_lista)
+                            iteraciones += iteraciones_lista
+                            costos.append(costo)
+            duracion = time.perf_counter() - inicio
+            total = len(costos)
+            print(f"  {motor:12s} {sembrador:9s} inicial en banda: {iniciales_en_banda * 100 / total:5.1f}%  "
+                  f"iteraciones: {iteraciones / total:6.0f}  costo medio: {sum(costos) / total:7.2f}  "
+                  f"en banda: {en_banda * 100 / total:5.1f}%  tiempo: {duracion * 1000 / total:5.2f} ms/lista")
+
+
+def generar_catalogo_sintetico(tamano, semilla=0):
+    """
+    Genera un catálogo grande a partir de un inventario real: variantes de
+    sus productos con precios perturbados (múltiplos de 0.50 Bs.) y
+    subcategorías, con ids únicos.
+    """
+    base = cargar_inventarios()["SUC001"]
+    rng = random.Random(semilla)
+    catalogo = []
+    for i in range(tamano):
+        producto = dict(base[i % len(base)])
+        producto['id'] = i + 1
+        producto['precio'] = max(0.5, round(producto['precio'] * rng.uniform(0.5, 2.0) * 2) / 2)
+        producto['categoria'] = f"{producto['categoria']}-{i % 97}"
+        catalogo.append(producto)
+    return catalogo
+
+
+def benchmark_catalogo(tamanos=(100, 1000, 10000, 100000), listas=20, presupuesto=150):
+    """
+    Mide cómo escala el Temple Simulado con el tamaño del catálogo:
+    construcción de los índices (una vez por catálogo), tiempo por lista y
+    costo por iteración, que debe mantenerse plano.
+    """
+    imprimir_seccion("TEMPLE SIMULADO EN CATÁLOGOS GRANDES")
+    
+    for tamano in tamanos:
+        productos = generar_catalogo_sintetico(tamano)
+        
+        inicio = time.perf_counter()
+        registro_catalogos_global.obtener(productos)
+        indexado = time.perf_counter() - inicio
+        print(f"{tamano:7d} productos (índices: {indexado * 1000:.1f} ms)")
+        
+        for motor in ("temple", "multicadena"):
+            iteraciones = 0
+            en_banda = 0
+            inicio = time.perf_counter()
+            for semilla in range(listas):
+                tipo_lista = ("exacta", "superior", "inferior")[semilla % 3]
+                optimizador = crear_motor_listas(motor, semilla=semilla)
+                solucion, _, iteraciones_lista = optimizador.optimizar(productos, presupuesto, tipo_lista)
+                iteraciones += iteraciones_lista
+                en_banda += lista_en_banda(solucion, presupuesto, tipo_lista)
+            duracion = time.perf_counter() - inicio
+            print(f"  {motor:12s} {duracion * 1000 / listas:6.2f} ms/lista  "
+                  f"{duracion * 1e6 / iteraciones:5.2f} µs/iteración  "
+                  f"en banda: {en_banda * 100 / listas:5.1f}%")
+        print()
+
+
+def simular_cajeros(modelo, politica, llegadas, segundos_por_paso=0.5):
+    """
+    Simulación de eventos discretos de las colas de cajeros (FIFO, un
+    servidor por cajero). Cada llegada (instante, origen, servicio_s) elige
+    cajero al terminar de recolectar, con la misma información que dan los
+    cajeros en vivo (AgenteCajero.obtener_carga): compradores ya en la cola
+    de cada cajero y media móvil de sus tiempos de servicio.
+    
+    Returns:
+        Tupla (esperas en cola, tiempos hasta terminar de pagar, atendidos
+        por cajero)
+    """
+    factor_ema = AgenteCajero.FACTOR_EMA_SERVICIO
+    en_cola = {cajero_id: 0 for cajero_id in modelo.cajeros}
+    servicio_ema = {}
+    libre_desde = {cajero_id: 0.0 for cajero_id in modelo.cajeros}
+    atendidos = {cajero_id: 0 for cajero_id in modelo.cajeros}
+    esperas = []
+    totales = []
+    
+    eventos = [(instante, orden, "decidir", orden) for orden, (instante, _, _) in enumerate(llegadas)]
+    heapq.heapify(eventos)
+    orden = len(eventos)
+    
+    while eventos:
+        instante, _, tipo, dato = heapq.heappop(eventos)
+        
+        if tipo == "decidir":
+            _, origen, servicio = llegadas[dato]
+            if politica == "cercano":
+                cajero_id, distancia = modelo.cajero_mas_cercano(origen)
+            else:
+                carga = {
+                    c: (en_cola[c], servicio_ema.get(c, AgenteCajero.SEGUNDOS_BASE_SERVICIO))
+                    for c in modelo.cajeros
+                }
+                cajero_id, distancia, _ = modelo.cajero_menor_espera(origen, carga, segundos_por_paso)
+            orden += 1
+            heapq.heappush(eventos, (instante + distancia * segundos_por_paso, orden, "llegar",
+                                     (cajero_id, servicio, instante)))
+        
+        elif tipo == "llegar":
+            cajero_id, servicio, decision = dato
+            en_cola[cajero_id] += 1
+            inicio = max(instante, libre_desde[cajero_id])
+            libre_desde[cajero_id] = inicio + servicio
+            esperas.append(inicio - instante)
+            totales.append(inicio + servicio - decision)
+            orden += 1
+            heapq.heappush(eventos, (inicio + servicio, orden, "terminar", (cajero_id, servicio)))
+        
+        else:
+            cajero_id, servicio = dato
+            en_cola[cajero_id] -= 1
+            atendidos[cajero_id] += 1
+            anterior = servicio_ema.get(cajero_id)
+            servicio_ema[cajero_id] = servicio if anterior is None else anterior + factor_ema * (servicio - anterior)
+    
+    return esperas, totales, atendidos
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por rango más cercano"""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def benchmark_cajeros(sucursal_id="SUC005", compradores=2000, intervalos=(30.0, 20.0, 15.0, 10.0), semillas=5):
+    """
+    Compara la elección del cajero más cercano con la de menor espera
+    esperada (distancia + cola x servicio medio) en una simulación de la
+    sucursal: los compradores terminan de recolectar en una zona de
+    productos al azar, con llegadas de Poisson y servicio exponencial
+    proporcional a los artículos. Reporta espera en cola y tiempo hasta
+    terminar de pagar (media y p95) para varias intensidades de llegada.
+    """
+    imprimir_seccion(f"ELECCIÓN DE CAJERO CON COLAS ({sucursal_id})")
+    
+    modelo = ModeloSucursal(cargar_mapa(sucursal_id))
+    zonas = [zona for zona in modelo.zonas.values() if modelo.cajero_mas_cercano(zona)[0] is not None]
+    print(f"{len(modelo.cajeros)} cajeros, {len(zonas)} zonas de salida, {compradores} compradores x {semillas} semillas\n")
+    
+    for intervalo in intervalos:
+        for politica in ("cercano", "espera"):
+            esperas = []
+            totales = []
+            atendidos = dict.fromkeys(modelo.cajeros, 0)
+            for semilla in range(semillas):
+                rng = random.Random(semilla)
+                instante = 0.0
+                llegadas = []
+                for _ in range(compradores):
+                    instante += rng.expovariate(1 / intervalo)
+                    articulos = rng.randint(3, 15)
+                    servicio_medio = AgenteCajero.SEGUNDOS_BASE_SERVICIO + AgenteCajero.SEGUNDOS_POR_ARTICULO * articulos
+                    llegadas.append((instante, rng.choice(zonas), rng.expovariate(1 / servicio_medio)))
+                
+                esperas_semilla, totales_semilla, atendidos_semilla = simular_cajeros(modelo, politica, llegadas)
+                esperas.extend(esperas_semilla)
+                totales.extend(totales_semilla)
+                for cajero_id, cantidad in atendidos_semilla.items():
+                    atendidos[cajero_id] += cantidad
+            
+            reparto = " ".join(f"{cantidad * 100 / len(esperas):3.0f}%" for cantidad in atendidos.values())
+            print(f"  llegada cada {intervalo:4.1f} s  {politica:8s} "
+                  f"espera media: {sum(esperas) / len(esperas):7.1f} s  p95: {percentil(esperas, 95):7.1f} s  "
+                  f"hasta pagar media: {sum(totales) / len(totales):7.1f} s  p95: {percentil(totales, 95):7.1f} s  "
+                  f"reparto: {reparto}")
+        print()
+
+
+BENCHMARKS = {
+    "jps": benchmark_jps,
+    "hpa": benchmark_hpa,
+    "cooperativo": benchmark_cooperativo,
+    "lote": benchmark_lote,
+    "listas": benchmark_listas,
+    "cadenas": benchmark_cadenas,
+    "sembrado": benchmark_sembrado,
+    "catalogo": benchmark_catalogo,
+    "cajeros": benchmark_cajeros,
+}
+
+
+if __name__ == "__main__":
+    seleccion = sys.argv[1:] or list(BENCHMARKS)
+    
+    for nombre in seleccion:
+        if nombre not in BENCHMARKS:
+            print(f"❌ Benchmark desconocido: {nombre} (disponibles: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[nombre]()
@@ -4,9 +4,12 @@ Agente reactivo simple que escucha mensajes de compradores,
 procesa productos y genera facturas.
 """
 
-import json
-import os
-from typing import Dict, Callable, Optional
+import queue
+import threading
+import time
+from typing import Dict, Callable, Optional, Tuple
+
+from utils.tabla_precios import registro_precios_global
 
 
 class AgenteCajero:
@@ -36,6 +39,14 @@ class AgenteCajero:
     | sin_mensajes ∧ disponible                  | esperar()                           |
     """
     
+    # Tiempo de servicio simulado de un pedido, en las mismas unidades que
+    # el tiempo de caminar del comprador (SEGUNDOS_POR_PASO)
+    SEGUNDOS_BASE_SERVICIO = 5.0
+    SEGUNDOS_POR_ARTICULO = 2.0
+    
+    # Factor de suavizado de las medias exponenciales del tiempo de servicio
+    FACTOR_EMA_SERVICIO = 0.2
+    
     def __init__(self, cajero_id: str, sucursal_id: str, posicion: Dict):
         """
         Inicializa el agente cajero.
@@ -52,8 +63,9 @@ class AgenteCajero:
         # Estado interno (Simple Reflex Agent tiene estado mínimo)
         self.estado = "disponible"  # disponible, procesando
         
-        # Inventario de precios (cargado del archivo)
+        # Inventario de precios (tabla compartida por la sucursal, solo lectura)
         self.inventario_precios = {}
+        self.version_precios = None
         self._cargar_inventario()
         
         # Callback para enviar respuestas
@@ -62,6 +74,7 @@ class AgenteCajero:
         # Estadísticas
         self.pedidos_procesados = 0
         self.total_facturado = 0.0
+        self.servicio_simulado_ema = None  # Segundos simulados por pedido
         
         print(f"[Agente Cajero {self.cajero_id}] Inicializado en sucursal {sucursal_id}")
         print(f"  Posición: {self.posicion}")
@@ -72,29 +85,20 @@ class AgenteCajero:
     
     def _cargar_inventario(self):
         """
-        Carga el inventario de precios desde el archivo JSON.
+        Obtiene la tabla de precios vigente de la sucursal.
+        La tabla se carga una sola vez por sucursal y se comparte entre
+        todos sus cajeros; si el archivo cambió, se toma la versión nueva.
         """
-        ruta_inventario = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            'data', 'inventario', f'{self.sucursal_id}.json'
-        )
-        
         try:
-            with open(ruta_inventario, 'r', encoding='utf-8') as archivo:
-                data = json.load(archivo)
-                # Crear diccionario producto_id -> precio
-                for producto in data.get('productos', []):
-                    self.inventario_precios[producto['id']] = {
-                        'nombre': producto['nombre'],
-                        'precio': producto['precio'],
-                        'categoria': producto['categoria']
-                    }
-        except FileNotFoundError:
-            print(f"[ERROR Cajero {self.cajero_id}] Inventario no encontrado")
-            self.inventario_precios = {}
-        except json.JSONDecodeError:
-            print(f"[ERROR Cajero {self.cajero_id}] Error al decodificar inventario")
+            tabla = registro_precios_global.obtener(self.sucursal_id)
+        except ValueError as e:
+            print(f"[ERROR Cajero {self.cajero_id}] {e}")
             self.inventario_precios = {}
+            self.version_precios = None
+            return
+        
+        self.inventario_precios = tabla.precios
+        self.version_precios = tabla.version
     
     def registrar_callback_respuesta(self, callback: Callable):
         """
@@ -197,8 +201,12 @@ class AgenteCajero:
         # Acción 1: Cambiar estado
         self.estado = "procesando"
         
+        # Precios vigentes para todo el pedido (recoge cambios del inventario)
+        self._cargar_inventario()
+        
         comprador_id = mensaje.get('comprador_id')
         productos = mensaje.get('productos', [])
+        pedido_id = mensaje.get('pedido_id')
         
         print(f"  Procesando {len(productos)} productos...")
         
@@ -207,10 +215,10 @@ class AgenteCajero:
         
         if not productos_validos:
             # Acción 3a: Generar error
-            return self._generar_error(comprador_id, producto_invalido)
+            return self._generar_error(comprador_id, producto_invalido, pedido_id)
         
         # Acción 3b: Calcular total y generar factura
-        factura = self._generar_factura(comprador_id, productos)
+        factura = self._generar_factura(comprador_id, productos, pedido_id)
         
         # Acción 4: Enviar respuesta
         if self.callback_respuesta:
@@ -222,19 +230,22 @@ class AgenteCajero:
         # Actualizar estadísticas
         self.pedidos_procesados += 1
         self.total_facturado += factura['total']
+        self._registrar_servicio_simulado(productos)
         
         print(f"  ✓ Factura generada: {factura['total']} Bs.")
         print(f"  Estado: {self.estado}")
         
         return factura
     
-    def _generar_factura(self, comprador_id: str, productos: list) -> Dict:
+    def _generar_factura(self, comprador_id: str, productos: list,
+                         pedido_id: Optional[str] = None) -> Dict:
         """
         Acción: Genera la factura con los productos procesados.
         
         Args:
             comprador_id: ID del comprador
             productos: Lista de productos recolectados
+            pedido_id: ID del pedido al que responde (lo asigna el canal)
             
         Returns:
             Factura completa
@@ -271,18 +282,21 @@ class AgenteCajero:
             "sucursal_id": self.sucursal_id,
             "items": items,
             "total": round(total, 2),
-            "cantidad_items": len(items)
+            "cantidad_items": len(items),
+            "pedido_id": pedido_id
         }
         
         return factura
     
-    def _generar_error(self, comprador_id: str, producto_id: int) -> Dict:
+    def _generar_error(self, comprador_id: str, producto_id: int,
+                       pedido_id: Optional[str] = None) -> Dict:
         """
         Acción: Genera mensaje de error cuando producto no existe.
         
         Args:
             comprador_id: ID del comprador
             producto_id: ID del producto que causó error
+            pedido_id: ID del pedido al que responde (lo asigna el canal)
             
         Returns:
             Mensaje de error
@@ -297,7 +311,8 @@ class AgenteCajero:
             "cajero_id": self.cajero_id,
             "comprador_id": comprador_id,
             "mensaje": f"Producto {producto_id} no encontrado en inventario",
-            "producto_id": producto_id
+            "producto_id": producto_id,
+            "pedido_id": pedido_id
         }
         
         # Enviar error
@@ -308,6 +323,40 @@ class AgenteCajero:
     
     # ========== MÉTODOS DE ESTADO ==========
     
+    def tiempo_servicio_simulado(self, productos: list) -> float:
+        """
+        Segundos simulados que lleva atender un pedido.
+        
+        Args:
+            productos: Lista de productos del pedido
+            
+        Returns:
+            Tiempo base más el tiempo por artículo (unidades incluidas)
+        """
+        articulos = sum(item.get('cantidad', 1) for item in productos)
+        return self.SEGUNDOS_BASE_SERVICIO + self.SEGUNDOS_POR_ARTICULO * articulos
+    
+    def _registrar_servicio_simulado(self, productos: list):
+        """Actualiza la media exponencial del tiempo de servicio simulado"""
+        segundos = self.tiempo_servicio_simulado(productos)
+        if self.servicio_simulado_ema is None:
+            self.servicio_simulado_ema = segundos
+        else:
+            self.servicio_simulado_ema += self.FACTOR_EMA_SERVICIO * (segundos - self.servicio_simulado_ema)
+    
+    def obtener_carga(self) -> Tuple[int, float]:
+        """
+        Carga actual del cajero para elegir cajero por espera esperada.
+        
+        Returns:
+            Tupla (pedidos en espera o en atención, tiempo de servicio
+            simulado medio en segundos; SEGUNDOS_BASE_SERVICIO si todavía
+            no atendió ningún pedido)
+        """
+        en_cola = 1 if self.estado == "procesando" else 0
+        servicio = self.servicio_simulado_ema
+        return en_cola, self.SEGUNDOS_BASE_SERVICIO if servicio is None else servicio
+    
     def obtener_estado(self) -> Dict:
         """
         Obtiene el estado actual del cajero.
@@ -315,6 +364,7 @@ class AgenteCajero:
         Returns:
             Estado completo del cajero
         """
+        servicio = self.servicio_simulado_ema
         return {
             "cajero_id": self.cajero_id,
             "sucursal_id": self.sucursal_id,
@@ -325,7 +375,9 @@ class AgenteCajero:
             "estado": self.estado,
             "pedidos_procesados": self.pedidos_procesados,
             "total_facturado": round(self.total_facturado, 2),
-            "productos_en_inventario": len(self.inventario_precios)
+            "productos_en_inventario": len(self.inventario_precios),
+            "version_precios": self.version_precios,
+            "servicio_simulado_s": round(servicio, 3) if servicio is not None else None
         }
     
     def reiniciar_estadisticas(self):
@@ -341,56 +393,271 @@ class AgenteCajero:
 
 class AgenteCajeroConLoop(AgenteCajero):
     """
-    Versión alternativa del cajero con loop explícito de percepción-acción.
-    Útil para entender mejor el ciclo REAS.
+    Versión del cajero con loop explícito de percepción-acción servido por
+    un hilo propio.
+    
+    Cada cajero tiene una cola de mensajes (queue.Queue) acotada por un
+    semáforo de plazas:
+    - El hilo bloquea en la cola mientras no hay mensajes (no consume CPU)
+    - Si no quedan plazas, el envío espera hasta espera_encolar_s (sin
+      tomar ningún lock) y luego se rechaza con un mensaje de error
+      (contrapresión)
+    - detener() atiende los mensajes ya encolados antes de terminar, sin
+      esperar a los envíos que aguardan plaza
+    - obtener_estado() incluye profundidad de cola y tiempos de servicio
+    
+    Mientras el ciclo está activo, escuchar_mensaje solo encola y la factura
+    se envía por el callback de respuesta al terminar de procesarla.
     """
     
-    def __init__(self, cajero_id: str, sucursal_id: str, posicion: Dict):
+    # Marca de fin de ciclo (se encola detrás de los mensajes pendientes)
+    _FIN = object()
+    
+    def __init__(
+        self,
+        cajero_id: str,
+        sucursal_id: str,
+        posicion: Dict,
+        capacidad_cola: int = 32,
+        espera_encolar_s: float = 1.0
+    ):
+        """
+        Inicializa el cajero con su cola de mensajes.
+        
+        Args:
+            cajero_id: Identificador único del cajero
+            sucursal_id: ID de la sucursal donde está el cajero
+            posicion: Diccionario con {"fila": int, "columna": int}
+            capacidad_cola: Máximo de mensajes en espera
+            espera_encolar_s: Segundos que espera un envío con la cola llena
+        """
+        if capacidad_cola < 1:
+            raise ValueError("capacidad_cola debe ser al menos 1")
+        
         super().__init__(cajero_id, sucursal_id, posicion)
         self.activo = False
-        self.cola_mensajes = []
+        self.capacidad_cola = capacidad_cola
+        self.espera_encolar_s = espera_encolar_s
+        self.cola_mensajes = queue.Queue()
+        self._plazas = threading.BoundedSemaphore(capacidad_cola)
+        self._hilo = None
+        self._lock_cola = threading.Lock()  # Ordena encolados frente a detener()
+        self._en_servicio = False  # El hilo está atendiendo un mensaje
+    
+        # Estadísticas de la cola
+        self.mensajes_encolados = 0
+        self.mensajes_rechazados = 0
+        self.mensajes_atendidos = 0
+        self.tiempo_servicio_total = 0.0
+        self.tiempo_servicio_max = 0.0
+        self.tiempo_servicio_ema = None
+        self.tiempo_espera_total = 0.0
+    
+    def escuchar_mensaje(self, mensaje: Dict) -> Optional[Dict]:
+        """
+        Sensor: con el ciclo activo encola el mensaje para el hilo del cajero;
+        si no, lo procesa de forma síncrona como AgenteCajero.
+        
+        Args:
+            mensaje: Mensaje recibido del canal
+            
+        Returns:
+            Factura si se procesó de forma síncrona, None si se encoló
+        """
+        if not self.activo:
+            return super().escuchar_mensaje(mensaje)
+        
+        if not self._mensaje_es_para_mi(mensaje):
+            return self._ignorar_mensaje(mensaje)
+        
+        if not self.agregar_mensaje_a_cola(mensaje):
+            self._rechazar_pedido(mensaje, "Cola del cajero llena, intente más tarde")
+        
+        return None
     
-    def agregar_mensaje_a_cola(self, mensaje: Dict):
+    def agregar_mensaje_a_cola(self, mensaje: Dict, timeout: Optional[float] = None) -> bool:
         """
         Agrega un mensaje a la cola de percepción.
+        Si la cola está llena espera plaza hasta que venza el plazo; la
+        espera se hace fuera de _lock_cola para no bloquear a detener().
         
         Args:
             mensaje: Mensaje a procesar
+            timeout: Segundos máximos de espera (None = espera_encolar_s)
+            
+        Returns:
+            True si el mensaje quedó encolado
         """
-        self.cola_mensajes.append(mensaje)
+        if timeout is None:
+            timeout = self.espera_encolar_s
+        
+        if not self.activo:
+            return False
+        
+        if not self._plazas.acquire(timeout=timeout):
+            with self._lock_cola:
+                self.mensajes_rechazados += 1
+            print(f"[Agente Cajero {self.cajero_id}] ⚠ Cola llena ({self.capacidad_cola}), mensaje rechazado")
+            return False
+        
+        with self._lock_cola:
+            if not self.activo:
+                # Se detuvo mientras esperaba plaza
+                self._plazas.release()
+                return False
+            
+            self.cola_mensajes.put_nowait((time.perf_counter(), mensaje))
+            self.mensajes_encolados += 1
+            return True
     
     def ejecutar_ciclo_reas(self):
         """
         Ciclo explícito del agente reflexivo simple:
         
         loop:
-            percepcion = PERCIBIR()
+            percepcion = PERCIBIR()        # bloquea hasta que llega un mensaje
             accion = REGLA_CORRESPONDIENTE(percepcion)
             EJECUTAR(accion)
         """
-        while self.activo:
+        while True:
             # PERCIBIR
-            if not self.cola_mensajes:
-                # Sin mensajes, esperar
-                continue
+            elemento = self.cola_mensajes.get()
             
-            mensaje = self.cola_mensajes.pop(0)
+            if elemento is self._FIN:
+                break
+            
+            self._plazas.release()
+            self._en_servicio = True
+            instante_encolado, mensaje = elemento
+            inicio = time.perf_counter()
+            self.tiempo_espera_total += inicio - instante_encolado
             
             # APLICAR REGLAS
-            if self._mensaje_es_para_mi(mensaje):
-                if self.estado == "disponible":
+            try:
+                if self._mensaje_es_para_mi(mensaje):
+                    if self.estado == "disponible":
+                        # EJECUTAR ACCIÓN
+                        self._procesar_pedido(mensaje)
+                    else:
+                        # EJECUTAR ACCIÓN: el comprador no se queda esperando
+                        self._rechazar_pedido(mensaje, "Cajero ocupado, intente más tarde")
+                else:
                     # EJECUTAR ACCIÓN
-                    self._procesar_pedido(mensaje)
-            else:
-                # EJECUTAR ACCIÓN
-                self._ignorar_mensaje(mensaje)
+                    self._ignorar_mensaje(mensaje)
+            except Exception as e:
+                print(f"[Agente Cajero {self.cajero_id}] ✗ Error al procesar pedido: {e}")
+                self.estado = "disponible"
+                self._rechazar_pedido(mensaje, f"Error al procesar pedido: {e}")
+            finally:
+                self._en_servicio = False
+            
+            self._registrar_servicio(time.perf_counter() - inicio)
+    
+    def _registrar_servicio(self, segundos: float):
+        """
+        Actualiza las estadísticas de tiempo de servicio.
+        
+        Args:
+            segundos: Duración del procesamiento del último mensaje
+        """
+        self.mensajes_atendidos += 1
+        self.tiempo_servicio_total += segundos
+        self.tiempo_servicio_max = max(self.tiempo_servicio_max, segundos)
+        
+        if self.tiempo_servicio_ema is None:
+            self.tiempo_servicio_ema = segundos
+        else:
+            self.tiempo_servicio_ema += self.FACTOR_EMA_SERVICIO * (segundos - self.tiempo_servicio_ema)
+    
+    def obtener_carga(self) -> Tuple[int, float]:
+        """
+        Carga actual del cajero: mensajes en su cola más el que está
+        atendiendo, y tiempo de servicio simulado medio (ver AgenteCajero).
+        
+        Returns:
+            Tupla (pedidos en espera o en atención, segundos simulados por pedido)
+        """
+        _, servicio = super().obtener_carga()
+        return self.cola_mensajes.qsize() + (1 if self._en_servicio else 0), servicio
+    
+    def _rechazar_pedido(self, mensaje: Dict, motivo: str):
+        """
+        Acción: Responde con un error sin procesar el pedido, para que el
+        comprador no espere hasta agotar su plazo.
+        
+        Args:
+            mensaje: Mensaje rechazado
+            motivo: Descripción del rechazo
+        """
+        comprador_id = mensaje.get('comprador_id')
+        
+        if self.callback_respuesta:
+            self.callback_respuesta(comprador_id, {
+                "tipo": "error",
+                "cajero_id": self.cajero_id,
+                "comprador_id": comprador_id,
+                "mensaje": motivo,
+                "pedido_id": mensaje.get('pedido_id')
+            })
     
     def iniciar(self):
-        """Inicia el ciclo del agente"""
-        self.activo = True
+        """Inicia el ciclo del agente en su propio hilo"""
+        with self._lock_cola:
+            if self.activo:
+                return
+            self.activo = True
+        
+        self._hilo = threading.Thread(
+            target=self.ejecutar_ciclo_reas,
+            name=f"cajero-{self.sucursal_id}-{self.cajero_id}",
+            daemon=True
+        )
+        self._hilo.start()
         print(f"[Agente Cajero {self.cajero_id}] Ciclo REAS iniciado")
     
-    def detener(self):
-        """Detiene el ciclo del agente"""
-        self.activo = False
+    def detener(self, esperar: bool = True, timeout: Optional[float] = None):
+        """
+        Detiene el ciclo del agente tras atender los mensajes ya encolados.
+        
+        Args:
+            esperar: Si True, espera a que el hilo termine
+            timeout: Segundos máximos de espera del hilo (None = sin límite)
+        """
+        with self._lock_cola:
+            if not self.activo:
+                return
+            self.activo = False
+        
+        # La marca va detrás de los pendientes (no ocupa plaza): se procesan
+        # antes de salir
+        self.cola_mensajes.put_nowait(self._FIN)
+        
+        if esperar and self._hilo is not None:
+            self._hilo.join(timeout)
+        
         print(f"[Agente Cajero {self.cajero_id}] Ciclo REAS detenido")
+
+    def obtener_estado(self) -> Dict:
+        """
+        Obtiene el estado actual del cajero, incluida su cola.
+        
+        Returns:
+            Estado completo del cajero
+        """
+        estado = super().obtener_estado()
+        atendidos = self.mensajes_atendidos
+        
+        estado["cola"] = {
+            "activa": self.activo,
+            "profundidad": self.cola_mensajes.qsize(),
+            "capacidad": self.capacidad_cola,
+            "encolados": self.mensajes_encolados,
+            "atendidos": atendidos,
+            "rechazados": self.mensajes_rechazados,
+            "servicio_medio_ms": round(self.tiempo_servicio_total / atendidos * 1000, 3) if atendidos else None,
+            "servicio_ema_ms": round(self.tiempo_servicio_ema * 1000, 3) if self.tiempo_servicio_ema is not None else None,
+            "servicio_max_ms": round(self.tiempo_servicio_max * 1000, 3),
+            "espera_media_ms": round(self.tiempo_espera_total / atendidos * 1000, 3) if atendidos else None
+        }
+        
+        return estado
@@ -6,8 +6,18 @@ recolectando productos y se comunica con cajeros.
 
 import json
 import os
+from concurrent.futures import CancelledError, TimeoutError as TiempoAgotado
 from typing import List, Dict, Tuple, Optional
-from utils.algoritmos_busqueda import BusquedaAEstrella, BusquedaCostoUniforme, TempleSimulado
+from utils.algoritmos_busqueda import (
+    BusquedaAEstrella, BusquedaCostoUniforme, BusquedaDStarLite, TempleSimulado,
+    OptimizadorOrdenRecoleccion
+)
+from utils.modelo_sucursal import registro_modelos_global
+from utils.cache import cache_rutas_global, cache_listas_global, semilla_determinista
+from utils.planificacion_cooperativa import gestor_reservas_global
+from utils.ejecucion_paralela import generador_listas_global
+from utils.telemetria import registro_trazas_global
+from utils.tabla_precios import registro_precios_global
 
 
 class AgenteComprador:
@@ -25,6 +35,15 @@ class AgenteComprador:
     - Sensors: Posición actual, inventario, ubicaciones, presupuesto
     """
     
+    # Tiempo máximo de espera de la factura del cajero (segundos)
+    TIMEOUT_FACTURA_S = 5.0
+    
+    # Políticas de elección de cajero: el más cercano o el de menor espera
+    POLITICAS_CAJERO = ("cercano", "espera")
+    
+    # Tiempo de caminar una celda (para comparar distancia con espera en cola)
+    SEGUNDOS_POR_PASO = 0.5
+    
     def __init__(self, comprador_id: str):
         """
         Inicializa el agente comprador.
@@ -44,6 +63,8 @@ class AgenteComprador:
         self.inventario_sucursal = None
         self.dimensiones = None
         self.obstaculos = set()
+        self.grid = None  # Grid de ocupación compacto para las búsquedas
+        self.modelo_sucursal = None  # Distancias precalculadas entre puntos de interés
         
         # Listas generadas
         self.lista_exacta = None
@@ -56,6 +77,12 @@ class AgenteComprador:
         self.productos_pendientes = []
         self.ruta_actual = []
         self.distancia_total_recorrida = 0
+        self.plan_recoleccion = []
+        
+        # Replanificación incremental ante obstáculos dinámicos
+        self.planificador_incremental = None  # BusquedaDStarLite del tramo actual
+        self.cambios_obstaculos = {}  # {(fila, columna): True si bloqueada, False si liberada}
+        self.ruta_cooperativa = None  # Recorrido reservado en la tabla espacio-temporal
         
         # Objetivos y estado
         self.objetivo_actual = "disponible"  # disponible, planificando, esperando_usuario, recolectando, buscando_cajero, en_caja, finalizado
@@ -73,11 +100,16 @@ class AgenteComprador:
             temperatura_inicial=1000.0,
             temperatura_minima=1.0,
             factor_enfriamiento=0.95,
-            iteraciones_por_temperatura=100
+            iteraciones_por_temperatura=100,
+            sembrador="voraz"
         )
+        self.optimizador_orden = OptimizadorOrdenRecoleccion()
+        self.motor_listas = "temple"  # Motor de generación de listas (ver MOTORES_LISTAS)
+        self.version_inventario = None  # Hash de los productos (clave de la caché de listas)
         
         # Canal de comunicación (se asigna cuando entra a sucursal)
         self.canal_comunicacion = None
+        self.respuesta_cajero = None  # Future con la factura del último pedido
         
         print(f"[Agente Comprador {self.comprador_id}] Inicializado y disponible")
     
@@ -106,28 +138,19 @@ class AgenteComprador:
         except json.JSONDecodeError:
             raise ValueError(f"Error al decodificar mapa de {sucursal_id}")
     
-    def _cargar_inventario(self, sucursal_id: str) -> Dict:
+    def _cargar_inventario(self, sucursal_id: str):
         """
         Sensor: Percibe el inventario de la sucursal.
+        El inventario se lee una sola vez por sucursal y se comparte
+        (solo lectura) con los demás compradores y cajeros.
         
         Args:
             sucursal_id: ID de la sucursal
             
         Returns:
-            Diccionario con información del inventario
+            TablaPrecios vigente de la sucursal (inventario y versión)
         """
-        ruta_inventario = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            'data', 'inventario', f'{sucursal_id}.json'
-        )
-        
-        try:
-            with open(ruta_inventario, 'r', encoding='utf-8') as archivo:
-                return json.load(archivo)
-        except FileNotFoundError:
-            raise ValueError(f"Inventario no encontrado para sucursal {sucursal_id}")
-        except json.JSONDecodeError:
-            raise ValueError(f"Error al decodificar inventario de {sucursal_id}")
+        return registro_precios_global.obtener(sucursal_id)
     
     def _procesar_mapa(self):
         """
@@ -148,6 +171,12 @@ class AgenteComprador:
         # Extraer entrada
         entrada = self.mapa_sucursal['entrada']
         self.posicion_entrada = (entrada['fila'], entrada['columna'])
+        
+        # Obtener modelo precalculado (se reconstruye solo si el mapa cambió)
+        self.modelo_sucursal = registro_modelos_global.obtener_modelo(
+            self.sucursal_id, self.mapa_sucursal
+        )
+        self.grid = self.modelo_sucursal.grid
     
     # ========== ACCIONES (ACTUADORES) ==========
     
@@ -178,9 +207,14 @@ class AgenteComprador:
         
         # Cargar mapa e inventario (percepción)
         self.mapa_sucursal = self._cargar_mapa(sucursal_id)
-        self.inventario_sucursal = self._cargar_inventario(sucursal_id)
+        tabla_precios = self._cargar_inventario(sucursal_id)
+        self.inventario_sucursal = tabla_precios.inventario
         self._procesar_mapa()
         
+        # Motor de listas configurado para la sucursal (opcional en el inventario)
+        self.motor_listas = self.inventario_sucursal.get('motor_listas', 'temple')
+        self.version_inventario = tabla_precios.version
+        
         # Posicionarse en la entrada
         self.posicion_actual = self.posicion_entrada
         
@@ -198,15 +232,45 @@ class AgenteComprador:
             "productos_disponibles": len(self.inventario_sucursal['productos'])
         }
     
-    def generar_listas_compras(self) -> Dict:
+    def generar_listas_compras(
+        self,
+        motor: Optional[str] = None,
+        semilla: Optional[int] = None,
+        usar_cache: bool = True,
+        limite_ms: Optional[float] = None,
+        telemetria: bool = False,
+        observador=None
+    ) -> Dict:
         """
         Acción: Genera tres listas de compras usando Temple Simulado.
+        Las tres listas se generan a la vez en procesos independientes.
         
         Planificación:
         - Lista exacta: 100% del presupuesto (±0.2%)
         - Lista superior: 100-105% del presupuesto
         - Lista inferior: 95-100% del presupuesto
         
+        Con caché (modo determinista) la semilla se deriva del inventario,
+        el presupuesto y el motor, así que la misma consulta produce
+        siempre las mismas listas y se sirve desde cache_listas_global.
+        
+        Con limite_ms la generación se corta al agotarse el tiempo y cada
+        lista indica si quedó en la banda ("en_banda"). Esas listas pueden
+        leerse de la caché pero no se guardan en ella (dependen del tiempo).
+        
+        Con telemetría se generan las tres listas (sin leer la caché) y su
+        traza de convergencia se guarda en registro_trazas_global.
+        
+        Args:
+            motor: Motor de listas ("temple", "multicadena", "exacto"); por
+                   defecto el configurado para la sucursal
+            semilla: Semilla explícita (None = derivada o aleatoria)
+            usar_cache: Si es False, genera listas nuevas aleatorias sin caché
+            limite_ms: Tiempo máximo de generación en milisegundos (None = sin límite)
+            telemetria: Si se registra la traza de convergencia de cada lista
+            observador: Función observador(tipo_lista, muestra) llamada por cada
+                        nivel de temperatura durante la generación (implica telemetría)
+        
         Returns:
             Diccionario con las tres listas generadas
         """
@@ -215,30 +279,76 @@ class AgenteComprador:
         
         self.objetivo_actual = "planificando"
         productos = self.inventario_sucursal['productos']
+        motor = motor or self.motor_listas
+        parametros = {
+            "temperatura_inicial": self.temple_simulado.temperatura_inicial,
+            "temperatura_minima": self.temple_simulado.temperatura_minima,
+            "factor_enfriamiento": self.temple_simulado.factor_enfriamiento,
+            "iteraciones_por_temperatura": self.temple_simulado.iteraciones_por_temperatura,
+            "sembrador": self.temple_simulado.sembrador
+        }
         
-        # Generar lista exacta
-        print("  Generando lista exacta...")
-        lista_exacta_raw, costo_exacta, iter_exacta = self.temple_simulado.optimizar(
-            productos, self.vale_presupuesto, tipo_lista="exacta"
-        )
-        self.lista_exacta = self._formatear_lista(lista_exacta_raw)
-        print(f"    ✓ Costo: {costo_exacta:.2f}, Iteraciones: {iter_exacta}")
+        telemetria = telemetria or observador is not None
+        trazas = {} if telemetria else None
         
-        # Generar lista superior
-        print("  Generando lista superior...")
-        lista_superior_raw, costo_superior, iter_superior = self.temple_simulado.optimizar(
-            productos, self.vale_presupuesto, tipo_lista="superior"
-        )
-        self.lista_superior = self._formatear_lista(lista_superior_raw)
-        print(f"    ✓ Costo: {costo_superior:.2f}, Iteraciones: {iter_superior}")
+        resultados = {}
+        if usar_cache:
+            if semilla is None:
+                semilla = semilla_determinista(
+                    self.version_inventario, self.vale_presupuesto, motor, sorted(parametros.items())
+                )
+            clave_parametros = dict(parametros, semilla=semilla)
+            
+        # Con telemetría se generan todas las listas para obtener su traza
+        if usar_cache and not telemetria:
+            for tipo_lista in ("exacta", "superior", "inferior"):
+                en_cache = cache_listas_global.obtener_lista(
+                    self.sucursal_id, self.version_inventario, self.vale_presupuesto,
+                    tipo_lista, motor, clave_parametros
+                )
+                if en_cache is not None:
+                    resultados[tipo_lista] = en_cache
+        
+        # Generar en paralelo solo las listas que no están en caché
+        faltantes = tuple(t for t in ("exacta", "superior", "inferior") if t not in resultados)
+        if faltantes:
+            generados = generador_listas_global.generar(
+                productos,
+                self.vale_presupuesto,
+                tipos=faltantes,
+                parametros=parametros,
+                semilla=semilla,
+                motor=motor,
+                limite_ms=limite_ms,
+                version=self.version_inventario,
+                trazas=trazas,
+                observador=observador
+            )
+            for tipo_lista, resultado in generados.items():
+                resultados[tipo_lista] = resultado
+                if usar_cache and limite_ms is None:
+                    cache_listas_global.guardar_lista(
+                        self.sucursal_id, self.version_inventario, self.vale_presupuesto,
+                        tipo_lista, motor, clave_parametros, resultado
+                    )
+        
+        if telemetria:
+            registro_trazas_global.registrar(
+                self.comprador_id, trazas,
+                sucursal_id=self.sucursal_id,
+                presupuesto=self.vale_presupuesto,
+                motor=motor,
+                parametros=parametros
+            )
         
-        # Generar lista inferior
-        print("  Generando lista inferior...")
-        lista_inferior_raw, costo_inferior, iter_inferior = self.temple_simulado.optimizar(
-            productos, self.vale_presupuesto, tipo_lista="inferior"
-        )
-        self.lista_inferior = self._formatear_lista(lista_inferior_raw)
-        print(f"    ✓ Costo: {costo_inferior:.2f}, Iteraciones: {iter_inferior}")
+        for tipo_lista in ("exacta", "superior", "inferior"):
+            lista_raw, costo, iteraciones = resultados[tipo_lista]
+            lista = self._formatear_lista(lista_raw)
+            lista["en_banda"] = self.temple_simulado.esta_en_banda(lista_raw, self.vale_presupuesto, tipo_lista)
+            setattr(self, f"lista_{tipo_lista}", lista)
+            origen = "desde caché" if tipo_lista not in faltantes else "generada"
+            print(f"  Generando lista {tipo_lista}...")
+            print(f"    ✓ Costo: {costo:.2f}, Iteraciones: {iteraciones} ({origen})")
         
         # Actualizar estado de planificación
         self.estado_planificacion["listas_generadas"] = True
@@ -326,7 +436,10 @@ class AgenteComprador:
     def iniciar_recoleccion(self) -> Dict:
         """
         Acción: Inicia el proceso de recolección de productos.
-        Planifica las rutas usando A*.
+        Ordena los productos para minimizar la distancia total (terminando
+        en el cajero más cercano) y planifica las rutas con las tablas
+        precalculadas de la sucursal (A* solo para destinos fuera de los
+        puntos de interés).
         
         Returns:
             Plan de recolección con rutas
@@ -337,6 +450,9 @@ class AgenteComprador:
         plan_recoleccion = []
         distancia_total_planificada = 0
         
+        # Reordenar productos pendientes (TSP)
+        optimizacion_ruta = self._optimizar_orden_recoleccion()
+        
         posicion_origen = self.posicion_actual
         
         for idx, producto_item in enumerate(self.productos_pendientes):
@@ -350,15 +466,9 @@ class AgenteComprador:
                 print(f"  ⚠ Producto {producto_id} no encontrado en mapa, omitiendo...")
                 continue
             
-            # Calcular ruta con A*
+            # Calcular ruta (tablas precalculadas o A*)
             print(f"  [{idx + 1}/{len(self.productos_pendientes)}] Planificando ruta a {producto_item['nombre']}...")
-            ruta, distancia = self.a_estrella.buscar(
-                inicio=posicion_origen,
-                objetivo=ubicacion_producto,
-                dimensiones=self.dimensiones,
-                obstaculos=self.obstaculos,
-                usar_manhattan=True
-            )
+            ruta, distancia = self._calcular_ruta(posicion_origen, ubicacion_producto)
             
             if not ruta:
                 print(f"    ✗ No se encontró ruta al producto")
@@ -380,20 +490,245 @@ class AgenteComprador:
             distancia_total_planificada += distancia
             posicion_origen = ubicacion_producto  # Siguiente origen
         
+        self.plan_recoleccion = plan_recoleccion
+        
         print(f"\n  Plan de recolección completado")
         print(f"  Productos en ruta: {len(plan_recoleccion)}")
         print(f"  Distancia total estimada: {distancia_total_planificada} pasos")
+        print(f"  Recorrido hasta cajero: {optimizacion_ruta['distancia_planificada']} pasos "
+              f"(orden original: {optimizacion_ruta['distancia_naive']} pasos)")
         
         return {
             "comprador_id": self.comprador_id,
             "plan_recoleccion": plan_recoleccion,
             "distancia_total_planificada": distancia_total_planificada,
-            "productos_en_plan": len(plan_recoleccion)
+            "productos_en_plan": len(plan_recoleccion),
+            "optimizacion_ruta": optimizacion_ruta
         }
     
+    def _optimizar_orden_recoleccion(self) -> Dict:
+        """
+        Reordena productos_pendientes para minimizar la distancia recorrida
+        desde la posición actual, pasando por todos los productos y
+        terminando en el cajero más cercano a la última parada.
+        
+        Returns:
+            Resumen con el método usado y las distancias planificada y
+            original (sin reordenar), ambas incluyendo el tramo al cajero
+        """
+        # Paradas: productos con ubicación conocida en el mapa
+        paradas = []
+        sin_ubicacion = []
+        for producto_item in self.productos_pendientes:
+            ubicacion = self._buscar_ubicacion_producto(producto_item['producto_id'])
+            if ubicacion is None:
+                sin_ubicacion.append(producto_item)
+            else:
+                paradas.append((producto_item, ubicacion))
+        
+        # Nodo 0 = posición actual, nodos 1..n = paradas
+        nodos = [self.posicion_actual] + [ubicacion for _, ubicacion in paradas]
+        distancias = [
+            [0 if origen == destino else self._distancia(origen, destino) for destino in nodos]
+            for origen in nodos
+        ]
+        cajeros_finales = [self._cajero_mas_cercano_desde(nodo) for nodo in nodos]
+        costo_final = [distancia for _, distancia in cajeros_finales]
+        
+        orden_naive = list(range(1, len(nodos)))
+        distancia_naive = self.optimizador_orden.costo_orden(orden_naive, distancias, costo_final)
+        
+        orden, distancia_planificada = self.optimizador_orden.optimizar(distancias, costo_final)
+        
+        # Aplicar el nuevo orden (los productos sin ubicación quedan al final)
+        self.productos_pendientes = [paradas[i - 1][0] for i in orden] + sin_ubicacion
+        
+        ultimo_nodo = orden[-1] if orden else 0
+        
+        return {
+            "metodo": self.optimizador_orden.metodo_utilizado,
+            "distancia_planificada": distancia_planificada,
+            "distancia_naive": distancia_naive,
+            "cajero_destino": cajeros_finales[ultimo_nodo][0]
+        }
+    
+    def actualizar_obstaculos(
+        self,
+        bloquear: Optional[List[Tuple[int, int]]] = None,
+        liberar: Optional[List[Tuple[int, int]]] = None,
+        destino: Optional[Tuple[int, int]] = None
+    ) -> Dict:
+        """
+        Sensor: Percibe cambios de obstáculos durante el recorrido (celdas que
+        se bloquean o se liberan) y repara la ruta restante con D* Lite.
+        
+        El planificador conserva su estado entre llamadas mientras el destino
+        no cambie, de modo que solo se reprocesan las celdas afectadas.
+        
+        Args:
+            bloquear: Posiciones que pasan a estar bloqueadas
+            liberar: Posiciones que vuelven a estar libres
+            destino: Destino del tramo; por defecto el siguiente producto
+                     pendiente del plan o, si no quedan, el cajero más cercano
+                     
+        Returns:
+            Ruta restante desde la posición actual hasta el destino
+        """
+        if self.grid is None or self.posicion_actual is None:
+            raise ValueError("El comprador no ha ingresado a una sucursal")
+        
+        bloquear = [tuple(posicion) for posicion in (bloquear or [])]
+        liberar = [tuple(posicion) for posicion in (liberar or [])]
+        
+        # Solo se guardan las diferencias con el mapa de la sucursal
+        for posicion in bloquear:
+            self._registrar_cambio_obstaculo(posicion, True)
+        for posicion in liberar:
+            self._registrar_cambio_obstaculo(posicion, False)
+        
+        destino = tuple(destino) if destino is not None else self._siguiente_destino()
+        if destino is None:
+            raise ValueError("No hay destino pendiente para replanificar")
+        if not self.grid.en_limites(destino):
+            raise ValueError(f"Destino fuera del mapa: {destino}")
+        
+        ruta, distancia, modo, expandidos = self._replanificar_tramo(destino, bloquear, liberar)
+        self.ruta_actual = ruta
+        
+        if ruta:
+            accion = "reparada" if modo == "reparado" else "planificada"
+            print(f"[Agente Comprador {self.comprador_id}] ✓ Ruta {accion} hacia {destino}: "
+                  f"{distancia} pasos ({expandidos} nodos expandidos)")
+        else:
+            print(f"[Agente Comprador {self.comprador_id}] ✗ Sin ruta hacia {destino}")
+        
+        return {
+            "comprador_id": self.comprador_id,
+            "posicion_actual": self.posicion_actual,
+            "destino": destino,
+            "ruta_restante": ruta,
+            "distancia_restante": distancia if ruta else None,
+            "modo": modo,
+            "nodos_expandidos": expandidos
+        }
+    
+    def _registrar_cambio_obstaculo(self, posicion: Tuple[int, int], bloqueada: bool):
+        """
+        Guarda un cambio de obstáculo percibido. Si la celda vuelve al estado
+        que tiene en el mapa de la sucursal, el cambio se descarta.
+        
+        Args:
+            posicion: Celda (fila, columna)
+            bloqueada: True si pasa a estar bloqueada, False si se libera
+        """
+        if self.grid.en_limites(posicion) and self.grid.es_transitable(posicion) != bloqueada:
+            self.cambios_obstaculos.pop(posicion, None)
+        else:
+            self.cambios_obstaculos[posicion] = bloqueada
+    
+    def _replanificar_tramo(
+        self,
+        destino: Tuple[int, int],
+        bloquear: Optional[List[Tuple[int, int]]] = None,
+        liberar: Optional[List[Tuple[int, int]]] = None
+    ) -> Tuple[List[Tuple[int, int]], float, str, int]:
+        """
+        Obtiene la ruta restante hacia el destino con D* Lite. Si el
+        planificador actual ya apunta a ese destino solo se le aplican los
+        cambios nuevos; si no, se planifica desde cero con todos los cambios
+        percibidos.
+        
+        Args:
+            destino: Destino del tramo (fila, columna)
+            bloquear: Celdas bloqueadas desde la última reparación
+            liberar: Celdas liberadas desde la última reparación
+            
+        Returns:
+            Tupla (ruta, distancia, modo "nuevo"/"reparado", nodos expandidos)
+        """
+        planificador = self.planificador_incremental
+        if planificador is None or planificador.objetivo != self.grid.indice(destino):
+            # Nuevo tramo: se planifica desde cero con todos los cambios percibidos
+            planificador = BusquedaDStarLite(self.grid, self.posicion_actual, destino)
+            expandidos = planificador.nodos_expandidos
+            expandidos += planificador.actualizar_celdas(
+                bloquear=[pos for pos, bloqueada in self.cambios_obstaculos.items() if bloqueada],
+                liberar=[pos for pos, bloqueada in self.cambios_obstaculos.items() if not bloqueada]
+            )
+            self.planificador_incremental = planificador
+            modo = "nuevo"
+        else:
+            planificador.mover_a(self.posicion_actual)
+            expandidos = planificador.actualizar_celdas(bloquear or [], liberar or [])
+            modo = "reparado"
+        
+        ruta, distancia = planificador.camino_restante()
+        return ruta, distancia, modo, expandidos
+    
+    def planificar_recorrido_cooperativo(self, t_inicio: int = 0) -> Dict:
+        """
+        Acción: Reserva el recorrido completo (productos del plan y cajero
+        final) en la tabla de reservas compartida de la sucursal, de modo que
+        no colisione con los recorridos de otros compradores ya comprometidos.
+        
+        Args:
+            t_inicio: Instante simulado en que el comprador empieza a moverse
+            
+        Returns:
+            Recorrido temporal (una posición por instante) con esperas insertadas
+        """
+        if not self.plan_recoleccion:
+            raise ValueError("Debe iniciar la recolección antes de planificar el recorrido")
+        
+        paradas = [tuple(item['destino']) for item in self.plan_recoleccion]
+        cajero_id, _ = self._cajero_mas_cercano_desde(paradas[-1])
+        if cajero_id is None:
+            raise ValueError("No se pudo encontrar ruta a ningún cajero")
+        paradas.append(self.modelo_sucursal.cajeros[cajero_id])
+        
+        planificador = gestor_reservas_global.obtener_planificador(
+            self.sucursal_id, self.modelo_sucursal
+        )
+        recorrido = planificador.planificar_recorrido(
+            self.comprador_id, self.posicion_actual, paradas, t_inicio
+        )
+        recorrido["cajero_id"] = cajero_id
+        self.ruta_cooperativa = recorrido
+        
+        print(f"[Agente Comprador {self.comprador_id}] ✓ Recorrido reservado: "
+              f"instantes {recorrido['t_inicio']}-{recorrido['t_fin']}, "
+              f"{recorrido['esperas']} esperas")
+        
+        return recorrido
+    
+    def _siguiente_destino(self) -> Optional[Tuple[int, int]]:
+        """
+        Determina el destino del tramo actual: el primer producto del plan
+        que aún no se recolectó o, si no quedan, el cajero más cercano.
+        
+        Returns:
+            Posición (fila, columna) o None si no hay destino alcanzable
+        """
+        recolectados = {item['producto_id'] for item in self.productos_recolectados}
+        for item in self.plan_recoleccion:
+            if item['producto_id'] not in recolectados:
+                return tuple(item['destino'])
+        
+        cajero_id, _ = self._cajero_mas_cercano_desde(self.posicion_actual)
+        if cajero_id is None:
+            return None
+        
+        for cajero in self.mapa_sucursal.get('cajeros', []):
+            if cajero['id'] == cajero_id:
+                return (cajero['fila'], cajero['columna'])
+        return None
+    
     def ejecutar_recoleccion(self, plan_recoleccion: List[Dict]) -> Dict:
         """
         Acción: Ejecuta el plan de recolección (simula movimiento y recolección).
+        Si se percibieron cambios de obstáculos (actualizar_obstaculos), cada
+        tramo se recorre por la ruta reparada con D* Lite en lugar de la
+        planificada; al terminar, los cambios quedan aplicados y se descartan.
         
         Args:
             plan_recoleccion: Plan generado por iniciar_recoleccion
@@ -405,12 +740,25 @@ class AgenteComprador:
         
         self.productos_recolectados = []
         self.distancia_total_recorrida = 0
+        tramos_reparados = 0
         
         for idx, item in enumerate(plan_recoleccion):
             print(f"  [{idx + 1}/{len(plan_recoleccion)}] Recolectando {item['nombre']}...")
             
+            ruta = item['ruta']
+            if self.cambios_obstaculos:
+                # Ruta reparada con los obstáculos percibidos
+                ruta, distancia, _, _ = self._replanificar_tramo(tuple(item['destino']))
+                if not ruta:
+                    print(f"    ✗ Sin ruta al producto tras los cambios de obstáculos, omitiendo...")
+                    continue
+                if ruta != item['ruta']:
+                    item['ruta'] = ruta
+                    item['distancia'] = distancia
+                    tramos_reparados += 1
+            
             # Simular movimiento por la ruta
-            for posicion in item['ruta']:
+            for posicion in ruta:
                 self.posicion_actual = posicion
                 self.distancia_total_recorrida += 1
             
@@ -424,6 +772,10 @@ class AgenteComprador:
             
             print(f"    ✓ Recolectado en posición {item['ubicacion']}")
         
+        # Cambios de obstáculos ya aplicados al recorrido
+        self.cambios_obstaculos.clear()
+        self.planificador_incremental = None
+        
         self.estado_planificacion["productos_recolectados"] = True
         self.objetivo_actual = "productos_completos"
         
@@ -435,12 +787,14 @@ class AgenteComprador:
             "comprador_id": self.comprador_id,
             "productos_recolectados": self.productos_recolectados,
             "distancia_recorrida": self.distancia_total_recorrida,
+            "tramos_reparados": tramos_reparados,
             "posicion_actual": self.posicion_actual
         }
     
     def buscar_cajero_mas_cercano(self) -> Dict:
         """
-        Acción: Busca el cajero más cercano usando Búsqueda de Costo Uniforme.
+        Acción: Busca el cajero más cercano usando el campo de distancias
+        multi-origen de la sucursal (Búsqueda de Costo Uniforme como respaldo).
         
         Returns:
             Información del cajero más cercano y ruta
@@ -454,15 +808,25 @@ class AgenteComprador:
         if not cajeros:
             raise ValueError("No hay cajeros disponibles en la sucursal")
         
-        posiciones_cajeros = [(c['fila'], c['columna']) for c in cajeros]
+        # Consultar el campo de distancias precalculado de la sucursal
+        cajero_id, ruta, distancia = (None, [], float('inf'))
+        if self.modelo_sucursal is not None:
+            cajero_id, ruta, distancia = self.modelo_sucursal.ruta_a_cajero_mas_cercano(
+                self.posicion_actual
+            )
         
-        # Buscar cajero más cercano con Búsqueda de Costo Uniforme
-        cajero_pos, ruta, distancia = self.busqueda_costo_uniforme.buscar_mas_cercano(
-            inicio=self.posicion_actual,
-            objetivos=posiciones_cajeros,
-            dimensiones=self.dimensiones,
-            obstaculos=self.obstaculos
-        )
+        if cajero_id is not None:
+            cajero_pos = self.modelo_sucursal.cajeros[cajero_id]
+        else:
+            # Respaldo: Búsqueda de Costo Uniforme desde la posición actual
+            posiciones_cajeros = [(c['fila'], c['columna']) for c in cajeros]
+            cajero_pos, ruta, distancia = self.busqueda_costo_uniforme.buscar_mas_cercano(
+                inicio=self.posicion_actual,
+                objetivos=posiciones_cajeros,
+                dimensiones=self.dimensiones,
+                obstaculos=self.obstaculos,
+                grid=self.grid
+            )
         
         if cajero_pos is None:
             raise ValueError("No se pudo encontrar ruta a ningún cajero")
@@ -485,6 +849,75 @@ class AgenteComprador:
             "distancia_a_cajero": distancia
         }
     
+    def buscar_cajero_menor_espera(self, segundos_por_paso: Optional[float] = None) -> Dict:
+        """
+        Acción: Busca el cajero con menor tiempo esperado hasta terminar de
+        pagar, combinando la distancia con la cola actual de cada cajero y su
+        tiempo de servicio simulado medio (informados por cada cajero a
+        través del canal de comunicación).
+        Sin modelo de la sucursal o sin canal, elige el más cercano.
+        
+        Args:
+            segundos_por_paso: Tiempo de caminar una celda (None = SEGUNDOS_POR_PASO)
+            
+        Returns:
+            Información del cajero elegido y ruta (como buscar_cajero_mas_cercano),
+            más el tiempo estimado y la cola del cajero
+        """
+        if self.modelo_sucursal is None or self.canal_comunicacion is None:
+            return self.buscar_cajero_mas_cercano()
+        
+        if segundos_por_paso is None:
+            segundos_por_paso = self.SEGUNDOS_POR_PASO
+        
+        print(f"\n[Agente Comprador {self.comprador_id}] Buscando cajero con menor espera...")
+        
+        self.objetivo_actual = "buscando_cajero"
+        
+        carga = self.canal_comunicacion.obtener_carga_cajeros()
+        cajero_id, distancia, tiempo = self.modelo_sucursal.cajero_menor_espera(
+            self.posicion_actual, carga, segundos_por_paso, candidatos=list(carga) or None
+        )
+        
+        if cajero_id is None:
+            return self.buscar_cajero_mas_cercano()
+        
+        cajero_pos = self.modelo_sucursal.cajeros[cajero_id]
+        ruta, distancia = self.modelo_sucursal.ruta(self.posicion_actual, cajero_pos)
+        cajero_seleccionado = next(
+            cajero for cajero in self.mapa_sucursal['cajeros'] if cajero['id'] == cajero_id
+        )
+        en_cola = carga.get(cajero_id, (0, 0.0))[0]
+        
+        print(f"  ✓ Cajero elegido: {cajero_id} ({en_cola} en cola)")
+        print(f"  Distancia: {distancia} pasos, tiempo estimado: {tiempo:.1f} s")
+        
+        return {
+            "comprador_id": self.comprador_id,
+            "cajero": cajero_seleccionado,
+            "ruta_a_cajero": ruta,
+            "distancia_a_cajero": distancia,
+            "en_cola": en_cola,
+            "tiempo_estimado_s": round(tiempo, 3)
+        }
+    
+    def buscar_cajero(self, politica: str = "cercano") -> Dict:
+        """
+        Acción: Elige cajero según la política indicada.
+        
+        Args:
+            politica: "cercano" (distancia) o "espera" (distancia + cola)
+            
+        Returns:
+            Información del cajero elegido y ruta
+        """
+        if politica not in self.POLITICAS_CAJERO:
+            raise ValueError(f"Política de cajero desconocida: {politica}")
+        
+        if politica == "cercano":
+            return self.buscar_cajero_mas_cercano()
+        return self.buscar_cajero_menor_espera()
+    
     def moverse_a_cajero(self, ruta_a_cajero: List[Tuple[int, int]]) -> Dict:
         """
         Acción: Se mueve hasta el cajero seleccionado.
@@ -538,9 +971,10 @@ class AgenteComprador:
             "total_esperado": self.lista_seleccionada['total']
         }
         
-        # Enviar mensaje por el canal
+        # Enviar mensaje por el canal (la respuesta llega por el Future)
+        self.respuesta_cajero = None
         if self.canal_comunicacion:
-            self.canal_comunicacion.enviar_mensaje(cajero_id, mensaje)
+            self.respuesta_cajero = self.canal_comunicacion.enviar_mensaje(cajero_id, mensaje)
         
         self.estado_planificacion["cajero_contactado"] = True
         self.objetivo_actual = "esperando_cajero"
@@ -550,6 +984,38 @@ class AgenteComprador:
         
         return mensaje
     
+    def esperar_factura(self, timeout_s: Optional[float] = None) -> Optional[Dict]:
+        """
+        Sensor: Espera la respuesta del cajero al último pedido enviado.
+        Bloquea solo hasta que el cajero responde (o vence el plazo); si
+        vence, el pedido se cancela y deja de estar pendiente en el canal.
+        
+        Args:
+            timeout_s: Segundos máximos de espera (None = TIMEOUT_FACTURA_S)
+            
+        Returns:
+            Factura (o mensaje de error) del cajero, o None si no respondió a tiempo
+        """
+        if timeout_s is None:
+            timeout_s = self.TIMEOUT_FACTURA_S
+        
+        if timeout_s <= 0:
+            raise ValueError("timeout_s debe ser positivo")
+        
+        if self.respuesta_cajero is None:
+            print(f"[Agente Comprador {self.comprador_id}] ⚠ No hay pedido pendiente")
+            return None
+        
+        try:
+            return self.respuesta_cajero.result(timeout=timeout_s)
+        except TiempoAgotado:
+            self.respuesta_cajero.cancel()
+            print(f"[Agente Comprador {self.comprador_id}] ⚠ Sin factura tras {timeout_s} s")
+            return None
+        except CancelledError:
+            print(f"[Agente Comprador {self.comprador_id}] ⚠ Pedido reemplazado por uno nuevo")
+            return None
+    
     def recibir_factura(self, factura: Dict) -> Dict:
         """
         Sensor: Recibe la factura del cajero.
@@ -576,6 +1042,93 @@ class AgenteComprador:
     
     # ========== MÉTODOS AUXILIARES ==========
     
+    def _distancia(self, origen: Tuple[int, int], destino: Tuple[int, int]) -> float:
+        """
+        Distancia en pasos entre dos posiciones (tablas precalculadas o A*).
+        
+        Args:
+            origen: Posición inicial (fila, columna)
+            destino: Posición objetivo (fila, columna)
+            
+        Returns:
+            Número de pasos, o infinito si no hay ruta
+        """
+        if self.modelo_sucursal is not None and self.modelo_sucursal.tiene_tabla(destino):
+            return self.modelo_sucursal.distancia(origen, destino)
+        
+        return self._calcular_ruta(origen, destino)[1]
+    
+    def _cajero_mas_cercano_desde(self, posicion: Tuple[int, int]) -> Tuple[Optional[str], float]:
+        """
+        Identifica el cajero más cercano a una posición.
+        
+        Args:
+            posicion: Posición (fila, columna)
+            
+        Returns:
+            Tupla (cajero_id, distancia); (None, infinito) si no hay cajeros alcanzables
+        """
+        if self.modelo_sucursal is not None:
+            return self.modelo_sucursal.cajero_mas_cercano(posicion)
+        
+        mejor = (None, float('inf'))
+        for cajero in self.mapa_sucursal.get('cajeros', []):
+            distancia = self._distancia(posicion, (cajero['fila'], cajero['columna']))
+            if distancia < mejor[1]:
+                mejor = (cajero['id'], distancia)
+        return mejor
+    
+    def _calcular_ruta(
+        self,
+        origen: Tuple[int, int],
+        destino: Tuple[int, int]
+    ) -> Tuple[List[Tuple[int, int]], float]:
+        """
+        Calcula la ruta más corta entre dos posiciones.
+        Primero consulta la caché de rutas compartida de la sucursal. Si el
+        destino es un punto de interés del modelo precalculado, la ruta se
+        obtiene de sus tablas sin ejecutar búsqueda; si no, se usa HPA* en
+        mapas muy grandes y A* en el resto.
+        
+        Args:
+            origen: Posición inicial (fila, columna)
+            destino: Posición objetivo (fila, columna)
+            
+        Returns:
+            Tupla (ruta, distancia)
+        """
+        if self.modelo_sucursal is None:
+            return self.a_estrella.buscar(
+                inicio=origen,
+                objetivo=destino,
+                dimensiones=self.dimensiones,
+                obstaculos=self.obstaculos,
+                usar_manhattan=True,
+                grid=self.grid
+            )
+        
+        version = self.modelo_sucursal.version
+        en_cache = cache_rutas_global.obtener_ruta(self.sucursal_id, version, origen, destino)
+        if en_cache is not None:
+            return en_cache
+        
+        if self.modelo_sucursal.tiene_tabla(destino):
+            ruta, distancia = self.modelo_sucursal.ruta(origen, destino)
+        elif self.modelo_sucursal.busqueda_jerarquica is not None:
+            ruta, distancia = self.modelo_sucursal.busqueda_jerarquica.buscar(origen, destino)
+        else:
+            ruta, distancia = self.a_estrella.buscar(
+                inicio=origen,
+                objetivo=destino,
+                dimensiones=self.dimensiones,
+                obstaculos=self.obstaculos,
+                usar_manhattan=True,
+                grid=self.grid
+            )
+        
+        cache_rutas_global.guardar_ruta(self.sucursal_id, version, origen, destino, ruta, distancia)
+        return ruta, distancia
+    
     def _buscar_ubicacion_producto(self, producto_id: int) -> Optional[Tuple[int, int]]:
         """
         Busca la ubicación de un producto en el mapa.
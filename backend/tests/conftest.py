@@ -0,0 +1,9 @@
+"""
+Configuración común de las pruebas: permite importar los módulos del
+backend (models, utils) igual que app.py.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
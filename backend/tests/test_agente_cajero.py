@@ -0,0 +1,102 @@
+"""
+Pruebas del cajero con ciclo propio: contrapresión con la cola llena,
+respuesta a los pedidos que no puede atender y parada ordenada.
+"""
+
+import contextlib
+import io
+import threading
+import time
+
+from models.agente_cajero import AgenteCajeroConLoop
+
+
+def crear_cajero(capacidad_cola=1, espera_encolar_s=0.05):
+    """
+    Cajero con el ciclo iniciado cuyo procesamiento queda retenido hasta
+    que se activa el evento `liberar`. Las respuestas se guardan en
+    `respuestas` como (comprador_id, tipo).
+    """
+    cajero = AgenteCajeroConLoop(
+        "CAJ001", "SUC001", {"fila": 0, "columna": 0},
+        capacidad_cola=capacidad_cola, espera_encolar_s=espera_encolar_s
+    )
+    cajero.respuestas = []
+    cajero.liberar = threading.Event()
+    cajero.procesando = threading.Event()
+    
+    def procesar(mensaje):
+        cajero.procesando.set()
+        cajero.liberar.wait(5)
+        cajero.respuestas.append((mensaje['comprador_id'], "factura"))
+    
+    cajero._procesar_pedido = procesar
+    cajero.registrar_callback_respuesta(
+        lambda comprador_id, respuesta: cajero.respuestas.append((comprador_id, respuesta['tipo']))
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero.iniciar()
+    return cajero
+
+
+def pedido(comprador_id):
+    return {"cajero_id": "CAJ001", "comprador_id": comprador_id, "productos": []}
+
+
+def test_cola_llena_responde_con_error():
+    cajero = crear_cajero(capacidad_cola=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero.escuchar_mensaje(pedido("C1"))
+        assert cajero.procesando.wait(2)
+        cajero.escuchar_mensaje(pedido("C2"))  # Ocupa la única plaza
+        cajero.escuchar_mensaje(pedido("C3"))  # Sin plaza: rechazado
+        
+        assert ("C3", "error") in cajero.respuestas
+        assert cajero.mensajes_rechazados == 1
+        
+        cajero.liberar.set()
+        cajero.detener(timeout=2)
+    
+    assert cajero.respuestas.count(("C1", "factura")) == 1
+    assert cajero.respuestas.count(("C2", "factura")) == 1
+
+
+def test_detener_no_espera_a_los_envios_sin_plaza():
+    cajero = crear_cajero(capacidad_cola=1, espera_encolar_s=5.0)
+    resultado = {}
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero.escuchar_mensaje(pedido("C1"))
+        assert cajero.procesando.wait(2)
+        assert cajero.agregar_mensaje_a_cola(pedido("C2"))
+        
+        # Un productor queda esperando plaza con un plazo largo
+        productor = threading.Thread(
+            target=lambda: resultado.setdefault("encolado", cajero.agregar_mensaje_a_cola(pedido("C3")))
+        )
+        productor.start()
+        time.sleep(0.05)
+        
+        inicio = time.perf_counter()
+        cajero.detener(esperar=False)
+        assert time.perf_counter() - inicio < 0.5
+        
+        cajero.liberar.set()
+        productor.join(2)
+        cajero._hilo.join(2)
+    
+    assert resultado == {"encolado": False}
+    assert not cajero._hilo.is_alive()
+    assert [comprador for comprador, _ in cajero.respuestas] == ["C1", "C2"]
+
+
+def test_pedido_con_cajero_ocupado_recibe_error():
+    cajero = crear_cajero()
+    cajero.liberar.set()
+    cajero.estado = "procesando"
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero.escuchar_mensaje(pedido("C1"))
+        cajero.detener(timeout=2)
+    
+    assert cajero.respuestas == [("C1", "error")]
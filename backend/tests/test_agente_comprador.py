@@ -0,0 +1,57 @@
+"""
+Pruebas del agente comprador: ejecución de la recolección con obstáculos
+percibidos después de planificar.
+"""
+
+import contextlib
+import io
+
+from models.agente_comprador import AgenteComprador
+from utils.canal_comunicacion import GestorCanales
+
+
+SUCURSAL = 'SUC001'
+
+
+def preparar_comprador():
+    """Comprador dentro de SUC001 con el plan de recolección ya calculado."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        gestor = GestorCanales()
+        comprador = AgenteComprador('C-PRUEBA')
+        comprador.ingresar_a_sucursal(SUCURSAL, 150.0, gestor.obtener_canal(SUCURSAL))
+        comprador.generar_listas_compras()
+        comprador.seleccionar_lista('exacta')
+        plan = comprador.iniciar_recoleccion()['plan_recoleccion']
+    return comprador, plan
+
+
+def test_ejecucion_usa_la_ruta_reparada_y_descarta_los_cambios():
+    comprador, plan = preparar_comprador()
+    primer_tramo = next(item for item in plan if len(item['ruta']) >= 3)
+    bloqueada = tuple(primer_tramo['ruta'][len(primer_tramo['ruta']) // 2])
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        comprador.actualizar_obstaculos(bloquear=[bloqueada], destino=plan[0]['destino'])
+        resultado = comprador.ejecutar_recoleccion(plan)
+    
+    recorridas = {tuple(posicion) for item in plan for posicion in item['ruta']}
+    assert bloqueada not in recorridas
+    assert resultado['tramos_reparados'] >= 1
+    assert comprador.cambios_obstaculos == {}
+    assert comprador.planificador_incremental is None
+
+
+def test_liberar_una_celda_bloqueada_del_mapa_no_acumula_cambios():
+    comprador, _ = preparar_comprador()
+    celda = next(
+        (fila, columna)
+        for fila in range(comprador.grid.filas)
+        for columna in range(comprador.grid.columnas)
+        if not comprador.grid.es_transitable((fila, columna))
+    )
+    
+    comprador._registrar_cambio_obstaculo(celda, True)
+    assert comprador.cambios_obstaculos == {}
+    comprador._registrar_cambio_obstaculo(celda, False)
+    comprador._registrar_cambio_obstaculo(celda, True)
+    assert comprador.cambios_obstaculos == {}
@@ -0,0 +1,147 @@
+"""
+Pruebas de los endpoints: respuestas de error del cajero, validación de
+la política de cajero y de los pares del lote de rutas, y formato NDJSON
+de la generación de listas en stream (se omiten si Flask no está instalado).
+"""
+
+import contextlib
+import io
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+import app as modulo_app
+from models.agente_cajero import AgenteCajeroConLoop
+from models.agente_comprador import AgenteComprador
+
+
+SUCURSAL = 'SUC001'
+
+
+@pytest.fixture
+def cajero_con_cola_llena():
+    """
+    CAJ001 de SUC001 atendiendo un pedido retenido y con su única plaza de
+    cola ocupada, registrado en el canal global de la aplicación.
+    """
+    canal = modulo_app.gestor_canales_global.obtener_canal(SUCURSAL)
+    liberar = threading.Event()
+    atendiendo = threading.Event()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero = AgenteCajeroConLoop(
+            "CAJ001", SUCURSAL, {"fila": 19, "columna": 10},
+            capacidad_cola=1, espera_encolar_s=0.01
+        )
+        
+        def procesar_retenido(mensaje):
+            atendiendo.set()
+            liberar.wait(5)
+        
+        cajero._procesar_pedido = procesar_retenido
+        anterior = canal.cajeros_registrados.pop("CAJ001", None)
+        canal.registrar_cajero(cajero)
+        cajero.iniciar()
+        
+        for comprador_id in ("OCUPA-1", "OCUPA-2"):
+            cajero.escuchar_mensaje({"cajero_id": "CAJ001", "comprador_id": comprador_id, "productos": []})
+            atendiendo.wait(2)
+    
+    yield cajero
+    
+    liberar.set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero.detener(timeout=2)
+    canal.cajeros_registrados.pop("CAJ001", None)
+    if anterior is not None:
+        canal.cajeros_registrados["CAJ001"] = anterior
+
+
+def test_comunicar_cajero_con_cola_llena_responde_503(cajero_con_cola_llena):
+    with contextlib.redirect_stdout(io.StringIO()):
+        comprador = AgenteComprador("C-COLA-LLENA")
+        comprador.ingresar_a_sucursal(
+            SUCURSAL, 150.0, modulo_app.gestor_canales_global.obtener_canal(SUCURSAL)
+        )
+        comprador.generar_listas_compras()
+        comprador.seleccionar_lista('exacta')
+        plan = comprador.iniciar_recoleccion()
+        comprador.ejecutar_recoleccion(plan['plan_recoleccion'])
+    modulo_app.agentes_compradores[comprador.comprador_id] = comprador
+    
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            respuesta = modulo_app.app.test_client().post('/api/comprador/comunicar-cajero', json={
+                "comprador_id": comprador.comprador_id,
+                "cajero_id": "CAJ001",
+                "timeout_s": 2
+            })
+    finally:
+        modulo_app.agentes_compradores.pop(comprador.comprador_id, None)
+    
+    assert respuesta.status_code == 503
+    cuerpo = respuesta.get_json()
+    assert cuerpo["success"] is False
+    assert "Cola del cajero llena" in cuerpo["error"]
+    assert comprador.objetivo_actual != "finalizado"
+
+
+def test_ir_a_cajero_rechaza_politica_desconocida():
+    with contextlib.redirect_stdout(io.StringIO()):
+        respuesta = modulo_app.app.test_client().post('/api/comprador/ir-a-cajero', json={
+            "comprador_id": "C-SIN-REGISTRO",
+            "politica_cajero": "aleatoria"
+        })
+    
+    assert respuesta.status_code == 400
+    assert "aleatoria" in respuesta.get_json()["error"]
+
+
+def test_rutas_en_lote_senala_el_par_invalido():
+    pares = [
+        {"origen": [1, 1], "destino": [1, 2]},
+        {"origen": [1, 1], "destino": ["a", 2]}
+    ]
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        respuesta = modulo_app.app.test_client().post(f'/api/mapas/{SUCURSAL}/rutas', json={"pares": pares})
+        sin_objeto = modulo_app.app.test_client().post(f'/api/mapas/{SUCURSAL}/rutas', json={"pares": [[1, 1]]})
+    
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()["error"].startswith("Par 1: destino")
+    assert sin_objeto.status_code == 400
+    assert sin_objeto.get_json()["error"].startswith("Par 0:")
+
+
+def test_generar_listas_en_stream_envia_una_linea_json_por_evento():
+    with contextlib.redirect_stdout(io.StringIO()):
+        comprador = AgenteComprador("C-STREAM")
+        comprador.ingresar_a_sucursal(
+            SUCURSAL, 150.0, modulo_app.gestor_canales_global.obtener_canal(SUCURSAL)
+        )
+    modulo_app.agentes_compradores[comprador.comprador_id] = comprador
+    
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            respuesta = modulo_app.app.test_client().post('/api/comprador/generar-listas', json={
+                "comprador_id": comprador.comprador_id,
+                "motor": "temple",
+                "semilla": 4,
+                "usar_cache": False,
+                "stream": True
+            })
+            cuerpo = respuesta.get_data(as_text=True)
+    finally:
+        modulo_app.agentes_compradores.pop(comprador.comprador_id, None)
+    
+    assert respuesta.mimetype == 'application/x-ndjson'
+    assert cuerpo.endswith("\n")
+    eventos = [json.loads(linea) for linea in cuerpo.split("\n")[:-1]]
+    
+    assert [evento["evento"] for evento in eventos[:-1]] == ["muestra"] * (len(eventos) - 1)
+    assert {evento["tipo_lista"] for evento in eventos[:-1]} == {"exacta", "superior", "inferior"}
+    assert eventos[-1]["evento"] == "resultado" and eventos[-1]["success"] is True
@@ -0,0 +1,117 @@
+"""
+Pruebas de los motores de búsqueda de rutas: JPS, HPA* y Búsqueda de
+Costo Uniforme frente a A* clásico sobre grids aleatorios, y HPA*
+compartido entre hilos.
+"""
+
+import random
+import threading
+
+import pytest
+
+from utils.algoritmos_busqueda import (
+    BusquedaAEstrella, BusquedaCostoUniforme, BusquedaJerarquica, GridOcupacion
+)
+
+
+def generar_grid(semilla, filas=24, columnas=30, densidad=0.25):
+    """Grid aleatorio con una fracción `densidad` de celdas bloqueadas"""
+    rng = random.Random(semilla)
+    obstaculos = {
+        (fila, columna)
+        for fila in range(filas)
+        for columna in range(columnas)
+        if rng.random() < densidad
+    }
+    return GridOcupacion(filas, columnas, obstaculos)
+
+
+def pares_aleatorios(grid, semilla, cantidad=25):
+    """Pares (origen, destino) de celdas libres"""
+    rng = random.Random(semilla)
+    libres = [
+        (fila, columna)
+        for fila in range(grid.filas)
+        for columna in range(grid.columnas)
+        if grid.es_transitable((fila, columna))
+    ]
+    return [(rng.choice(libres), rng.choice(libres)) for _ in range(cantidad)]
+
+
+def verificar_camino(grid, camino, costo, origen, destino):
+    """El camino une origen y destino por celdas libres adyacentes"""
+    assert camino[0] == origen and camino[-1] == destino
+    assert costo == len(camino) - 1
+    for (f1, c1), (f2, c2) in zip(camino, camino[1:]):
+        assert abs(f1 - f2) + abs(c1 - c2) == 1
+    assert all(grid.es_transitable(celda) for celda in camino)
+
+
+@pytest.mark.parametrize("semilla", range(12))
+def test_jps_y_costo_uniforme_igualan_a_estrella(semilla):
+    grid = generar_grid(semilla)
+    a_estrella = BusquedaAEstrella()
+    jps = BusquedaAEstrella(motor="jps")
+    costo_uniforme = BusquedaCostoUniforme()
+    
+    for origen, destino in pares_aleatorios(grid, semilla):
+        camino, costo = a_estrella.buscar(origen, destino, None, None, grid=grid)
+        camino_jps, costo_jps = jps.buscar(origen, destino, None, None, grid=grid)
+        encontrado, camino_cu, costo_cu = costo_uniforme.buscar_mas_cercano(
+            origen, [destino], None, None, grid=grid
+        )
+        
+        if not camino:
+            assert camino_jps == [] and camino_cu == []
+            continue
+        
+        assert costo_jps == costo
+        assert encontrado == destino and costo_cu == costo
+        verificar_camino(grid, camino, costo, origen, destino)
+        verificar_camino(grid, camino_jps, costo_jps, origen, destino)
+        verificar_camino(grid, camino_cu, costo_cu, origen, destino)
+
+
+@pytest.mark.parametrize("semilla", range(6))
+def test_hpa_encuentra_camino_valido_cuando_a_estrella_lo_encuentra(semilla):
+    grid = generar_grid(semilla, filas=48, columnas=64, densidad=0.2)
+    a_estrella = BusquedaAEstrella()
+    hpa = BusquedaJerarquica(grid, tamano_cluster=8)
+    
+    for origen, destino in pares_aleatorios(grid, semilla):
+        camino, costo = a_estrella.buscar(origen, destino, None, None, grid=grid)
+        camino_hpa, costo_hpa = hpa.buscar(origen, destino)
+        
+        if not camino:
+            assert camino_hpa == []
+            continue
+        
+        # HPA* no garantiza el óptimo, pero nunca mejora a A*
+        assert costo_hpa >= costo
+        verificar_camino(grid, camino_hpa, costo_hpa, origen, destino)
+
+
+def test_hpa_compartido_entre_hilos_da_los_mismos_resultados():
+    grid = generar_grid(3, filas=48, columnas=64, densidad=0.2)
+    pares = pares_aleatorios(grid, 3, cantidad=40)
+    esperados = [BusquedaJerarquica(grid, tamano_cluster=8).buscar_con_estadisticas(o, d) for o, d in pares]
+    
+    compartido = BusquedaJerarquica(grid, tamano_cluster=8)
+    barrera = threading.Barrier(4)
+    errores = []
+    
+    def buscar_todos():
+        barrera.wait()
+        for (origen, destino), esperado in zip(pares, esperados):
+            camino, costo = compartido.buscar(origen, destino)
+            # Las estadísticas de la última búsqueda son las de este hilo
+            if (camino, costo, compartido.nodos_expandidos) != esperado:
+                errores.append((origen, destino))
+    
+    hilos = [threading.Thread(target=buscar_todos) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(10)
+    
+    assert errores == []
@@ -0,0 +1,52 @@
+"""
+Pruebas de la caché de listas: al cambiar la versión del catálogo de una
+sucursal se descartan sus listas anteriores.
+"""
+
+import threading
+
+from utils.cache import CacheListas
+
+
+def guardar(cache, sucursal_id, version, presupuesto=100.0):
+    cache.guardar_lista(sucursal_id, version, presupuesto, "exacta", "temple", {}, ([], 0.0, 1))
+
+
+def buscar(cache, sucursal_id, version, presupuesto=100.0):
+    return cache.obtener_lista(sucursal_id, version, presupuesto, "exacta", "temple", {})
+
+
+def test_version_nueva_invalida_las_listas_de_la_sucursal():
+    cache = CacheListas()
+    guardar(cache, "SUC001", "v1")
+    guardar(cache, "SUC002", "v1")
+    assert buscar(cache, "SUC001", "v1") is not None
+    
+    assert buscar(cache, "SUC001", "v2") is None
+    assert buscar(cache, "SUC001", "v1") is None  # Vuelve a v1: las de v2 tampoco quedan
+    assert buscar(cache, "SUC002", "v1") is not None
+    assert cache.invalidaciones == 1
+
+
+def test_cambios_de_version_concurrentes_dejan_una_sola_version():
+    cache = CacheListas(capacidad=10000)
+    barrera = threading.Barrier(8)
+    
+    def trabajar(numero):
+        barrera.wait()
+        for i in range(300):
+            version = f"v{(numero + i) % 3}"
+            guardar(cache, "SUC001", version, presupuesto=float(i))
+            buscar(cache, "SUC001", version, presupuesto=float(i))
+    
+    hilos = [threading.Thread(target=trabajar, args=(numero,)) for numero in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    
+    # Una última versión vista deja la caché solo con listas de esa versión
+    buscar(cache, "SUC001", "v-final")
+    guardar(cache, "SUC001", "v-final")
+    assert {clave[1] for clave in cache._entradas} == {"v-final"}
+    assert cache._versiones == {"SUC001": "v-final"}
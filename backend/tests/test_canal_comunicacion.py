@@ -0,0 +1,130 @@
+"""
+Pruebas del canal de comunicación: respuestas pendientes (Future) por
+pedido que vencen o se reemplazan, y carga de los cajeros leída de sus colas.
+"""
+
+import contextlib
+import io
+import json
+import os
+import threading
+
+from models.agente_cajero import AgenteCajero, AgenteCajeroConLoop
+from models.agente_comprador import AgenteComprador
+from utils.canal_comunicacion import CanalComunicacion
+
+
+class CajeroMudo:
+    """Cajero que recibe los mensajes sin responder nunca"""
+    
+    cajero_id = "CAJ001"
+    
+    def __init__(self):
+        self.recibidos = []
+    
+    def registrar_callback_respuesta(self, callback):
+        self.callback_respuesta = callback
+    
+    def escuchar_mensaje(self, mensaje):
+        self.recibidos.append(mensaje)
+        return None
+    
+    def obtener_carga(self):
+        return 0, AgenteCajero.SEGUNDOS_BASE_SERVICIO
+
+
+def crear_canal(cajero):
+    with contextlib.redirect_stdout(io.StringIO()):
+        canal = CanalComunicacion("SUC001")
+        canal.registrar_cajero(cajero)
+    return canal
+
+
+def pedido(comprador_id, productos=()):
+    return {"cajero_id": "CAJ001", "comprador_id": comprador_id, "productos": list(productos)}
+
+
+def factura(pedido_id, total):
+    return {"tipo": "factura", "cajero_id": "CAJ001", "total": total, "pedido_id": pedido_id}
+
+
+def test_plazo_agotado_cancela_y_descarta_la_respuesta_tardia():
+    cajero = CajeroMudo()
+    canal = crear_canal(cajero)
+    comprador = AgenteComprador("C1")
+    entregadas = []
+    canal.registrar_comprador("C1", entregadas.append)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        comprador.respuesta_cajero = canal.enviar_mensaje("CAJ001", pedido("C1"))
+        pedido_id = cajero.recibidos[0]["pedido_id"]
+        assert pedido_id in canal.respuestas_pendientes
+        
+        assert comprador.esperar_factura(timeout_s=0.01) is None
+    
+        cajero.callback_respuesta("C1", factura(pedido_id, 1.0))
+    
+    assert comprador.respuesta_cajero.cancelled()
+    assert entregadas == []
+    assert canal.respuestas_pendientes == {}
+
+
+def test_reenvio_descarta_la_respuesta_vieja_y_completa_la_nueva():
+    cajero = CajeroMudo()
+    canal = crear_canal(cajero)
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        primero = canal.enviar_mensaje("CAJ001", pedido("C1"))
+        segundo = canal.enviar_mensaje("CAJ001", pedido("C1"))
+        assert primero.cancelled()
+        id_primero, id_segundo = (mensaje["pedido_id"] for mensaje in cajero.recibidos)
+        assert id_primero != id_segundo
+        assert list(canal.respuestas_pendientes) == [id_segundo]
+        
+        # La respuesta al primer pedido llega tarde y no completa el segundo
+        cajero.callback_respuesta("C1", factura(id_primero, 1.0))
+        assert not segundo.done()
+    
+        cajero.callback_respuesta("C1", factura(id_segundo, 2.0))
+    
+    assert segundo.result(timeout=1)["total"] == 2.0
+    assert canal.respuestas_pendientes == {}
+
+
+def test_carga_del_cajero_sale_de_su_cola_y_vuelve_a_cero():
+    ruta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'inventario', 'SUC001.json')
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        producto_id = json.load(archivo)['productos'][0]['id']
+    productos = [{"producto_id": producto_id, "cantidad": 2}]
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        cajero = AgenteCajeroConLoop("CAJ001", "SUC001", {"fila": 0, "columna": 0})
+        canal = crear_canal(cajero)
+        
+        liberar = threading.Event()
+        atendiendo = threading.Event()
+        procesar = cajero._procesar_pedido
+        
+        def procesar_retenido(mensaje):
+            atendiendo.set()
+            liberar.wait(5)
+            return procesar(mensaje)
+        
+        cajero._procesar_pedido = procesar_retenido
+        cajero.iniciar()
+        
+        assert canal.obtener_carga_cajeros() == {"CAJ001": (0, AgenteCajero.SEGUNDOS_BASE_SERVICIO)}
+        
+        respuestas = [canal.enviar_mensaje("CAJ001", pedido(f"C{i}", productos)) for i in range(3)]
+        assert atendiendo.wait(2)
+        assert canal.obtener_carga_cajeros()["CAJ001"][0] == 3
+        
+        liberar.set()
+        for respuesta in respuestas:
+            assert respuesta.result(timeout=2)["tipo"] == "factura"
+        cajero.detener(timeout=2)
+    
+    esperado = AgenteCajero.SEGUNDOS_BASE_SERVICIO + 2 * AgenteCajero.SEGUNDOS_POR_ARTICULO
+    assert canal.obtener_carga_cajeros() == {"CAJ001": (0, esperado)}
+    assert canal.respuestas_pendientes == {}
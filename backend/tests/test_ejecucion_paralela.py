@@ -0,0 +1,64 @@
+"""
+Pruebas de la ejecución paralela: los lotes de rutas conservan el orden
+de los pares y las listas generadas en procesos coinciden con las de un
+solo proceso con la misma semilla.
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+from utils.algoritmos_busqueda import BusquedaAEstrella, GridOcupacion
+from utils.ejecucion_paralela import (
+    MIN_CONSULTAS_PARALELO, TIPOS_LISTA, BuscadorRutasLote, GeneradorListasParalelo
+)
+
+
+@pytest.fixture
+def buscador():
+    buscador = BuscadorRutasLote(procesos=2)
+    yield buscador
+    buscador.cerrar()
+
+
+@pytest.fixture
+def generador():
+    generador = GeneradorListasParalelo(procesos=2)
+    yield generador
+    generador.cerrar()
+
+
+def test_lote_de_rutas_en_el_orden_de_los_pares(buscador):
+    rng = random.Random(5)
+    obstaculos = {(rng.randrange(30), rng.randrange(40)) for _ in range(250)}
+    grid = GridOcupacion(30, 40, obstaculos)
+    libres = [grid.posicion(i) for i in range(grid.total_celdas) if not grid.bloqueado[i]]
+    pares = [(rng.choice(libres), rng.choice(libres)) for _ in range(MIN_CONSULTAS_PARALELO * 2)]
+    
+    resultados = buscador.buscar_lote(grid, pares)
+    
+    a_estrella = BusquedaAEstrella()
+    esperados = [a_estrella.buscar(origen, destino, None, None, grid=grid) for origen, destino in pares]
+    assert [costo for _, costo in resultados] == [costo for _, costo in esperados]
+    for (origen, destino), (camino, _) in zip(pares, resultados):
+        if camino:
+            assert camino[0] == origen and camino[-1] == destino
+
+
+def test_listas_en_procesos_igualan_a_un_proceso(generador):
+    ruta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'inventario', 'SUC001.json')
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        productos = json.load(archivo)['productos']
+    
+    en_procesos = generador.generar(productos, 150.0, semilla=3)
+    en_un_proceso = GeneradorListasParalelo(procesos=1).generar(productos, 150.0, semilla=3)
+    
+    assert list(en_procesos) == list(TIPOS_LISTA)
+    for tipo in TIPOS_LISTA:
+        solucion, costo, _ = en_procesos[tipo]
+        solucion_esperada, costo_esperado, _ = en_un_proceso[tipo]
+        assert [(p['id'], c) for p, c in solucion] == [(p['id'], c) for p, c in solucion_esperada]
+        assert costo == costo_esperado
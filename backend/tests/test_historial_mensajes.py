@@ -0,0 +1,61 @@
+"""
+Pruebas del historial de mensajes de los canales: desalojo del más
+antiguo, consulta por comprador y por cajero, y volcado en disco de los
+mensajes que salen de memoria.
+"""
+
+import json
+
+from utils.canal_comunicacion import HistorialMensajes
+
+
+def registrar(historial, cantidad):
+    for i in range(cantidad):
+        historial.registrar("comprador_a_cajero", f"C{i % 2}", "CAJ001", {"indice": i})
+
+
+def secuencias_volcadas(ruta):
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return [json.loads(linea)["secuencia"] for linea in archivo]
+
+
+def test_lleno_desaloja_el_mas_antiguo_tambien_de_los_indices():
+    historial = HistorialMensajes(capacidad=3)
+    registrar(historial, 5)  # C0: 1, 3, 5 / C1: 2, 4
+    
+    assert len(historial) == 3
+    assert [e["secuencia"] for e in historial.conversacion_comprador("C0")] == [3, 5]
+    assert [e["secuencia"] for e in historial.conversacion_comprador("C1")] == [4]
+    assert [e["secuencia"] for e in historial.mensajes_cajero("CAJ001")] == [3, 4, 5]
+    
+    estadisticas = historial.obtener_estadisticas()
+    assert estadisticas["registrados"] == 5
+    assert estadisticas["descartados"] == 2
+
+
+def test_comprador_sin_mensajes_en_memoria_deja_de_estar_indexado():
+    historial = HistorialMensajes(capacidad=2)
+    historial.registrar("comprador_a_cajero", "C-VIEJO", "CAJ001", {})
+    historial.registrar("comprador_a_cajero", "C-NUEVO", "CAJ002", {})
+    historial.registrar("cajero_a_comprador", "C-NUEVO", "CAJ002", {})
+    
+    assert historial.conversacion_comprador("C-VIEJO") == []
+    assert historial.mensajes_cajero("CAJ001") == []
+    assert [e["tipo"] for e in historial.conversacion_comprador("C-NUEVO")] == [
+        "comprador_a_cajero", "cajero_a_comprador"
+    ]
+    assert historial.obtener_estadisticas()["compradores_indexados"] == 1
+
+
+def test_volcado_guarda_solo_los_desalojados_y_el_resto_al_cerrar(tmp_path):
+    ruta = tmp_path / "historial" / "SUC001.ndjson"
+    historial = HistorialMensajes(capacidad=2, ruta_volcado=str(ruta))
+    
+    registrar(historial, 5)
+    assert secuencias_volcadas(ruta) == [1, 2, 3]
+    
+    historial.cerrar()
+    assert secuencias_volcadas(ruta) == [1, 2, 3, 4, 5]
+    
+    registrar(historial, 1)  # Cerrado: ya no se vuelca
+    assert secuencias_volcadas(ruta) == [1, 2, 3, 4, 5]
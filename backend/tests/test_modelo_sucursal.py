@@ -0,0 +1,52 @@
+"""
+Pruebas del registro de modelos: la construcción del modelo de una sucursal
+no bloquea a las demás y se hace una sola vez aunque la pidan varios hilos.
+"""
+
+import contextlib
+import io
+import threading
+
+import utils.modelo_sucursal as modulo_modelo
+from utils.modelo_sucursal import RegistroModelos
+
+
+def test_construccion_lenta_no_bloquea_otra_sucursal(monkeypatch):
+    registro = RegistroModelos()
+    with contextlib.redirect_stdout(io.StringIO()):
+        registro.obtener_modelo("SUC002")
+    
+    construyendo = threading.Event()
+    liberar = threading.Event()
+    construcciones = []
+    construir = modulo_modelo.ModeloSucursal
+    
+    def construir_retenido(mapa):
+        construcciones.append(mapa)
+        construyendo.set()
+        liberar.wait(5)
+        return construir(mapa)
+    
+    monkeypatch.setattr(modulo_modelo, "ModeloSucursal", construir_retenido)
+    
+    resultados = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        hilos = [threading.Thread(target=lambda: resultados.append(registro.obtener_modelo("SUC001")))
+                 for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        assert construyendo.wait(2)
+        
+        # SUC001 se está construyendo: SUC002 se sigue sirviendo
+        otra = threading.Thread(target=lambda: resultados.append(registro.obtener_modelo("SUC002")))
+        otra.start()
+        otra.join(1)
+        assert not otra.is_alive()
+        assert resultados == [registro.modelos["SUC002"]]
+        
+        liberar.set()
+        for hilo in hilos:
+            hilo.join(5)
+    
+    assert len(construcciones) == 1
+    assert resultados[1] is resultados[2] is registro.modelos["SUC001"]
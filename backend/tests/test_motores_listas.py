@@ -0,0 +1,54 @@
+"""
+Pruebas de los motores de listas: con semilla fija el resultado es
+reproducible y cae en la banda de presupuesto del tipo de lista.
+"""
+
+import json
+import os
+
+import pytest
+
+from utils.algoritmos_busqueda import MOTORES_LISTAS, crear_motor_listas
+
+
+def cargar_productos(sucursal_id="SUC001"):
+    ruta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'inventario', f'{sucursal_id}.json')
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return json.load(archivo)['productos']
+
+
+def lista_en_banda(solucion, presupuesto, tipo_lista):
+    """Banda de presupuesto y variedad mínima, con el criterio del Temple Simulado"""
+    return crear_motor_listas().esta_en_banda(solucion, presupuesto, tipo_lista)
+
+
+def resumen(solucion):
+    """Lista comparable: (id, cantidad) ordenados"""
+    return sorted((producto['id'], cantidad) for producto, cantidad in solucion)
+
+
+@pytest.mark.parametrize("motor", list(MOTORES_LISTAS))
+@pytest.mark.parametrize("tipo_lista", ["exacta", "superior", "inferior"])
+@pytest.mark.parametrize("presupuesto", [50.0, 250.0])
+def test_lista_en_banda_de_presupuesto(motor, tipo_lista, presupuesto):
+    productos = cargar_productos()
+    
+    for semilla in range(3):
+        solucion, _, _ = crear_motor_listas(motor, semilla=semilla).optimizar(productos, presupuesto, tipo_lista)
+        
+        assert lista_en_banda(solucion, presupuesto, tipo_lista)
+
+
+@pytest.mark.parametrize("motor", list(MOTORES_LISTAS))
+def test_misma_semilla_misma_lista(motor):
+    productos = cargar_productos("SUC002")
+    
+    resultados = [
+        crear_motor_listas(motor, semilla=11).optimizar(productos, 150.0, "superior")
+        for _ in range(2)
+    ]
+    
+    (solucion_a, costo_a, _), (solucion_b, costo_b, _) = resultados
+    assert resumen(solucion_a) == resumen(solucion_b)
+    assert costo_a == costo_b
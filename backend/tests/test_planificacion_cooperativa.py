@@ -0,0 +1,57 @@
+"""
+Pruebas del planificador cooperativo: una parada inalcanzable no debe dejar
+reservas a medias en la tabla.
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from utils.modelo_sucursal import ModeloSucursal
+from utils.planificacion_cooperativa import PlanificadorCooperativo
+
+
+def crear_planificador():
+    """Planificador sobre un mapa de 5x7 con la celda (2, 5) encerrada."""
+    mapa = {
+        'sucursal_id': 'SUC-PRUEBA',
+        'dimensiones': {'filas': 5, 'columnas': 7},
+        'entrada': {'fila': 0, 'columna': 0},
+        'cajeros': [{'id': 'CAJ001', 'fila': 4, 'columna': 0}],
+        'obstaculos': [
+            {'fila': 1, 'columna': 5}, {'fila': 3, 'columna': 5},
+            {'fila': 2, 'columna': 4}, {'fila': 2, 'columna': 6}
+        ],
+        'zonas_productos': {}
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PlanificadorCooperativo(ModeloSucursal(mapa))
+
+
+def test_parada_final_inalcanzable_no_deja_reservas():
+    planificador = crear_planificador()
+    planificador.planificar_recorrido('A', (0, 0), [(4, 6), (4, 0)])
+    celdas = dict(planificador.reservas.celdas)
+    movimientos = dict(planificador.reservas.movimientos)
+    
+    with pytest.raises(ValueError):
+        planificador.planificar_recorrido('B', (0, 1), [(0, 6), (2, 5)])
+    
+    assert planificador.reservas.celdas == celdas
+    assert planificador.reservas.movimientos == movimientos
+    assert 'B' not in planificador.reservas.por_agente
+    assert 'B' not in planificador.recorridos
+
+
+def test_replanificacion_fallida_conserva_el_recorrido_anterior():
+    planificador = crear_planificador()
+    planificador.planificar_recorrido('A', (0, 0), [(4, 6), (4, 0)])
+    celdas = dict(planificador.reservas.celdas)
+    recorrido = dict(planificador.recorridos['A'])
+    
+    with pytest.raises(ValueError):
+        planificador.planificar_recorrido('A', (0, 0), [(0, 6), (2, 5)])
+    
+    assert planificador.reservas.celdas == celdas
+    assert planificador.recorridos['A'] == recorrido
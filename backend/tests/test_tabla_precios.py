@@ -0,0 +1,82 @@
+"""
+Pruebas de las tablas de precios compartidas: inventario de solo lectura,
+sustitución sin modificar tablas publicadas e invalidación de la caché de
+listas al cambiar el catálogo.
+"""
+
+import json
+import os
+import pickle
+
+import pytest
+
+from utils.cache import CacheListas
+from utils.tabla_precios import RegistroTablasPrecios
+
+
+PRODUCTOS = [
+    {"id": 1, "nombre": "Arroz", "precio": 8.5, "categoria": "Abarrotes"},
+    {"id": 2, "nombre": "Leche", "precio": 6.0, "categoria": "Lácteos"},
+]
+
+
+def escribir_inventario(directorio, productos, mtime_ns=None):
+    ruta = os.path.join(directorio, "SUC001.json")
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"sucursal_id": "SUC001", "productos": productos}, archivo)
+    if mtime_ns is not None:
+        os.utime(ruta, ns=(mtime_ns, mtime_ns))
+
+
+def test_inventario_compartido_es_de_solo_lectura(tmp_path):
+    escribir_inventario(tmp_path, PRODUCTOS)
+    tabla = RegistroTablasPrecios(str(tmp_path)).obtener("SUC001")
+    
+    with pytest.raises(TypeError):
+        tabla.inventario["productos"] = []
+    with pytest.raises(TypeError):
+        tabla.inventario["productos"].append({"id": 3})
+    with pytest.raises(TypeError):
+        tabla.inventario["productos"][0]["precio"] = 0.0
+    
+    # Sigue siendo un dict/list normal para JSON y para otros procesos
+    assert json.loads(json.dumps(tabla.inventario))["productos"] == PRODUCTOS
+    copia = pickle.loads(pickle.dumps(tabla.inventario))
+    assert copia == tabla.inventario
+    with pytest.raises(TypeError):
+        copia["productos"].clear()
+
+
+def test_mismo_catalogo_con_otra_fecha_publica_una_tabla_nueva(tmp_path):
+    escribir_inventario(tmp_path, PRODUCTOS, mtime_ns=1_000_000_000)
+    registro = RegistroTablasPrecios(str(tmp_path))
+    anterior = registro.obtener("SUC001")
+    firma_anterior = anterior.firma
+    
+    escribir_inventario(tmp_path, PRODUCTOS, mtime_ns=2_000_000_000)
+    actual = registro.obtener("SUC001")
+    
+    assert actual is not anterior
+    assert anterior.firma == firma_anterior
+    assert actual.version == anterior.version
+    assert actual.inventario is anterior.inventario
+    assert registro.sustituciones == 0
+
+
+def test_cambio_de_catalogo_invalida_las_listas_cacheadas(tmp_path):
+    escribir_inventario(tmp_path, PRODUCTOS, mtime_ns=1_000_000_000)
+    registro = RegistroTablasPrecios(str(tmp_path))
+    cache = CacheListas()
+    
+    tabla = registro.obtener("SUC001")
+    cache.guardar_lista("SUC001", tabla.version, 50.0, "exacta", "temple", {}, ([], 0.0, 1))
+    assert cache.obtener_lista("SUC001", tabla.version, 50.0, "exacta", "temple", {}) is not None
+    
+    escribir_inventario(tmp_path, [dict(PRODUCTOS[0], precio=9.0), PRODUCTOS[1]], mtime_ns=2_000_000_000)
+    nueva = registro.obtener("SUC001")
+    
+    assert nueva.version != tabla.version
+    assert nueva.precios[1]["precio"] == 9.0
+    assert tabla.precios[1]["precio"] == 8.5  # Quien tenía la anterior la sigue viendo completa
+    assert cache.obtener_lista("SUC001", nueva.version, 50.0, "exacta", "temple", {}) is None
+    assert cache.obtener_lista("SUC001", tabla.version, 50.0, "exacta", "temple", {}) is None
@@ -0,0 +1,49 @@
+"""
+Pruebas de la telemetría del Temple Simulado: resumen de las trazas y
+registro acotado por comprador.
+"""
+
+import json
+import os
+
+from utils.algoritmos_busqueda import crear_motor_listas
+from utils.telemetria import RegistroTrazas, resumir_traza
+
+
+def generar_traza(semilla=1):
+    ruta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'data', 'inventario', 'SUC001.json')
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        productos = json.load(archivo)['productos']
+    
+    optimizador = crear_motor_listas("temple", semilla=semilla, registrar_traza=True)
+    optimizador.optimizar(productos, 150.0, "exacta")
+    return list(optimizador.traza)
+
+
+def test_resumen_acumula_los_niveles_de_la_traza():
+    muestras = generar_traza()
+    resumen = resumir_traza(muestras)
+    
+    assert resumen["niveles"] == len(muestras) > 0
+    assert resumen["iteraciones"] == sum(muestra["iteraciones"] for muestra in muestras)
+    assert resumen["mejor_costo"] == muestras[-1]["mejor_costo"]
+    assert 0.0 <= resumen["aceptacion_media"] <= 1.0
+    assert resumir_traza([])["niveles"] == 0
+
+
+def test_registro_guarda_la_ultima_traza_y_desaloja_al_menos_reciente():
+    registro = RegistroTrazas(max_compradores=2)
+    muestras = generar_traza()
+    
+    registro.registrar("C1", {"exacta": muestras}, motor="temple")
+    registro.registrar("C2", {"exacta": muestras})
+    registro.registrar("C1", {"exacta": muestras[:1]})  # C1 pasa a ser el más reciente
+    registro.registrar("C3", {"exacta": muestras})
+    
+    assert registro.obtener("C2") is None
+    assert registro.obtener("C1")["resumen"]["exacta"]["niveles"] == 1
+    assert "motor" not in registro.obtener("C1")  # Reemplaza la entrada anterior
+    assert [entrada["comprador_id"] for entrada in registro.listar()] == ["C1", "C3"]
+    assert all("trazas" not in entrada for entrada in registro.listar())
+    assert registro.obtener_estadisticas()["registradas"] == 4
@@ -3,10 +3,15 @@ Algoritmos de Búsqueda para Sistema Multi-Agente
 Implementa los algoritmos de búsqueda utilizados por el agente comprador.
 """
 
+import bisect
 import heapq
+import itertools
 import math
 import random
-from typing import List, Dict, Tuple, Set, Optional, Callable
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Tuple, Set, Optional, Callable, Iterable
 
 
 class Nodo:
@@ -35,14 +40,173 @@ class Nodo:
         return hash(self.posicion)
 
 
+class GridOcupacion:
+    """
+    Grid de ocupación compacto para los algoritmos de búsqueda.
+    
+    Las celdas se identifican con un índice entero fila*columnas+columna.
+    Los obstáculos se guardan en un bytearray plano y los vecinos libres
+    de cada celda se precalculan una sola vez, de modo que la expansión de
+    nodos no crea listas ni tuplas nuevas.
+    """
+    
+    def __init__(
+        self,
+        filas: int,
+        columnas: int,
+        obstaculos: Optional[Iterable[Tuple[int, int]]] = None
+    ):
+        """
+        Construye el grid a partir de las dimensiones y los obstáculos.
+        
+        Args:
+            filas: Número de filas del mapa
+            columnas: Número de columnas del mapa
+            obstaculos: Posiciones (fila, columna) bloqueadas
+        """
+        self.filas = filas
+        self.columnas = columnas
+        self.total_celdas = filas * columnas
+        
+        # 1 = bloqueado, 0 = libre
+        self.bloqueado = bytearray(self.total_celdas)
+        for fila, columna in obstaculos or ():
+            if 0 <= fila < filas and 0 <= columna < columnas:
+                self.bloqueado[fila * columnas + columna] = 1
+        
+        # Desplazamientos de índice: arriba, abajo, izquierda, derecha
+        self.desplazamientos = (-columnas, columnas, -1, 1)
+        
+        # Vecinos libres precalculados por celda
+        self.vecinos = self._precalcular_vecinos()
+    
+        # Copia con borde bloqueado (se calcula bajo demanda, ver libres_con_borde)
+        self._libres_con_borde = None
+    
+    @classmethod
+    def desde_mapa(cls, mapa: Dict) -> 'GridOcupacion':
+        """
+        Construye el grid a partir del JSON de un mapa de sucursal.
+        
+        Args:
+            mapa: Diccionario del mapa (dimensiones y obstaculos)
+            
+        Returns:
+            Grid de ocupación del mapa
+        """
+        return cls(
+            mapa['dimensiones']['filas'],
+            mapa['dimensiones']['columnas'],
+            ((obs['fila'], obs['columna']) for obs in mapa.get('obstaculos', []))
+        )
+    
+    def _precalcular_vecinos(self) -> List[Tuple[int, ...]]:
+        """
+        Precalcula los vecinos libres de cada celda (en orden arriba, abajo,
+        izquierda, derecha). También se calculan para celdas bloqueadas para
+        permitir iniciar una búsqueda sobre ellas.
+        """
+        filas, columnas = self.filas, self.columnas
+        bloqueado = self.bloqueado
+        vecinos = []
+        
+        for indice in range(self.total_celdas):
+            fila, columna = divmod(indice, columnas)
+            candidatos = []
+            if fila > 0:
+                candidatos.append(indice - columnas)
+            if fila < filas - 1:
+                candidatos.append(indice + columnas)
+            if columna > 0:
+                candidatos.append(indice - 1)
+            if columna < columnas - 1:
+                candidatos.append(indice + 1)
+            vecinos.append(tuple(v for v in candidatos if not bloqueado[v]))
+        
+        return vecinos
+    
+    def libres_con_borde(self) -> bytearray:
+        """
+        Devuelve un bytearray de (filas+2)x(columnas+2) con 1 en las celdas
+        libres y un borde de celdas bloqueadas alrededor del mapa. Permite a
+        los algoritmos que recorren el grid en línea recta (JPS) comprobar
+        celdas sin verificar límites. Se calcula una sola vez.
+        """
+        if self._libres_con_borde is None:
+            ancho = self.columnas + 2
+            libres = bytearray(ancho * (self.filas + 2))
+            for fila in range(self.filas):
+                inicio = fila * self.columnas
+                destino = (fila + 1) * ancho + 1
+                for columna in range(self.columnas):
+                    libres[destino + columna] = 0 if self.bloqueado[inicio + columna] else 1
+            self._libres_con_borde = libres
+        
+        return self._libres_con_borde
+    
+    def indice(self, posicion: Tuple[int, int]) -> int:
+        """Convierte (fila, columna) en índice de celda"""
+        return posicion[0] * self.columnas + posicion[1]
+    
+    def posicion(self, indice: int) -> Tuple[int, int]:
+        """Convierte un índice de celda en (fila, columna)"""
+        return divmod(indice, self.columnas)
+    
+    def en_limites(self, posicion: Tuple[int, int]) -> bool:
+        """Indica si la posición está dentro del mapa"""
+        return 0 <= posicion[0] < self.filas and 0 <= posicion[1] < self.columnas
+    
+    def es_transitable(self, posicion: Tuple[int, int]) -> bool:
+        """Indica si la posición está dentro del mapa y libre de obstáculos"""
+        return self.en_limites(posicion) and not self.bloqueado[self.indice(posicion)]
+    
+    def reconstruir_camino(self, padres: Dict[int, int], final: int) -> List[Tuple[int, int]]:
+        """
+        Reconstruye un camino de índices y lo convierte a coordenadas.
+        
+        Args:
+            padres: Diccionario {indice: indice_padre}, -1 para el inicio
+            final: Índice de la celda final
+            
+        Returns:
+            Lista de posiciones desde el inicio hasta la celda final
+        """
+        columnas = self.columnas
+        camino = []
+        actual = final
+        
+        while actual >= 0:
+            camino.append(divmod(actual, columnas))
+            actual = padres[actual]
+        
+        camino.reverse()
+        return camino
+
+
 class BusquedaAEstrella:
     """
     Implementación del algoritmo A* para navegación en el mapa.
     Encuentra el camino óptimo desde un punto inicial hasta un objetivo.
+    
+    Motores disponibles:
+    - "a_estrella": A* clásico que expande celda por celda
+    - "jps": Jump Point Search (variante 4-conectada), que salta a lo largo
+      de pasillos y solo expande los puntos de salto
     """
     
-    def __init__(self):
-        """Inicializa el algoritmo A*"""
+    MOTORES = ("a_estrella", "jps")
+    
+    def __init__(self, motor: str = "a_estrella"):
+        """
+        Inicializa el algoritmo A*.
+        
+        Args:
+            motor: Motor de búsqueda por defecto ("a_estrella" o "jps")
+        """
+        if motor not in self.MOTORES:
+            raise ValueError(f"Motor de búsqueda inválido: {motor}")
+        
+        self.motor = motor
         self.camino_encontrado = []
         self.nodos_expandidos = 0
         self.costo_total = 0
@@ -73,60 +237,31 @@ class BusquedaAEstrella:
         """
         return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
     
-    def obtener_vecinos(
-        self, 
-        posicion: Tuple[int, int], 
-        dimensiones: Tuple[int, int], 
-        obstaculos: Set[Tuple[int, int]]
-    ) -> List[Tuple[int, int]]:
-        """
-        Obtiene las posiciones vecinas válidas (arriba, abajo, izquierda, derecha).
-        
-        Args:
-            posicion: Posición actual (fila, columna)
-            dimensiones: Dimensiones del mapa (filas, columnas)
-            obstaculos: Conjunto de posiciones con obstáculos
-            
-        Returns:
-            Lista de posiciones vecinas válidas
-        """
-        fila, columna = posicion
-        filas_max, columnas_max = dimensiones
-        
-        # Movimientos: arriba, abajo, izquierda, derecha
-        movimientos = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        vecinos = []
-        
-        for df, dc in movimientos:
-            nueva_fila = fila + df
-            nueva_col = columna + dc
-            nueva_pos = (nueva_fila, nueva_col)
-            
-            # Verificar límites
-            if 0 <= nueva_fila < filas_max and 0 <= nueva_col < columnas_max:
-                # Verificar que no sea obstáculo
-                if nueva_pos not in obstaculos:
-                    vecinos.append(nueva_pos)
-        
-        return vecinos
-    
     def buscar(
         self,
         inicio: Tuple[int, int],
         objetivo: Tuple[int, int],
         dimensiones: Tuple[int, int],
         obstaculos: Set[Tuple[int, int]],
-        usar_manhattan: bool = True
+        usar_manhattan: bool = True,
+        grid: Optional[GridOcupacion] = None,
+        motor: Optional[str] = None
     ) -> Tuple[List[Tuple[int, int]], float]:
         """
         Ejecuta el algoritmo A* para encontrar el camino óptimo.
         
+        La búsqueda trabaja sobre índices enteros de celda del GridOcupacion
+        y solo convierte a coordenadas el camino devuelto.
+        
         Args:
             inicio: Posición inicial (fila, columna)
             objetivo: Posición objetivo (fila, columna)
             dimensiones: Dimensiones del mapa (filas, columnas)
             obstaculos: Conjunto de posiciones bloqueadas
             usar_manhattan: Si True usa Manhattan, si False usa Euclidiana
+            grid: Grid precalculado del mapa (si es None se construye
+                  a partir de dimensiones y obstaculos)
+            motor: Motor a usar en esta búsqueda (por defecto self.motor)
             
         Returns:
             Tupla (camino, costo) donde camino es lista de posiciones
@@ -136,350 +271,1989 @@ class BusquedaAEstrella:
         self.camino_encontrado = []
         self.costo_total = 0
         
-        # Elegir heurística
-        heuristica = self.heuristica_manhattan if usar_manhattan else self.heuristica_euclidiana
+        motor = motor or self.motor
+        if motor not in self.MOTORES:
+            raise ValueError(f"Motor de búsqueda inválido: {motor}")
         
-        # Crear nodo inicial
-        nodo_inicial = Nodo(inicio, g=0, h=heuristica(inicio, objetivo))
+        if grid is None:
+            grid = GridOcupacion(dimensiones[0], dimensiones[1], obstaculos)
         
-        # Cola de prioridad (open set)
-        frontera = []
-        heapq.heappush(frontera, nodo_inicial)
+        if not grid.en_limites(inicio) or not grid.es_transitable(objetivo):
+            return [], float('inf')
         
-        # Conjuntos de nodos
-        explorados = set()
-        en_frontera = {inicio: nodo_inicial}
+        if motor == "jps":
+            return self._buscar_jps(inicio, objetivo, grid, usar_manhattan)
+        
+        columnas = grid.columnas
+        vecinos = grid.vecinos
+        fila_obj, col_obj = objetivo
+        
+        # Heurística sobre índices de celda
+        if usar_manhattan:
+            def heuristica(celda: int) -> float:
+                fila, columna = divmod(celda, columnas)
+                return abs(fila - fila_obj) + abs(columna - col_obj)
+        else:
+            def heuristica(celda: int) -> float:
+                fila, columna = divmod(celda, columnas)
+                return math.sqrt((fila - fila_obj) ** 2 + (columna - col_obj) ** 2)
+        
+        celda_inicio = grid.indice(inicio)
+        celda_objetivo = grid.indice(objetivo)
+        
+        # Cola de prioridad (open set): (f, h, celda)
+        h_inicio = heuristica(celda_inicio)
+        frontera = [(h_inicio, h_inicio, celda_inicio)]
+        
+        # Costos g, padres y celdas cerradas
+        costos = {celda_inicio: 0}
+        padres = {celda_inicio: -1}
+        explorados = bytearray(grid.total_celdas)
         
         while frontera:
-            # Obtener nodo con menor f
-            nodo_actual = heapq.heappop(frontera)
+            # Obtener celda con menor f
+            _, _, actual = heapq.heappop(frontera)
             
-            # Remover de en_frontera
-            if nodo_actual.posicion in en_frontera:
-                del en_frontera[nodo_actual.posicion]
+            # Entrada obsoleta de la cola (ya cerrada con menor costo)
+            if explorados[actual]:
+                continue
             
             # Verificar si llegamos al objetivo
-            if nodo_actual.posicion == objetivo:
-                # Reconstruir camino
-                self.camino_encontrado = self._reconstruir_camino(nodo_actual)
-                self.costo_total = nodo_actual.g
+            if actual == celda_objetivo:
+                self.camino_encontrado = grid.reconstruir_camino(padres, actual)
+                self.costo_total = costos[actual]
                 return self.camino_encontrado, self.costo_total
             
             # Marcar como explorado
-            explorados.add(nodo_actual.posicion)
+            explorados[actual] = 1
             self.nodos_expandidos += 1
             
-            # Expandir vecinos
-            vecinos = self.obtener_vecinos(nodo_actual.posicion, dimensiones, obstaculos)
+            # Costo de moverse al vecino (siempre 1 en un grid)
+            g_tentativo = costos[actual] + 1
             
-            for vecino_pos in vecinos:
-                # Saltar si ya fue explorado
-                if vecino_pos in explorados:
+            for vecino in vecinos[actual]:
+                if explorados[vecino]:
                     continue
                 
-                # Costo de moverse al vecino (siempre 1 en un grid)
-                g_tentativo = nodo_actual.g + 1
-                
-                # Verificar si es un nuevo nodo o si encontramos un mejor camino
-                if vecino_pos not in en_frontera:
-                    # Nuevo nodo
-                    h = heuristica(vecino_pos, objetivo)
-                    nodo_vecino = Nodo(vecino_pos, g=g_tentativo, h=h, padre=nodo_actual)
-                    heapq.heappush(frontera, nodo_vecino)
-                    en_frontera[vecino_pos] = nodo_vecino
-                else:
-                    # Actualizar si encontramos mejor camino
-                    nodo_vecino = en_frontera[vecino_pos]
-                    if g_tentativo < nodo_vecino.g:
-                        nodo_vecino.g = g_tentativo
-                        nodo_vecino.f = g_tentativo + nodo_vecino.h
-                        nodo_vecino.padre = nodo_actual
-                        # Re-insertar en la cola (heapq no tiene decrease-key)
-                        heapq.heappush(frontera, nodo_vecino)
+                # Nuevo nodo o mejor camino encontrado
+                if g_tentativo < costos.get(vecino, math.inf):
+                    costos[vecino] = g_tentativo
+                    padres[vecino] = actual
+                    h = heuristica(vecino)
+                    heapq.heappush(frontera, (g_tentativo + h, h, vecino))
         
         # No se encontró camino
         return [], float('inf')
     
-    def _reconstruir_camino(self, nodo_final: Nodo) -> List[Tuple[int, int]]:
-        """
-        Reconstruye el camino desde el nodo final hasta el inicial.
-        
-        Args:
-            nodo_final: Nodo objetivo alcanzado
-            
-        Returns:
-            Lista de posiciones desde inicio hasta objetivo
-        """
-        camino = []
-        nodo_actual = nodo_final
-        
-        while nodo_actual is not None:
-            camino.append(nodo_actual.posicion)
-            nodo_actual = nodo_actual.padre
-        
-        camino.reverse()
-        return camino
-
-
-class BusquedaCostoUniforme:
-    """
-    Implementación de Búsqueda de Costo Uniforme (Dijkstra).
-    Encuentra el nodo más cercano que cumple una condición.
-    """
-    
-    def __init__(self):
-        """Inicializa el algoritmo"""
-        self.camino_encontrado = []
-        self.nodos_expandidos = 0
-        self.costo_total = 0
+    # ========== JUMP POINT SEARCH (4-CONECTADO) ==========
     
-    def buscar_mas_cercano(
+    def _buscar_jps(
         self,
         inicio: Tuple[int, int],
-        objetivos: List[Tuple[int, int]],
-        dimensiones: Tuple[int, int],
-        obstaculos: Set[Tuple[int, int]]
-    ) -> Tuple[Tuple[int, int], List[Tuple[int, int]], float]:
+        objetivo: Tuple[int, int],
+        grid: GridOcupacion,
+        usar_manhattan: bool = True
+    ) -> Tuple[List[Tuple[int, int]], float]:
         """
-        Busca el objetivo más cercano desde la posición inicial.
+        Jump Point Search para grids 4-conectados de costo uniforme.
+        
+        En lugar de expandir cada celda de un pasillo, avanza en línea recta
+        hasta encontrar un punto de salto (el objetivo, un vecino forzado
+        junto a una esquina de estantería o, en movimientos verticales, una
+        celda desde la que parte un salto horizontal útil). Solo los puntos
+        de salto entran en la cola, y el costo entre ellos es su distancia
+        en línea recta, por lo que el camino sigue siendo óptimo.
+        
+        Trabaja sobre el grid con borde bloqueado, así que comprobar una
+        celda es una sola lectura del bytearray, sin verificar límites.
         
         Args:
             inicio: Posición inicial (fila, columna)
-            objetivos: Lista de posiciones objetivo posibles
-            dimensiones: Dimensiones del mapa (filas, columnas)
-            obstaculos: Conjunto de posiciones bloqueadas
+            objetivo: Posición objetivo (fila, columna)
+            grid: Grid de ocupación del mapa
+            usar_manhattan: Si True usa Manhattan, si False usa Euclidiana
             
         Returns:
-            Tupla (objetivo_encontrado, camino, costo)
+            Tupla (camino, costo) con el camino expandido celda por celda
         """
-        self.nodos_expandidos = 0
+        libres = grid.libres_con_borde()
+        ancho = grid.columnas + 2
+        fila_obj, col_obj = objetivo
         
-        # Conjunto de objetivos para búsqueda rápida
-        objetivos_set = set(objetivos)
+        celda_inicio = (inicio[0] + 1) * ancho + inicio[1] + 1
+        celda_objetivo = (fila_obj + 1) * ancho + col_obj + 1
         
-        # Crear nodo inicial
-        nodo_inicial = Nodo(inicio, g=0, h=0)
+        def saltar(celda: int, paso: int) -> int:
+            # Avanza desde la celda en la dirección del paso; -1 si no hay salto
+            while True:
+                if not libres[celda]:
+                    return -1
+                if celda == celda_objetivo:
+                    return celda
+                
+                if paso == 1 or paso == -1:
+                    # Movimiento horizontal: vecino forzado arriba o abajo
+                    if ((libres[celda - ancho] and not libres[celda - ancho - paso]) or
+                            (libres[celda + ancho] and not libres[celda + ancho - paso])):
+                        return celda
+                else:
+                    # Movimiento vertical: vecino forzado a izquierda o derecha
+                    if ((libres[celda - 1] and not libres[celda - 1 - paso]) or
+                            (libres[celda + 1] and not libres[celda + 1 - paso])):
+                        return celda
+                    # Un salto horizontal desde aquí encuentra un punto de salto
+                    if saltar(celda + 1, 1) >= 0 or saltar(celda - 1, -1) >= 0:
+                        return celda
+                
+                celda += paso
+        
+        if usar_manhattan:
+            def heuristica(celda: int) -> float:
+                fila, columna = divmod(celda, ancho)
+                return abs(fila - 1 - fila_obj) + abs(columna - 1 - col_obj)
+        else:
+            def heuristica(celda: int) -> float:
+                fila, columna = divmod(celda, ancho)
+                return math.sqrt((fila - 1 - fila_obj) ** 2 + (columna - 1 - col_obj) ** 2)
         
-        # Cola de prioridad
-        frontera = []
-        heapq.heappush(frontera, (0, nodo_inicial))
+        todas = (-ancho, ancho, -1, 1)
         
-        # Conjuntos de nodos
+        h_inicio = heuristica(celda_inicio)
+        frontera = [(h_inicio, h_inicio, celda_inicio)]
+        costos = {celda_inicio: 0}
+        padres = {celda_inicio: -1}
         explorados = set()
-        en_frontera = {inicio: 0}
         
         while frontera:
-            costo_actual, nodo_actual = heapq.heappop(frontera)
+            _, _, actual = heapq.heappop(frontera)
             
-            # Si ya fue explorado con menor costo, saltar
-            if nodo_actual.posicion in explorados:
+            if actual in explorados:
                 continue
             
-            # Verificar si es uno de los objetivos
-            if nodo_actual.posicion in objetivos_set:
-                self.camino_encontrado = self._reconstruir_camino(nodo_actual)
-                self.costo_total = nodo_actual.g
-                return nodo_actual.posicion, self.camino_encontrado, self.costo_total
+            if actual == celda_objetivo:
+                self.camino_encontrado = self._expandir_puntos_salto(padres, actual, ancho)
+                self.costo_total = costos[actual]
+                return self.camino_encontrado, self.costo_total
             
-            # Marcar como explorado
-            explorados.add(nodo_actual.posicion)
+            explorados.add(actual)
             self.nodos_expandidos += 1
             
-            # Expandir vecinos
-            vecinos = self._obtener_vecinos(nodo_actual.posicion, dimensiones, obstaculos)
+            # Direcciones podadas según la dirección de llegada
+            padre = padres[actual]
+            if padre < 0:
+                direcciones = todas
+            elif abs(actual - padre) < ancho:
+                direcciones = (-ancho, ancho, 1 if actual > padre else -1)
+            else:
+                direcciones = (-1, 1, ancho if actual > padre else -ancho)
             
-            for vecino_pos in vecinos:
-                if vecino_pos in explorados:
+            for paso in direcciones:
+                punto = saltar(actual + paso, paso)
+                if punto < 0 or punto in explorados:
                     continue
                 
-                g_tentativo = nodo_actual.g + 1
+                distancia = abs(punto - actual)
+                if paso != 1 and paso != -1:
+                    distancia //= ancho
                 
-                # Agregar o actualizar en frontera
-                if vecino_pos not in en_frontera or g_tentativo < en_frontera[vecino_pos]:
-                    en_frontera[vecino_pos] = g_tentativo
-                    nodo_vecino = Nodo(vecino_pos, g=g_tentativo, h=0, padre=nodo_actual)
-                    heapq.heappush(frontera, (g_tentativo, nodo_vecino))
+                g_tentativo = costos[actual] + distancia
+                if g_tentativo < costos.get(punto, math.inf):
+                    costos[punto] = g_tentativo
+                    padres[punto] = actual
+                    h = heuristica(punto)
+                    heapq.heappush(frontera, (g_tentativo + h, h, punto))
         
-        # No se encontró ningún objetivo
-        return None, [], float('inf')
+        # No se encontró camino
+        return [], float('inf')
     
-    def _obtener_vecinos(
+    def _expandir_puntos_salto(
         self,
-        posicion: Tuple[int, int],
-        dimensiones: Tuple[int, int],
-        obstaculos: Set[Tuple[int, int]]
+        padres: Dict[int, int],
+        final: int,
+        ancho: int
     ) -> List[Tuple[int, int]]:
-        """Obtiene vecinos válidos"""
-        fila, columna = posicion
-        filas_max, columnas_max = dimensiones
-        
-        movimientos = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        vecinos = []
-        
-        for df, dc in movimientos:
-            nueva_fila = fila + df
-            nueva_col = columna + dc
-            nueva_pos = (nueva_fila, nueva_col)
-            
-            if 0 <= nueva_fila < filas_max and 0 <= nueva_col < columnas_max:
-                if nueva_pos not in obstaculos:
-                    vecinos.append(nueva_pos)
-        
-        return vecinos
-    
-    def _reconstruir_camino(self, nodo_final: Nodo) -> List[Tuple[int, int]]:
-        """Reconstruye el camino"""
-        camino = []
-        nodo_actual = nodo_final
+        """
+        Convierte la cadena de puntos de salto (índices del grid con borde)
+        en el camino completo, rellenando las celdas de cada tramo recto.
+        """
+        puntos = []
+        actual = final
+        while actual >= 0:
+            fila, columna = divmod(actual, ancho)
+            puntos.append((fila - 1, columna - 1))
+            actual = padres[actual]
+        puntos.reverse()
         
-        while nodo_actual is not None:
-            camino.append(nodo_actual.posicion)
-            nodo_actual = nodo_actual.padre
+        camino = [puntos[0]]
+        for (fila, columna), (fila_dest, col_dest) in zip(puntos, puntos[1:]):
+            df = (fila_dest > fila) - (fila_dest < fila)
+            dc = (col_dest > columna) - (col_dest < columna)
+            while (fila, columna) != (fila_dest, col_dest):
+                fila += df
+                columna += dc
+                camino.append((fila, columna))
         
-        camino.reverse()
         return camino
 
 
-class TempleSimulado:
+class BusquedaJerarquica:
     """
-    Implementación del algoritmo de Temple Simulado para optimización de listas de compras.
-    Genera listas que maximizan variedad y se ajustan al presupuesto.
+    Búsqueda jerárquica HPA* (Hierarchical Path-Finding A*) para mapas
+    muy grandes (hipermercados y almacenes de cientos de filas y columnas).
+    
+    Preprocesamiento (al cargar el mapa):
+    1. Divide el grid en clusters cuadrados de tamano_cluster x tamano_cluster
+    2. Detecta las entradas entre clusters vecinos (tramos libres del borde)
+       y crea nodos abstractos a ambos lados de cada transición
+    3. Conecta los nodos abstractos de un mismo cluster con su distancia
+       real dentro del cluster (BFS restringido)
+       
+    Búsqueda: inserta inicio y objetivo en el grafo abstracto, ejecuta A*
+    sobre él y refina solo los tramos del camino abstracto elegido.
+    El camino puede ser ligeramente más largo que el óptimo; el sobrecosto
+    se mide con medir_sobrecosto().
+    
+    Una instancia se comparte entre hilos (es parte del modelo de la
+    sucursal): el grafo abstracto es de solo lectura, la caché de tramos
+    refinados tiene su propio lock y las estadísticas de la última búsqueda
+    (camino_encontrado, nodos_expandidos, costo_total) son de cada hilo.
     """
     
-    def __init__(
-        self,
-        temperatura_inicial: float = 1000.0,
-        temperatura_minima: float = 1.0,
-        factor_enfriamiento: float = 0.95,
-        iteraciones_por_temperatura: int = 100
-    ):
+    def __init__(self, grid: GridOcupacion, tamano_cluster: int = 16):
         """
-        Inicializa el algoritmo de Temple Simulado.
+        Construye el grafo abstracto del mapa.
         
         Args:
-            temperatura_inicial: Temperatura inicial
-            temperatura_minima: Temperatura mínima de parada
-            factor_enfriamiento: Factor de enfriamiento (0-1)
-            iteraciones_por_temperatura: Iteraciones por nivel de temperatura
+            grid: Grid de ocupación del mapa
+            tamano_cluster: Lado de cada cluster en celdas
         """
-        self.temperatura_inicial = temperatura_inicial
-        self.temperatura_minima = temperatura_minima
-        self.factor_enfriamiento = factor_enfriamiento
-        self.iteraciones_por_temperatura = iteraciones_por_temperatura
-        self.mejor_costo = float('inf')
-        self.iteraciones_totales = 0
+        self.grid = grid
+        self.tamano_cluster = tamano_cluster
+        # Resultado de la última búsqueda de cada hilo
+        self._ultima_busqueda = threading.local()
+        
+        # Grafo abstracto: {celda: {celda_vecina: costo}}
+        self.grafo = {}
+        # Nodos abstractos por cluster: {cluster: [celdas]}
+        self.nodos_por_cluster = {}
+        # Tramos intra-cluster ya refinados: {(celda_a, celda_b): [posiciones]}
+        self._tramos_refinados = {}
+        self._lock_tramos = threading.Lock()
+        
+        self._crear_entradas()
+        self._conectar_nodos_intra_cluster()
     
-    def generar_solucion_inicial(
+    @property
+    def camino_encontrado(self) -> List[Tuple[int, int]]:
+        """Camino de la última búsqueda de este hilo"""
+        return getattr(self._ultima_busqueda, 'camino', [])
+    
+    @property
+    def nodos_expandidos(self) -> int:
+        """Nodos abstractos expandidos en la última búsqueda de este hilo"""
+        return getattr(self._ultima_busqueda, 'nodos_expandidos', 0)
+    
+    @property
+    def costo_total(self) -> float:
+        """Costo de la última búsqueda de este hilo"""
+        return getattr(self._ultima_busqueda, 'costo', 0)
+    
+    # ========== PREPROCESAMIENTO ==========
+    
+    def cluster_de(self, celda: int) -> Tuple[int, int]:
+        """Devuelve el cluster (fila_cluster, columna_cluster) de una celda"""
+        fila, columna = divmod(celda, self.grid.columnas)
+        return fila // self.tamano_cluster, columna // self.tamano_cluster
+    
+    def _agregar_nodo(self, celda: int):
+        """Registra una celda como nodo abstracto"""
+        if celda not in self.grafo:
+            self.grafo[celda] = {}
+            self.nodos_por_cluster.setdefault(self.cluster_de(celda), []).append(celda)
+    
+    def _agregar_transicion(self, celda_a: int, celda_b: int):
+        """Crea la arista entre dos celdas vecinas de clusters distintos"""
+        self._agregar_nodo(celda_a)
+        self._agregar_nodo(celda_b)
+        self.grafo[celda_a][celda_b] = 1
+        self.grafo[celda_b][celda_a] = 1
+    
+    def _crear_entradas(self):
+        """
+        Recorre los bordes entre clusters vecinos. Cada tramo continuo de
+        pares de celdas libres es una entrada: si es corto se crea una
+        transición en su centro, si es largo una en cada extremo.
+        """
+        filas, columnas = self.grid.filas, self.grid.columnas
+        bloqueado = self.grid.bloqueado
+        t = self.tamano_cluster
+        
+        def procesar_tramo(pares: List[Tuple[int, int]]):
+            if not pares:
+                return
+            if len(pares) < 6:
+                self._agregar_transicion(*pares[len(pares) // 2])
+            else:
+                self._agregar_transicion(*pares[0])
+                self._agregar_transicion(*pares[-1])
+        
+        # Bordes verticales (entre columnas columna-1 y columna)
+        for columna in range(t, columnas, t):
+            for inicio_fila in range(0, filas, t):
+                tramo = []
+                for fila in range(inicio_fila, min(inicio_fila + t, filas)):
+                    izquierda = fila * columnas + columna - 1
+                    derecha = izquierda + 1
+                    if not bloqueado[izquierda] and not bloqueado[derecha]:
+                        tramo.append((izquierda, derecha))
+                    else:
+                        procesar_tramo(tramo)
+                        tramo = []
+                procesar_tramo(tramo)
+        
+        # Bordes horizontales (entre filas fila-1 y fila)
+        for fila in range(t, filas, t):
+            for inicio_columna in range(0, columnas, t):
+                tramo = []
+                for columna in range(inicio_columna, min(inicio_columna + t, columnas)):
+                    arriba = (fila - 1) * columnas + columna
+                    abajo = arriba + columnas
+                    if not bloqueado[arriba] and not bloqueado[abajo]:
+                        tramo.append((arriba, abajo))
+                    else:
+                        procesar_tramo(tramo)
+                        tramo = []
+                procesar_tramo(tramo)
+    
+    def _conectar_nodos_intra_cluster(self):
+        """Conecta entre sí los nodos abstractos de cada cluster"""
+        for nodos in self.nodos_por_cluster.values():
+            for celda in nodos:
+                distancias, _ = self._bfs_en_cluster(celda)
+                for otra in nodos:
+                    if otra != celda and otra in distancias:
+                        self.grafo[celda][otra] = distancias[otra]
+    
+    def _bfs_en_cluster(
         self,
-        productos: List[Dict],
-        presupuesto_objetivo: float
-    ) -> List[Tuple[Dict, int]]:
+        origen: int,
+        objetivo: Optional[int] = None
+    ) -> Tuple[Dict[int, int], Dict[int, int]]:
         """
-        Genera una solución inicial aleatoria válida.
+        BFS desde una celda sin salir de su cluster.
         
         Args:
-            productos: Lista de productos disponibles
-            presupuesto_objetivo: Presupuesto objetivo
+            origen: Celda de partida
+            objetivo: Si se indica, la búsqueda termina al alcanzarla
             
         Returns:
-            Lista de tuplas (producto, cantidad)
+            Tupla (distancias, padres) de las celdas alcanzadas
         """
-        solucion = []
-        total = 0.0
-        productos_usados = set()
-        productos_disponibles = productos.copy()
-        random.shuffle(productos_disponibles)
+        columnas = self.grid.columnas
+        t = self.tamano_cluster
+        vecinos = self.grid.vecinos
         
-        # Agregar productos hasta acercarse al presupuesto
-        for producto in productos_disponibles:
-            if total >= presupuesto_objetivo * 0.95:
+        fila_c, columna_c = self.cluster_de(origen)
+        fila_min, fila_max = fila_c * t, fila_c * t + t
+        col_min, col_max = columna_c * t, columna_c * t + t
+        
+        distancias = {origen: 0}
+        padres = {origen: -1}
+        cola = deque([origen])
+        
+        while cola:
+            actual = cola.popleft()
+            if actual == objetivo:
                 break
+            d = distancias[actual] + 1
+            for vecino in vecinos[actual]:
+                if vecino in distancias:
+                    continue
+                fila, columna = divmod(vecino, columnas)
+                if fila_min <= fila < fila_max and col_min <= columna < col_max:
+                    distancias[vecino] = d
+                    padres[vecino] = actual
+                    cola.append(vecino)
+        
+        return distancias, padres
+    
+    # ========== BÚSQUEDA ==========
+    
+    def buscar(
+        self,
+        inicio: Tuple[int, int],
+        objetivo: Tuple[int, int],
+        dimensiones: Optional[Tuple[int, int]] = None,
+        obstaculos: Optional[Set[Tuple[int, int]]] = None,
+        usar_manhattan: bool = True
+    ) -> Tuple[List[Tuple[int, int]], float]:
+        """
+        Busca un camino con HPA*. Misma firma y formato de retorno que
+        BusquedaAEstrella.buscar; dimensiones y obstaculos se ignoran porque
+        el mapa se fijó al construir el grafo abstracto.
+        
+        Args:
+            inicio: Posición inicial (fila, columna)
+            objetivo: Posición objetivo (fila, columna)
+            dimensiones: Ignorado (compatibilidad con BusquedaAEstrella)
+            obstaculos: Ignorado (compatibilidad con BusquedaAEstrella)
+            usar_manhattan: Si True usa Manhattan, si False usa Euclidiana
             
-            # Determinar cantidad que cabe en el presupuesto
-            precio = producto['precio']
-            cantidad_maxima = int((presupuesto_objetivo - total) / precio)
-            
-            if cantidad_maxima > 0:
-                # Preferir cantidad 1 para maximizar variedad
-                cantidad = 1 if precio <= presupuesto_objetivo - total else 0
-                
-                if cantidad > 0:
-                    solucion.append((producto, cantidad))
-                    total += precio * cantidad
-                    productos_usados.add(producto['id'])
+        Returns:
+            Tupla (camino, costo) donde camino es lista de posiciones
+        """
+        camino, costo, nodos_expandidos = self.buscar_con_estadisticas(inicio, objetivo, usar_manhattan)
         
-        return solucion
+        ultima = self._ultima_busqueda
+        ultima.camino = camino
+        ultima.costo = costo if camino else 0
+        ultima.nodos_expandidos = nodos_expandidos
+        return camino, costo
     
-    def calcular_costo(
+    def buscar_con_estadisticas(
         self,
-        solucion: List[Tuple[Dict, int]],
-        presupuesto_objetivo: float,
-        tipo_lista: str = "exacta"
-    ) -> float:
+        inicio: Tuple[int, int],
+        objetivo: Tuple[int, int],
+        usar_manhattan: bool = True
+    ) -> Tuple[List[Tuple[int, int]], float, int]:
         """
-        Calcula el costo de una solución (menor es mejor).
+        Busca un camino con HPA* sin modificar el estado de la instancia.
         
         Args:
-            solucion: Lista de tuplas (producto, cantidad)
-            presupuesto_objetivo: Presupuesto objetivo
-            tipo_lista: Tipo de lista ("exacta", "superior", "inferior")
+            inicio: Posición inicial (fila, columna)
+            objetivo: Posición objetivo (fila, columna)
+            usar_manhattan: Si True usa Manhattan, si False usa Euclidiana
             
         Returns:
-            Valor de costo
+            Tupla (camino, costo, nodos abstractos expandidos)
         """
-        if not solucion:
-            return float('inf')
+        grid = self.grid
+        if not grid.es_transitable(inicio) or not grid.es_transitable(objetivo):
+            return [], float('inf'), 0
         
-        # Calcular total
-        total = sum(prod['precio'] * cant for prod, cant in solucion)
+        celda_inicio = grid.indice(inicio)
+        celda_objetivo = grid.indice(objetivo)
         
-        # Definir rangos según tipo de lista
-        if tipo_lista == "exacta":
-            objetivo_min = presupuesto_objetivo * 0.998
-            objetivo_max = presupuesto_objetivo * 1.002
-        elif tipo_lista == "superior":
-            objetivo_min = presupuesto_objetivo * 1.00
-            objetivo_max = presupuesto_objetivo * 1.05
-        elif tipo_lista == "inferior":
-            objetivo_min = presupuesto_objetivo * 0.95
-            objetivo_max = presupuesto_objetivo * 1.00
-        else:
-            objetivo_min = presupuesto_objetivo * 0.95
-            objetivo_max = presupuesto_objetivo * 1.05
+        if celda_inicio == celda_objetivo:
+            return [inicio], 0, 0
         
-        # 1. Penalización por estar fuera del rango (peso muy alto)
-        penalizacion_presupuesto = 0.0
-        if total < objetivo_min:
-            penalizacion_presupuesto = (objetivo_min - total) ** 2 * 100
-        elif total > objetivo_max:
+        # Aristas temporales de inicio y objetivo hacia los nodos de su cluster
+        extra = {celda_inicio: {}, celda_objetivo: {}}
+        
+        distancias_inicio, _ = self._bfs_en_cluster(celda_inicio)
+        for nodo in self.nodos_por_cluster.get(self.cluster_de(celda_inicio), []):
+            if nodo in distancias_inicio:
+                extra[celda_inicio][nodo] = distancias_inicio[nodo]
+        if celda_objetivo in distancias_inicio:
+            extra[celda_inicio][celda_objetivo] = distancias_inicio[celda_objetivo]
+        
+        distancias_objetivo, _ = self._bfs_en_cluster(celda_objetivo)
+        for nodo in self.nodos_por_cluster.get(self.cluster_de(celda_objetivo), []):
+            if nodo in distancias_objetivo:
+                extra.setdefault(nodo, {})[celda_objetivo] = distancias_objetivo[nodo]
+        
+        camino_abstracto, costo, nodos_expandidos = self._a_estrella_abstracto(
+            celda_inicio, celda_objetivo, extra, usar_manhattan
+        )
+        if not camino_abstracto:
+            return [], float('inf'), nodos_expandidos
+        
+        return self._refinar(camino_abstracto), costo, nodos_expandidos
+    
+    def _a_estrella_abstracto(
+        self,
+        inicio: int,
+        objetivo: int,
+        extra: Dict[int, Dict[int, int]],
+        usar_manhattan: bool
+    ) -> Tuple[List[int], float, int]:
+        """A* sobre el grafo abstracto más las aristas temporales (camino, costo, expandidos)"""
+        columnas = self.grid.columnas
+        fila_obj, col_obj = divmod(objetivo, columnas)
+        
+        def heuristica(celda: int) -> float:
+            fila, columna = divmod(celda, columnas)
+            if usar_manhattan:
+                return abs(fila - fila_obj) + abs(columna - col_obj)
+            return math.sqrt((fila - fila_obj) ** 2 + (columna - col_obj) ** 2)
+        
+        h_inicio = heuristica(inicio)
+        frontera = [(h_inicio, h_inicio, inicio)]
+        costos = {inicio: 0}
+        padres = {inicio: -1}
+        explorados = set()
+        expandidos = 0
+        
+        while frontera:
+            _, _, actual = heapq.heappop(frontera)
+            if actual in explorados:
+                continue
+            
+            if actual == objetivo:
+                camino = []
+                while actual >= 0:
+                    camino.append(actual)
+                    actual = padres[actual]
+                camino.reverse()
+                return camino, costos[objetivo], expandidos
+            
+            explorados.add(actual)
+            expandidos += 1
+            
+            aristas = list(self.grafo.get(actual, {}).items()) + list(extra.get(actual, {}).items())
+            for vecino, costo_arista in aristas:
+                if vecino in explorados:
+                    continue
+                g_tentativo = costos[actual] + costo_arista
+                if g_tentativo < costos.get(vecino, math.inf):
+                    costos[vecino] = g_tentativo
+                    padres[vecino] = actual
+                    h = heuristica(vecino)
+                    heapq.heappush(frontera, (g_tentativo + h, h, vecino))
+        
+        return [], float('inf'), expandidos
+    
+    def _refinar(self, camino_abstracto: List[int]) -> List[Tuple[int, int]]:
+        """
+        Convierte el camino abstracto en celdas. Las transiciones entre
+        clusters son celdas vecinas; los tramos dentro de un cluster se
+        recalculan con BFS restringido al cluster.
+        """
+        grid = self.grid
+        camino = [grid.posicion(camino_abstracto[0])]
+        
+        for origen, destino in zip(camino_abstracto, camino_abstracto[1:]):
+            if self.cluster_de(origen) != self.cluster_de(destino):
+                camino.append(grid.posicion(destino))
+                continue
+            
+            # Los tramos entre nodos abstractos se reutilizan entre búsquedas
+            reutilizable = origen in self.grafo and destino in self.grafo
+            tramo = None
+            if reutilizable:
+                with self._lock_tramos:
+                    tramo = self._tramos_refinados.get((origen, destino))
+            
+            if tramo is None:
+                _, padres = self._bfs_en_cluster(origen, destino)
+                tramo = []
+                actual = destino
+                while actual != origen:
+                    tramo.append(grid.posicion(actual))
+                    actual = padres[actual]
+                tramo.reverse()
+                if reutilizable:
+                    with self._lock_tramos:
+                        tramo = self._tramos_refinados.setdefault((origen, destino), tramo)
+            
+            camino.extend(tramo)
+        
+        return camino
+    
+    def medir_sobrecosto(
+        self,
+        pares: List[Tuple[Tuple[int, int], Tuple[int, int]]]
+    ) -> Dict:
+        """
+        Mide el sobrecosto de HPA* frente al camino óptimo (A*).
+        
+        Args:
+            pares: Lista de pares (origen, destino)
+            
+        Returns:
+            Diccionario con sobrecosto promedio y máximo (en %) y la
+            fracción de caminos óptimos
+        """
+        a_estrella = BusquedaAEstrella()
+        sobrecostos = []
+        
+        for origen, destino in pares:
+            _, optimo = a_estrella.buscar(origen, destino, None, None, grid=self.grid)
+            _, costo = self.buscar(origen, destino)
+            if optimo in (0, float('inf')):
+                continue
+            sobrecostos.append((costo - optimo) / optimo * 100)
+        
+        if not sobrecostos:
+            return {"pares": 0, "sobrecosto_promedio_pct": 0.0,
+                    "sobrecosto_max_pct": 0.0, "caminos_optimos": 1.0}
+        
+        return {
+            "pares": len(sobrecostos),
+            "sobrecosto_promedio_pct": round(sum(sobrecostos) / len(sobrecostos), 3),
+            "sobrecosto_max_pct": round(max(sobrecostos), 3),
+            "caminos_optimos": round(sum(1 for s in sobrecostos if s == 0) / len(sobrecostos), 3)
+        }
+
+
+class BusquedaDStarLite:
+    """
+    Planificador incremental D* Lite para replanificar cuando cambian
+    obstáculos durante el recorrido (un derrame, un pallet, otro agente).
+    
+    Mantiene su estado de búsqueda (g, rhs y cola de prioridad) entre
+    llamadas. Cuando se bloquean o liberan celdas solo se actualizan los
+    vértices afectados y se repara el camino restante, en lugar de
+    planificar otra vez desde cero. La búsqueda se hace desde el objetivo
+    hacia el agente, por lo que el agente puede avanzar sin invalidarla.
+    """
+    
+    def __init__(
+        self,
+        grid: GridOcupacion,
+        inicio: Tuple[int, int],
+        objetivo: Tuple[int, int]
+    ):
+        """
+        Inicializa el planificador y calcula el primer camino.
+        
+        Args:
+            grid: Grid de ocupación del mapa (no se modifica; se copia su
+                  estado de obstáculos)
+            inicio: Posición actual del agente (fila, columna)
+            objetivo: Posición objetivo (fila, columna)
+        """
+        self.filas = grid.filas
+        self.columnas = grid.columnas
+        self.bloqueado = bytearray(grid.bloqueado)
+        
+        self.inicio = grid.indice(inicio)
+        self.objetivo = grid.indice(objetivo)
+        self.ultimo_inicio = self.inicio
+        self.km = 0
+        
+        self.g = {}
+        self.rhs = {self.objetivo: 0}
+        self.cola = []
+        self.en_cola = {}
+        self._insertar(self.objetivo)
+        
+        self.nodos_expandidos = 0
+        self.calcular_camino_mas_corto()
+    
+    # ========== FUNCIONES AUXILIARES ==========
+    
+    def _vecinos(self, celda: int) -> List[int]:
+        """Vecinos dentro del mapa (libres o no)"""
+        fila, columna = divmod(celda, self.columnas)
+        vecinos = []
+        if fila > 0:
+            vecinos.append(celda - self.columnas)
+        if fila < self.filas - 1:
+            vecinos.append(celda + self.columnas)
+        if columna > 0:
+            vecinos.append(celda - 1)
+        if columna < self.columnas - 1:
+            vecinos.append(celda + 1)
+        return vecinos
+    
+    def _costo(self, desde: int, hacia: int) -> float:
+        """Costo de moverse a una celda vecina (infinito si está bloqueada)"""
+        return math.inf if self.bloqueado[hacia] else 1
+    
+    def _heuristica(self, a: int, b: int) -> int:
+        """Distancia Manhattan entre dos celdas"""
+        fila_a, col_a = divmod(a, self.columnas)
+        fila_b, col_b = divmod(b, self.columnas)
+        return abs(fila_a - fila_b) + abs(col_a - col_b)
+    
+    def _clave(self, celda: int) -> Tuple[float, float]:
+        """Clave de prioridad de D* Lite"""
+        minimo = min(self.g.get(celda, math.inf), self.rhs.get(celda, math.inf))
+        return (minimo + self._heuristica(self.inicio, celda) + self.km, minimo)
+    
+    def _insertar(self, celda: int):
+        """Inserta o actualiza una celda en la cola (borrado perezoso)"""
+        clave = self._clave(celda)
+        self.en_cola[celda] = clave
+        heapq.heappush(self.cola, (clave, celda))
+    
+    def _tope(self) -> Tuple[Tuple[float, float], int]:
+        """Devuelve la entrada válida de menor clave sin extraerla"""
+        while self.cola:
+            clave, celda = self.cola[0]
+            if self.en_cola.get(celda) == clave:
+                return clave, celda
+            heapq.heappop(self.cola)
+        return (math.inf, math.inf), -1
+    
+    def _actualizar_vertice(self, celda: int):
+        """Recalcula rhs de una celda y su pertenencia a la cola"""
+        if celda != self.objetivo:
+            self.rhs[celda] = min(
+                (self._costo(celda, vecino) + self.g.get(vecino, math.inf)
+                 for vecino in self._vecinos(celda)),
+                default=math.inf
+            )
+        
+        self.en_cola.pop(celda, None)
+        if self.g.get(celda, math.inf) != self.rhs.get(celda, math.inf):
+            self._insertar(celda)
+    
+    # ========== ALGORITMO ==========
+    
+    def calcular_camino_mas_corto(self) -> int:
+        """
+        Procesa la cola hasta que el camino desde la posición actual es
+        consistente.
+        
+        Returns:
+            Número de nodos expandidos en esta llamada
+        """
+        expandidos = 0
+        
+        while True:
+            clave_tope, celda = self._tope()
+            g_inicio = self.g.get(self.inicio, math.inf)
+            rhs_inicio = self.rhs.get(self.inicio, math.inf)
+            if celda < 0 or (clave_tope >= self._clave(self.inicio) and rhs_inicio == g_inicio):
+                break
+            
+            heapq.heappop(self.cola)
+            del self.en_cola[celda]
+            expandidos += 1
+            
+            clave_nueva = self._clave(celda)
+            g_celda = self.g.get(celda, math.inf)
+            rhs_celda = self.rhs.get(celda, math.inf)
+            
+            if clave_tope < clave_nueva:
+                self._insertar(celda)
+            elif g_celda > rhs_celda:
+                self.g[celda] = rhs_celda
+                for vecino in self._vecinos(celda):
+                    self._actualizar_vertice(vecino)
+            else:
+                self.g[celda] = math.inf
+                self._actualizar_vertice(celda)
+                for vecino in self._vecinos(celda):
+                    self._actualizar_vertice(vecino)
+        
+        self.nodos_expandidos = expandidos
+        return expandidos
+    
+    def mover_a(self, posicion: Tuple[int, int]):
+        """
+        Actualiza la posición del agente (por ejemplo, tras avanzar por la ruta).
+        
+        Args:
+            posicion: Nueva posición (fila, columna)
+        """
+        self.inicio = posicion[0] * self.columnas + posicion[1]
+    
+    def actualizar_celdas(
+        self,
+        bloquear: Iterable[Tuple[int, int]] = (),
+        liberar: Iterable[Tuple[int, int]] = ()
+    ) -> int:
+        """
+        Aplica cambios de obstáculos y repara el camino restante.
+        
+        Args:
+            bloquear: Posiciones que pasan a estar bloqueadas
+            liberar: Posiciones que vuelven a estar libres
+            
+        Returns:
+            Número de nodos expandidos para reparar el camino
+        """
+        cambiadas = []
+        for posiciones, estado in ((bloquear, 1), (liberar, 0)):
+            for fila, columna in posiciones:
+                if not (0 <= fila < self.filas and 0 <= columna < self.columnas):
+                    continue
+                celda = fila * self.columnas + columna
+                if self.bloqueado[celda] != estado:
+                    self.bloqueado[celda] = estado
+                    cambiadas.append(celda)
+        
+        if not cambiadas:
+            self.nodos_expandidos = 0
+            return 0
+        
+        # Ajuste de claves por el desplazamiento del agente
+        self.km += self._heuristica(self.ultimo_inicio, self.inicio)
+        self.ultimo_inicio = self.inicio
+        
+        # Cambian los costos de las aristas que entran a cada celda modificada
+        for celda in cambiadas:
+            for vecino in self._vecinos(celda):
+                self._actualizar_vertice(vecino)
+        
+        return self.calcular_camino_mas_corto()
+    
+    def camino_restante(self) -> Tuple[List[Tuple[int, int]], float]:
+        """
+        Extrae el camino desde la posición actual hasta el objetivo
+        siguiendo el vecino de menor costo.
+        
+        Returns:
+            Tupla (camino, costo) con el mismo formato que BusquedaAEstrella.buscar
+        """
+        costo = self.g.get(self.inicio, math.inf)
+        if costo == math.inf:
+            return [], float('inf')
+        
+        camino = [divmod(self.inicio, self.columnas)]
+        actual = self.inicio
+        
+        while actual != self.objetivo:
+            actual = min(
+                self._vecinos(actual),
+                key=lambda vecino: self._costo(actual, vecino) + self.g.get(vecino, math.inf)
+            )
+            camino.append(divmod(actual, self.columnas))
+        
+        return camino, costo
+
+
+class BusquedaCostoUniforme:
+    """
+    Implementación de Búsqueda de Costo Uniforme (Dijkstra).
+    Encuentra el nodo más cercano que cumple una condición.
+    """
+    
+    def __init__(self):
+        """Inicializa el algoritmo"""
+        self.camino_encontrado = []
+        self.nodos_expandidos = 0
+        self.costo_total = 0
+    
+    def buscar_mas_cercano(
+        self,
+        inicio: Tuple[int, int],
+        objetivos: List[Tuple[int, int]],
+        dimensiones: Tuple[int, int],
+        obstaculos: Set[Tuple[int, int]],
+        grid: Optional[GridOcupacion] = None
+    ) -> Tuple[Tuple[int, int], List[Tuple[int, int]], float]:
+        """
+        Busca el objetivo más cercano desde la posición inicial.
+        
+        Args:
+            inicio: Posición inicial (fila, columna)
+            objetivos: Lista de posiciones objetivo posibles
+            dimensiones: Dimensiones del mapa (filas, columnas)
+            obstaculos: Conjunto de posiciones bloqueadas
+            grid: Grid precalculado del mapa (si es None se construye
+                  a partir de dimensiones y obstaculos)
+            
+        Returns:
+            Tupla (objetivo_encontrado, camino, costo)
+        """
+        self.nodos_expandidos = 0
+        
+        if grid is None:
+            grid = GridOcupacion(dimensiones[0], dimensiones[1], obstaculos)
+        
+        if not grid.en_limites(inicio):
+            return None, [], float('inf')
+        
+        # Conjunto de objetivos (como índices) para búsqueda rápida
+        objetivos_set = {grid.indice(obj) for obj in objetivos if grid.en_limites(obj)}
+        
+        vecinos = grid.vecinos
+        celda_inicio = grid.indice(inicio)
+        
+        # Cola de prioridad: (costo, celda)
+        frontera = [(0, celda_inicio)]
+        
+        costos = {celda_inicio: 0}
+        padres = {celda_inicio: -1}
+        explorados = bytearray(grid.total_celdas)
+        
+        while frontera:
+            costo_actual, actual = heapq.heappop(frontera)
+            
+            # Si ya fue explorado con menor costo, saltar
+            if explorados[actual]:
+                continue
+            
+            # Verificar si es uno de los objetivos
+            if actual in objetivos_set:
+                self.camino_encontrado = grid.reconstruir_camino(padres, actual)
+                self.costo_total = costo_actual
+                return grid.posicion(actual), self.camino_encontrado, self.costo_total
+            
+            # Marcar como explorado
+            explorados[actual] = 1
+            self.nodos_expandidos += 1
+            
+            g_tentativo = costo_actual + 1
+            
+            for vecino in vecinos[actual]:
+                if explorados[vecino]:
+                    continue
+                
+                # Agregar o actualizar en frontera
+                if g_tentativo < costos.get(vecino, math.inf):
+                    costos[vecino] = g_tentativo
+                    padres[vecino] = actual
+                    heapq.heappush(frontera, (g_tentativo, vecino))
+        
+        # No se encontró ningún objetivo
+        return None, [], float('inf')
+
+
+class OptimizadorOrdenRecoleccion:
+    """
+    Optimizador del orden de recolección (TSP de camino abierto).
+    
+    Dado un origen, un conjunto de paradas y el costo de terminar en el
+    cajero más cercano desde cada parada, busca el orden de visita que
+    minimiza la distancia total recorrida.
+    - Exacto (Held-Karp) para listas pequeñas
+    - Heurístico (vecino más cercano + 2-opt + Or-opt) para listas grandes
+    """
+    
+    def __init__(self, max_paradas_exacto: int = 10, max_pasadas_mejora: int = 50):
+        """
+        Inicializa el optimizador.
+        
+        Args:
+            max_paradas_exacto: Máximo de paradas para usar Held-Karp
+            max_pasadas_mejora: Máximo de pasadas de mejora local (2-opt/Or-opt)
+        """
+        self.max_paradas_exacto = max_paradas_exacto
+        self.max_pasadas_mejora = max_pasadas_mejora
+        self.metodo_utilizado = None
+    
+    def costo_orden(
+        self,
+        orden: List[int],
+        distancias: List[List[float]],
+        costo_final: List[float]
+    ) -> float:
+        """
+        Calcula el costo de recorrer las paradas en un orden dado.
+        
+        Args:
+            orden: Índices de paradas (1..n) en orden de visita
+            distancias: Matriz de distancias; el nodo 0 es el origen
+            costo_final: Costo de terminar en cada nodo (ir al cajero más cercano)
+            
+        Returns:
+            Distancia total desde el origen hasta el cajero final
+        """
+        costo = 0
+        anterior = 0
+        for parada in orden:
+            costo += distancias[anterior][parada]
+            anterior = parada
+        return costo + costo_final[anterior]
+    
+    def optimizar(
+        self,
+        distancias: List[List[float]],
+        costo_final: List[float]
+    ) -> Tuple[List[int], float]:
+        """
+        Calcula el mejor orden de visita de las paradas.
+        
+        Args:
+            distancias: Matriz (n+1)x(n+1) de distancias; el nodo 0 es el origen
+                        y los nodos 1..n son las paradas
+            costo_final: Lista de n+1 costos de terminar en cada nodo
+            
+        Returns:
+            Tupla (orden, costo) donde orden es la lista de paradas 1..n
+        """
+        n = len(distancias) - 1
+        
+        if n <= 0:
+            self.metodo_utilizado = "trivial"
+            return [], costo_final[0]
+        
+        if n <= self.max_paradas_exacto:
+            self.metodo_utilizado = "held_karp"
+            return self._held_karp(distancias, costo_final)
+        
+        self.metodo_utilizado = "heuristica"
+        orden = self._vecino_mas_cercano(distancias)
+        orden = self._mejorar_local(orden, distancias, costo_final)
+        return orden, self.costo_orden(orden, distancias, costo_final)
+    
+    def _held_karp(
+        self,
+        distancias: List[List[float]],
+        costo_final: List[float]
+    ) -> Tuple[List[int], float]:
+        """
+        Programación dinámica de Held-Karp sobre subconjuntos de paradas.
+        costos[mascara][j] es el costo mínimo de salir del origen, visitar
+        las paradas de la máscara y terminar en la parada j+1.
+        """
+        n = len(distancias) - 1
+        infinito = float('inf')
+        total_mascaras = 1 << n
+        
+        costos = [[infinito] * n for _ in range(total_mascaras)]
+        padres = [[-1] * n for _ in range(total_mascaras)]
+        
+        for j in range(n):
+            costos[1 << j][j] = distancias[0][j + 1]
+        
+        for mascara in range(1, total_mascaras):
+            fila_costos = costos[mascara]
+            for j in range(n):
+                costo_j = fila_costos[j]
+                if costo_j == infinito:
+                    continue
+                distancias_j = distancias[j + 1]
+                for k in range(n):
+                    if mascara & (1 << k):
+                        continue
+                    siguiente = mascara | (1 << k)
+                    nuevo = costo_j + distancias_j[k + 1]
+                    if nuevo < costos[siguiente][k]:
+                        costos[siguiente][k] = nuevo
+                        padres[siguiente][k] = j
+        
+        # Elegir la última parada sumando el tramo hasta el cajero
+        completa = total_mascaras - 1
+        mejor_costo = infinito
+        ultima = -1
+        for j in range(n):
+            costo = costos[completa][j] + costo_final[j + 1]
+            if costo < mejor_costo:
+                mejor_costo = costo
+                ultima = j
+        
+        if ultima < 0:
+            # Paradas inalcanzables: conservar el orden original
+            orden = list(range(1, n + 1))
+            return orden, self.costo_orden(orden, distancias, costo_final)
+        
+        # Reconstruir orden
+        orden = []
+        mascara = completa
+        actual = ultima
+        while actual >= 0:
+            orden.append(actual + 1)
+            anterior = padres[mascara][actual]
+            mascara &= ~(1 << actual)
+            actual = anterior
+        
+        orden.reverse()
+        return orden, mejor_costo
+    
+    def _vecino_mas_cercano(self, distancias: List[List[float]]) -> List[int]:
+        """Construye un orden inicial visitando siempre la parada más cercana"""
+        pendientes = set(range(1, len(distancias)))
+        orden = []
+        actual = 0
+        
+        while pendientes:
+            siguiente = min(pendientes, key=lambda p: (distancias[actual][p], p))
+            orden.append(siguiente)
+            pendientes.remove(siguiente)
+            actual = siguiente
+        
+        return orden
+    
+    def _mejorar_local(
+        self,
+        orden: List[int],
+        distancias: List[List[float]],
+        costo_final: List[float]
+    ) -> List[int]:
+        """
+        Mejora el orden con 2-opt (invertir tramos) y Or-opt (mover
+        segmentos de 1 a 3 paradas) hasta no encontrar mejoras.
+        """
+        def tramo(a: int, b: Optional[int]) -> float:
+            # b None representa el final del recorrido (ir al cajero)
+            return costo_final[a] if b is None else distancias[a][b]
+        
+        n = len(orden)
+        
+        for _ in range(self.max_pasadas_mejora):
+            mejorado = False
+            
+            # 2-opt: invertir orden[i..j]
+            for i in range(n - 1):
+                anterior = orden[i - 1] if i > 0 else 0
+                for j in range(i + 1, n):
+                    siguiente = orden[j + 1] if j + 1 < n else None
+                    delta = (
+                        tramo(anterior, orden[j]) + tramo(orden[i], siguiente)
+                        - tramo(anterior, orden[i]) - tramo(orden[j], siguiente)
+                    )
+                    if delta < -1e-9:
+                        orden[i:j + 1] = reversed(orden[i:j + 1])
+                        mejorado = True
+            
+            # Or-opt: mover un segmento de 1 a 3 paradas a otra posición
+            costo_actual = self.costo_orden(orden, distancias, costo_final)
+            for longitud in (1, 2, 3):
+                for i in range(n - longitud + 1):
+                    segmento = orden[i:i + longitud]
+                    resto = orden[:i] + orden[i + longitud:]
+                    for k in range(len(resto) + 1):
+                        if k == i:
+                            continue
+                        candidato = resto[:k] + segmento + resto[k:]
+                        costo = self.costo_orden(candidato, distancias, costo_final)
+                        if costo < costo_actual - 1e-9:
+                            orden = candidato
+                            costo_actual = costo
+                            mejorado = True
+                            break
+            
+            if not mejorado:
+                break
+        
+        return orden
+
+
+class CatalogoProductos:
+    """
+    Catálogo de productos en arreglos paralelos para el Temple Simulado.
+    
+    Cada producto se identifica por su posición i en el catálogo; precio
+    (en centavos) e índice de categoría se guardan en listas planas para
+    que los movimientos trabajen con enteros y no con diccionarios.
+    
+    Además precalcula índices para catálogos grandes (decenas de miles de
+    productos), de modo que ningún movimiento recorra el catálogo:
+    - orden_precio / precios_ordenados: productos ordenados por precio
+    - sumas_prefijo: suma de los k productos más baratos
+    - productos_por_categoria / precios_por_categoria: productos de cada
+      categoría ordenados por precio
+    - inicio_cubeta: primera posición en orden de precio de cada cubeta de
+      ancho_cubeta centavos, para ubicar un precio en O(1) + O(log cubeta)
+      
+    La lista de productos se trata como inmutable (ver RegistroCatalogos).
+    """
+    
+    # Número aproximado de cubetas de precio
+    NUM_CUBETAS = 1024
+    
+    def __init__(self, productos: List[Dict]):
+        """
+        Construye los arreglos a partir de la lista de productos.
+        
+        Args:
+            productos: Lista de productos (id, precio, categoria, ...)
+        """
+        self.productos = productos if isinstance(productos, list) else list(productos)
+        self.precios = [int(round(p['precio'] * 100)) for p in self.productos]
+        
+        self.nombres_categorias = []
+        indice_categoria = {}
+        self.categorias = []
+        for producto in self.productos:
+            categoria = producto['categoria']
+            if categoria not in indice_categoria:
+                indice_categoria[categoria] = len(self.nombres_categorias)
+                self.nombres_categorias.append(categoria)
+            self.categorias.append(indice_categoria[categoria])
+        
+        self.indice_por_id = {p['id']: i for i, p in enumerate(self.productos)}
+    
+        # Orden por precio y sumas prefijo
+        self.orden_precio = sorted(range(len(self.productos)), key=self.precios.__getitem__)
+        self.precios_ordenados = [self.precios[i] for i in self.orden_precio]
+        self.sumas_prefijo = [0] + list(itertools.accumulate(self.precios_ordenados))
+        
+        # Productos por categoría (cada cubeta ordenada por precio, con sus precios)
+        self.productos_por_categoria = [[] for _ in self.nombres_categorias]
+        self.precios_por_categoria = [[] for _ in self.nombres_categorias]
+        for i in self.orden_precio:
+            self.productos_por_categoria[self.categorias[i]].append(i)
+            self.precios_por_categoria[self.categorias[i]].append(self.precios[i])
+        
+        # Cubetas de precio: inicio_cubeta[b] = primera posición con precio >= b * ancho_cubeta
+        precio_maximo = self.precios_ordenados[-1] if self.productos else 0
+        self.ancho_cubeta = max(1, precio_maximo // self.NUM_CUBETAS + 1)
+        self.inicio_cubeta = []
+        posicion = 0
+        for cubeta in range(precio_maximo // self.ancho_cubeta + 2):
+            limite = cubeta * self.ancho_cubeta
+            while posicion < len(self.precios_ordenados) and self.precios_ordenados[posicion] < limite:
+                posicion += 1
+            self.inicio_cubeta.append(posicion)
+    
+    def __len__(self) -> int:
+        return len(self.productos)
+    
+    def posicion_precio(self, centavos: int) -> int:
+        """
+        Primera posición en orden de precio con precio >= centavos.
+        
+        Args:
+            centavos: Precio en centavos
+            
+        Returns:
+            Posición en orden_precio (len(catálogo) si todos son más baratos)
+        """
+        if centavos <= 0:
+            return 0
+        
+        cubeta = centavos // self.ancho_cubeta
+        if cubeta + 1 >= len(self.inicio_cubeta):
+            return len(self.precios_ordenados)
+        
+        return bisect.bisect_left(
+            self.precios_ordenados, centavos, self.inicio_cubeta[cubeta], self.inicio_cubeta[cubeta + 1]
+        )
+    
+    def rango_precios(self, minimo: int, maximo: int) -> Tuple[int, int]:
+        """
+        Posiciones en orden de precio de los productos con precio en [minimo, maximo].
+        
+        Args:
+            minimo: Precio mínimo en centavos
+            maximo: Precio máximo en centavos
+            
+        Returns:
+            Tupla (inicio, fin) para orden_precio[inicio:fin]
+        """
+        return self.posicion_precio(minimo), self.posicion_precio(maximo + 1)
+    
+    def max_productos_distintos(self, presupuesto_centavos: int) -> int:
+        """
+        Máximo de productos distintos (una unidad de cada uno) que caben en
+        un presupuesto, con las sumas prefijo de los más baratos.
+        
+        Args:
+            presupuesto_centavos: Presupuesto en centavos
+            
+        Returns:
+            Número de productos
+        """
+        return bisect.bisect_right(self.sumas_prefijo, presupuesto_centavos) - 1
+
+
+class RegistroCatalogos:
+    """
+    Registro de catálogos indexados, uno por inventario de sucursal.
+    
+    Los índices de CatalogoProductos se construyen una sola vez por lista
+    de productos (identificada por el propio objeto lista, o por la versión
+    del inventario si se indica) y se reutilizan en todas las ejecuciones
+    del Temple Simulado. Acotado con política LRU.
+    """
+    
+    def __init__(self, capacidad: int = 32):
+        """
+        Inicializa el registro vacío.
+        
+        Args:
+            capacidad: Número máximo de entradas (cada catálogo ocupa una o
+                       dos: por lista y por versión)
+        """
+        self.capacidad = capacidad
+        self._catalogos = OrderedDict()  # {("id", id(lista)) o ("version", hash): CatalogoProductos}
+        self._lock = threading.Lock()
+        self.construcciones = 0
+    
+    def obtener(self, productos: List[Dict], version: Optional[str] = None) -> CatalogoProductos:
+        """
+        Obtiene el catálogo indexado de una lista de productos, construyéndolo
+        si no existe.
+        
+        Args:
+            productos: Lista de productos (no debe modificarse después)
+            version: Hash del inventario (permite compartir el catálogo entre
+                     listas con el mismo contenido; ver catalogo.productos)
+                     
+        Returns:
+            Catálogo indexado
+        """
+        clave_identidad = ("id", id(productos))
+        
+        with self._lock:
+            # El catálogo guarda la lista, así que su id no se reutiliza mientras esté aquí
+            catalogo = self._catalogos.get(clave_identidad)
+            if catalogo is not None and catalogo.productos is productos:
+                self._catalogos.move_to_end(clave_identidad)
+                return catalogo
+            
+            if version is not None:
+                catalogo = self._catalogos.get(("version", version))
+                if catalogo is not None:
+                    self._catalogos.move_to_end(("version", version))
+                    return catalogo
+        
+        catalogo = CatalogoProductos(productos)
+        
+        with self._lock:
+            self.construcciones += 1
+            if version is not None:
+                self._catalogos[("version", version)] = catalogo
+            self._catalogos[("id", id(catalogo.productos))] = catalogo
+            
+            while len(self._catalogos) > self.capacidad:
+                self._catalogos.popitem(last=False)
+        
+        return catalogo
+
+
+class EstadoSolucion:
+    """
+    Solución del Temple Simulado representada sobre el catálogo.
+    
+    - cantidades[i]: unidades del producto i (solo productos en la lista)
+    - usados: índices de productos en la lista, con su posición en
+      pos_usado para quitarlos en O(1) intercambiando con el último
+    - agregados: total en centavos (exacto tras miles de movimientos),
+      suma de repeticiones y productos por categoría
+    
+    El estado solo guarda los productos de la lista (diccionarios), por lo
+    que crearlo no depende del tamaño del catálogo. Agregar, quitar y
+    reemplazar son O(1), no se copia la solución en cada iteración y el
+    costo de un movimiento se calcula en O(1) a partir de los agregados,
+    modificando el estado solo cuando se acepta.
+    
+    Movimientos: tuplas (operacion, producto, producto_nuevo) con índices
+    del catálogo y operacion en 'agregar', 'quitar', 'aumentar',
+    'disminuir' o 'reemplazar' (-1 en los índices que no aplican).
+    """
+    
+    def __init__(self, catalogo: CatalogoProductos, solucion: Iterable[Tuple[Dict, int]] = ()):
+        """
+        Construye el estado a partir de una solución.
+        
+        Args:
+            catalogo: Catálogo en arreglos
+            solucion: Lista de tuplas (producto, cantidad)
+        """
+        self.catalogo = catalogo
+        self.cantidades = {}
+        self.usados = []
+        self.pos_usado = {}
+        
+        self.total_centavos = 0
+        self.repeticion = 0
+        self.por_categoria = {}  # {categoría: productos de la lista en ella}
+        self.num_categorias = 0
+        
+        for producto, cantidad in solucion:
+            self._agregar(catalogo.indice_por_id[producto['id']], cantidad)
+    
+    def a_lista(self) -> List[Tuple[Dict, int]]:
+        """
+        Convierte el estado a la lista de tuplas (producto, cantidad).
+        
+        Returns:
+            Solución en el formato que usa el agente comprador
+        """
+        productos = self.catalogo.productos
+        return [(productos[i], self.cantidades[i]) for i in self.usados]
+    
+    def agregados(self) -> Tuple[int, int, int, int]:
+        """
+        Agregados actuales.
+        
+        Returns:
+            Tupla (total_centavos, productos distintos, repeticion, categorías)
+        """
+        return self.total_centavos, len(self.usados), self.repeticion, self.num_categorias
+    
+    def agregados_tras(self, movimiento: Tuple[str, int, int]) -> Tuple[int, int, int, int]:
+        """
+        Agregados que tendría la solución tras aplicar un movimiento (O(1)).
+        
+        Args:
+            movimiento: Tupla (operacion, producto, producto_nuevo)
+            
+        Returns:
+            Tupla (total_centavos, productos distintos, repeticion, categorías)
+        """
+        total, distintos, repeticion, categorias = self.agregados()
+        operacion, i, nuevo = movimiento
+        precios = self.catalogo.precios
+        categoria_de = self.catalogo.categorias
+        por_categoria = self.por_categoria
+        
+        if operacion == 'agregar':
+            total += precios[nuevo]
+            distintos += 1
+            if categoria_de[nuevo] not in por_categoria:
+                categorias += 1
+            return total, distintos, repeticion, categorias
+        
+        cantidad = self.cantidades[i]
+        
+        if operacion == 'aumentar':
+            total += precios[i]
+            repeticion += 1
+        elif operacion == 'disminuir' and cantidad > 1:
+            total -= precios[i]
+            repeticion -= 1
+        elif operacion == 'reemplazar':
+            total += (precios[nuevo] - precios[i]) * cantidad
+            if categoria_de[nuevo] != categoria_de[i]:
+                if por_categoria[categoria_de[i]] == 1:
+                    categorias -= 1
+                if categoria_de[nuevo] not in por_categoria:
+                    categorias += 1
+        else:
+            # 'quitar' o 'disminuir' con cantidad 1: el producto sale de la lista
+            total -= precios[i] * cantidad
+            distintos -= 1
+            repeticion -= cantidad - 1
+            if por_categoria[categoria_de[i]] == 1:
+                categorias -= 1
+        
+        return total, distintos, repeticion, categorias
+    
+    def aplicar(self, movimiento: Tuple[str, int, int]):
+        """
+        Aplica un movimiento aceptado y actualiza los agregados.
+        
+        Args:
+            movimiento: Tupla (operacion, producto, producto_nuevo)
+        """
+        operacion, i, nuevo = movimiento
+        
+        if operacion == 'agregar':
+            self._agregar(nuevo, 1)
+            return
+        
+        cantidad = self.cantidades[i]
+        
+        if operacion == 'aumentar':
+            self.cantidades[i] = cantidad + 1
+            self.total_centavos += self.catalogo.precios[i]
+            self.repeticion += 1
+        elif operacion == 'disminuir' and cantidad > 1:
+            self.cantidades[i] = cantidad - 1
+            self.total_centavos -= self.catalogo.precios[i]
+            self.repeticion -= 1
+        elif operacion == 'reemplazar':
+            self._quitar(i)
+            self._agregar(nuevo, cantidad)
+        else:
+            self._quitar(i)
+    
+    def _agregar(self, i: int, cantidad: int):
+        """Agrega el producto i a la lista con la cantidad indicada"""
+        self.pos_usado[i] = len(self.usados)
+        self.usados.append(i)
+        self.cantidades[i] = cantidad
+        
+        self.total_centavos += self.catalogo.precios[i] * cantidad
+        self.repeticion += cantidad - 1
+        categoria = self.catalogo.categorias[i]
+        en_categoria = self.por_categoria.get(categoria, 0)
+        if en_categoria == 0:
+            self.num_categorias += 1
+        self.por_categoria[categoria] = en_categoria + 1
+    
+    def _quitar(self, i: int):
+        """Quita el producto i de la lista"""
+        # Quitar de usados intercambiando con el último
+        pos = self.pos_usado.pop(i)
+        ultimo = self.usados.pop()
+        if ultimo != i:
+            self.usados[pos] = ultimo
+            self.pos_usado[ultimo] = pos
+        
+        cantidad = self.cantidades.pop(i)
+        self.total_centavos -= self.catalogo.precios[i] * cantidad
+        self.repeticion -= cantidad - 1
+        categoria = self.catalogo.categorias[i]
+        en_categoria = self.por_categoria[categoria] - 1
+        if en_categoria == 0:
+            del self.por_categoria[categoria]
+            self.num_categorias -= 1
+        else:
+            self.por_categoria[categoria] = en_categoria
+
+
+class TempleSimulado:
+    """
+    Implementación del algoritmo de Temple Simulado para optimización de listas de compras.
+    Genera listas que maximizan variedad y se ajustan al presupuesto.
+    """
+    
+    OPERACIONES = ('agregar', 'quitar', 'aumentar', 'disminuir', 'reemplazar')
+    
+    # Por debajo de este número de productos distintos se penaliza la variedad
+    MIN_PRODUCTOS_VARIEDAD = 5
+    
+    # Con límite de tiempo, el reloj se consulta cada tantas iteraciones
+    ITERACIONES_ENTRE_RELOJ = 32
+    
+    # Probabilidad de que 'agregar'/'reemplazar' elijan un producto según
+    # la diferencia con el presupuesto (en lugar de uno al azar)
+    PROBABILIDAD_DIRIGIDA = 0.5
+    
+    # Intentos de muestreo para encontrar un producto que no esté en la lista
+    MAX_INTENTOS_LIBRE = 8
+    
+    # Generadores de solución inicial: "aleatorio" (generar_solucion_inicial)
+    # o "voraz" (generar_solucion_voraz)
+    SEMBRADORES = ("aleatorio", "voraz")
+    
+    # Sembrado voraz: candidatos entre los que se elige al azar por categoría
+    # y posiciones revisadas a cada lado del precio buscado al rellenar
+    CANDIDATOS_POR_CATEGORIA = 3
+    VENTANA_RELLENO = 8
+    
+    # Muestras de telemetría guardadas por ejecución (las más recientes)
+    MAX_MUESTRAS_TRAZA = 512
+    
+    def __init__(
+        self,
+        temperatura_inicial: float = 1000.0,
+        temperatura_minima: float = 1.0,
+        factor_enfriamiento: float = 0.95,
+        iteraciones_por_temperatura: int = 100,
+        semilla: Optional[int] = None,
+        sembrador: str = "aleatorio",
+        registrar_traza: bool = False,
+        observador: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Inicializa el algoritmo de Temple Simulado.
+        
+        Args:
+            temperatura_inicial: Temperatura inicial
+            temperatura_minima: Temperatura mínima de parada
+            factor_enfriamiento: Factor de enfriamiento (0-1)
+            iteraciones_por_temperatura: Iteraciones por nivel de temperatura
+            semilla: Semilla del generador aleatorio propio (None = no determinista)
+            sembrador: Generador de la solución inicial (ver SEMBRADORES)
+            registrar_traza: Si se guarda una muestra por nivel de temperatura en traza
+            observador: Función llamada con cada muestra mientras se ejecuta
+                        (implica registrar_traza)
+        """
+        if sembrador not in self.SEMBRADORES:
+            raise ValueError(f"Sembrador desconocido: {sembrador} "
+                             f"(disponibles: {', '.join(self.SEMBRADORES)})")
+        
+        self.sembrador = sembrador
+        self.temperatura_inicial = temperatura_inicial
+        self.temperatura_minima = temperatura_minima
+        self.factor_enfriamiento = factor_enfriamiento
+        self.iteraciones_por_temperatura = iteraciones_por_temperatura
+        self.rng = random.Random(semilla)
+        self.mejor_costo = float('inf')
+        self.iteraciones_totales = 0
+        self.en_banda = False  # Si la mejor solución está en la banda y sin penalización de variedad
+        self.motivo_parada = None  # "enfriamiento", "estancamiento", "en_banda" o "limite_tiempo"
+        
+        # Telemetría: muestras por nivel de temperatura de la última ejecución
+        self.registrar_traza = registrar_traza or observador is not None
+        self.observador = observador
+        self.traza = deque(maxlen=self.MAX_MUESTRAS_TRAZA)
+    
+    def generar_solucion_inicial(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float
+    ) -> List[Tuple[Dict, int]]:
+        """
+        Genera una solución inicial aleatoria válida.
+        
+        Muestrea productos al azar entre los que caben en el presupuesto
+        restante (con el índice por precio del catálogo), una unidad de
+        cada uno, sin recorrer ni barajar todo el catálogo.
+        
+        Args:
+            productos: Lista de productos disponibles
+            presupuesto_objetivo: Presupuesto objetivo
+            
+        Returns:
+            Lista de tuplas (producto, cantidad)
+        """
+        catalogo = registro_catalogos_global.obtener(productos)
+        objetivo = int(round(presupuesto_objetivo * 100))
+        
+        solucion = []
+        total = 0
+        productos_usados = set()
+        rechazos = 0
+        
+        # Agregar productos hasta acercarse al presupuesto
+        while total < objetivo * 0.95 and rechazos < self.MAX_INTENTOS_LIBRE:
+            # Productos con precio <= presupuesto restante
+            caben = catalogo.posicion_precio(objetivo - total + 1)
+            if caben == 0:
+                break
+            
+            i = catalogo.orden_precio[self.rng.randrange(caben)]
+            if i in productos_usados:
+                rechazos += 1
+                continue
+            
+            # Preferir cantidad 1 para maximizar variedad
+            solucion.append((catalogo.productos[i], 1))
+            total += catalogo.precios[i]
+            productos_usados.add(i)
+            rechazos = 0
+        
+        return solucion
+    
+    def generar_solucion_voraz(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float,
+        tipo_lista: str = "exacta"
+    ) -> List[Tuple[Dict, int]]:
+        """
+        Genera una solución inicial constructiva, dentro o cerca de la banda
+        y con categorías variadas, usando los índices del catálogo.
+        
+        1. Ronda por categorías (en orden aleatorio): de cada una se toma un
+           producto con precio cercano, sin pasarse, a su cuota del
+           presupuesto (restante / categorías por cubrir). Se cubren tantas
+           categorías como productos distintos caben según las sumas prefijo.
+        2. Relleno: mientras el total no llegue a la banda, se agrega el
+           producto libre cuyo precio mejor cubre la diferencia con el
+           centro de la banda sin superar su máximo.
+           
+        Args:
+            productos: Lista de productos disponibles
+            presupuesto_objetivo: Presupuesto objetivo
+            tipo_lista: Tipo de lista ("exacta", "superior", "inferior")
+            
+        Returns:
+            Lista de tuplas (producto, cantidad)
+        """
+        catalogo = registro_catalogos_global.obtener(productos)
+        minimo, maximo = self._banda_centavos(presupuesto_objetivo, tipo_lista)
+        centro = (minimo + maximo) // 2
+        
+        solucion = []
+        usados = set()
+        total = 0
+        
+        # 1. Ronda por categorías
+        categorias = list(range(len(catalogo.nombres_categorias)))
+        self.rng.shuffle(categorias)
+        por_cubrir = min(len(categorias), catalogo.max_productos_distintos(centro))
+        
+        for categoria in categorias:
+            if por_cubrir <= 0:
+                break
+            
+            cuota = min((centro - total) // por_cubrir, maximo - total)
+            precios = catalogo.precios_por_categoria[categoria]
+            fin = bisect.bisect_right(precios, cuota)
+            candidatos = [
+                i for i in catalogo.productos_por_categoria[categoria][max(0, fin - 2 * self.CANDIDATOS_POR_CATEGORIA):fin]
+                if i not in usados
+            ][-self.CANDIDATOS_POR_CATEGORIA:]
+            if not candidatos:
+                continue  # ningún producto de la categoría cabe en su cuota
+            
+            i = self.rng.choice(candidatos)
+            solucion.append((catalogo.productos[i], 1))
+            usados.add(i)
+            total += catalogo.precios[i]
+            por_cubrir -= 1
+        
+        # 2. Relleno con el precio que mejor cubre la diferencia
+        while total < minimo:
+            brecha = centro - total
+            disponible = maximo - total
+            posicion = catalogo.posicion_precio(brecha)
+            
+            mejor = -1
+            mejor_diferencia = None
+            for k in range(max(0, posicion - self.VENTANA_RELLENO),
+                           min(len(catalogo), posicion + self.VENTANA_RELLENO)):
+                i = catalogo.orden_precio[k]
+                precio = catalogo.precios_ordenados[k]
+                if precio > disponible or i in usados:
+                    continue
+                diferencia = abs(precio - brecha)
+                if mejor_diferencia is None or diferencia < mejor_diferencia:
+                    mejor, mejor_diferencia = i, diferencia
+            
+            if mejor < 0:
+                break
+            
+            solucion.append((catalogo.productos[mejor], 1))
+            usados.add(mejor)
+            total += catalogo.precios[mejor]
+        
+        return solucion
+    
+    def _registrar_muestra(
+        self,
+        nivel: int,
+        temperatura: float,
+        iteraciones: int,
+        aceptados: int,
+        costo_actual: float,
+        mejor_costo: float,
+        inicio_nivel: float,
+        **extra
+    ):
+        """
+        Guarda la muestra de telemetría de un nivel de temperatura y la
+        entrega al observador. Los costos infinitos se guardan como None.
+        """
+        muestra = {
+            "nivel": nivel,
+            "temperatura": round(temperatura, 6),
+            "iteraciones": iteraciones,
+            "aceptacion": round(aceptados / iteraciones, 4) if iteraciones else 0.0,
+            "costo_actual": round(costo_actual, 4) if math.isfinite(costo_actual) else None,
+            "mejor_costo": round(mejor_costo, 4) if math.isfinite(mejor_costo) else None,
+            "iteraciones_totales": self.iteraciones_totales,
+            "ms": round((time.perf_counter() - inicio_nivel) * 1000, 4),
+            **extra
+        }
+        self.traza.append(muestra)
+        if self.observador is not None:
+            self.observador(muestra)
+    
+    def _solucion_inicial(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float,
+        tipo_lista: str
+    ) -> List[Tuple[Dict, int]]:
+        """Genera la solución inicial con el sembrador configurado"""
+        if self.sembrador == "voraz":
+            return self.generar_solucion_voraz(productos, presupuesto_objetivo, tipo_lista)
+        return self.generar_solucion_inicial(productos, presupuesto_objetivo)
+    
+    def _rango_presupuesto(self, presupuesto_objetivo: float, tipo_lista: str) -> Tuple[float, float]:
+        """
+        Rango de total aceptado según el tipo de lista.
+        
+        Returns:
+            Tupla (objetivo_min, objetivo_max)
+        """
+        if tipo_lista == "exacta":
+            return presupuesto_objetivo * 0.998, presupuesto_objetivo * 1.002
+        elif tipo_lista == "superior":
+            return presupuesto_objetivo * 1.00, presupuesto_objetivo * 1.05
+        elif tipo_lista == "inferior":
+            return presupuesto_objetivo * 0.95, presupuesto_objetivo * 1.00
+        else:
+            return presupuesto_objetivo * 0.95, presupuesto_objetivo * 1.05
+    
+    def _costo_agregados(
+        self,
+        total: float,
+        num_productos_diferentes: int,
+        repeticion: int,
+        num_categorias: int,
+        objetivo_min: float,
+        objetivo_max: float
+    ) -> float:
+        """
+        Función de costo expresada sobre los agregados de una solución.
+        
+        Args:
+            total: Suma de precio * cantidad
+            num_productos_diferentes: Número de productos distintos
+            repeticion: Suma de (cantidad - 1) de todos los productos
+            num_categorias: Número de categorías distintas
+            objetivo_min: Límite inferior del rango de presupuesto
+            objetivo_max: Límite superior del rango de presupuesto
+            
+        Returns:
+            Valor de costo
+        """
+        if num_productos_diferentes == 0:
+            return float('inf')
+        
+        # 1. Penalización por estar fuera del rango (peso muy alto)
+        penalizacion_presupuesto = 0.0
+        if total < objetivo_min:
+            penalizacion_presupuesto = (objetivo_min - total) ** 2 * 100
+        elif total > objetivo_max:
             penalizacion_presupuesto = (total - objetivo_max) ** 2 * 100
         
         # 2. Penalización por baja variedad (queremos muchos productos diferentes)
-        num_productos_diferentes = len(solucion)
         penalizacion_variedad = 0.0
-        if num_productos_diferentes < 5:
-            penalizacion_variedad = (5 - num_productos_diferentes) * 50
+        if num_productos_diferentes < self.MIN_PRODUCTOS_VARIEDAD:
+            penalizacion_variedad = (self.MIN_PRODUCTOS_VARIEDAD - num_productos_diferentes) * 50
         
-        # 3. Penalización por repetición de productos
-        penalizacion_repeticion = 0.0
-        for producto, cantidad in solucion:
-            if cantidad > 1:
-                # Penalizar ligeramente la repetición
-                penalizacion_repeticion += (cantidad - 1) * 10
+        # 3. Penalización ligera por repetición de productos
+        penalizacion_repeticion = repeticion * 10
         
         # 4. Bonificación por diversidad de categorías
-        categorias = set(prod['categoria'] for prod, _ in solucion)
-        bonus_categorias = len(categorias) * (-5)  # Negativo porque queremos minimizar
+        bonus_categorias = num_categorias * (-5)  # Negativo porque queremos minimizar
         
         # Costo total
-        costo = (
+        return (
             penalizacion_presupuesto +
             penalizacion_variedad +
             penalizacion_repeticion +
             bonus_categorias
         )
+    
+    def _banda_centavos(self, presupuesto_objetivo: float, tipo_lista: str) -> Tuple[int, int]:
+        """
+        Banda de presupuesto en centavos enteros (con tolerancia de redondeo).
+        
+        Returns:
+            Tupla (minimo_centavos, maximo_centavos)
+        """
+        objetivo_min, objetivo_max = self._rango_presupuesto(presupuesto_objetivo, tipo_lista)
+        return math.ceil(objetivo_min * 100 - 1e-6), math.floor(objetivo_max * 100 + 1e-6)
+    
+    def esta_en_banda(
+        self,
+        solucion: List[Tuple[Dict, int]],
+        presupuesto_objetivo: float,
+        tipo_lista: str = "exacta"
+    ) -> bool:
+        """
+        Indica si una lista está dentro de la banda de presupuesto y sin
+        penalización de variedad.
+        
+        Args:
+            solucion: Lista de tuplas (producto, cantidad)
+            presupuesto_objetivo: Presupuesto objetivo
+            tipo_lista: Tipo de lista ("exacta", "superior", "inferior")
+            
+        Returns:
+            True si la lista cumple la banda y la variedad mínima
+        """
+        minimo, maximo = self._banda_centavos(presupuesto_objetivo, tipo_lista)
+        total_centavos = sum(round(producto['precio'] * 100) * cantidad for producto, cantidad in solucion)
+        return minimo <= total_centavos <= maximo and len(solucion) >= self.MIN_PRODUCTOS_VARIEDAD
+    
+    @staticmethod
+    def _instante_limite(limite_ms: Optional[float]) -> Optional[float]:
+        """
+        Convierte un límite de tiempo relativo en un instante de perf_counter.
+        
+        Args:
+            limite_ms: Tiempo máximo en milisegundos (None = sin límite)
+            
+        Returns:
+            Instante límite o None
+        """
+        if limite_ms is None:
+            return None
+        if limite_ms <= 0:
+            raise ValueError("limite_ms debe ser mayor que 0")
+        return time.perf_counter() + limite_ms / 1000
+    
+    def calcular_costo(
+        self,
+        solucion: List[Tuple[Dict, int]],
+        presupuesto_objetivo: float,
+        tipo_lista: str = "exacta"
+    ) -> float:
+        """
+        Calcula el costo de una solución (menor es mejor).
+        
+        Args:
+            solucion: Lista de tuplas (producto, cantidad)
+            presupuesto_objetivo: Presupuesto objetivo
+            tipo_lista: Tipo de lista ("exacta", "superior", "inferior")
+            
+        Returns:
+            Valor de costo
+        """
+        if not solucion:
+            return float('inf')
+        
+        objetivo_min, objetivo_max = self._rango_presupuesto(presupuesto_objetivo, tipo_lista)
+        
+        return self._costo_agregados(
+            total=sum(prod['precio'] * cant for prod, cant in solucion),
+            num_productos_diferentes=len(solucion),
+            repeticion=sum(cant - 1 for _, cant in solucion if cant > 1),
+            num_categorias=len(set(prod['categoria'] for prod, _ in solucion)),
+            objetivo_min=objetivo_min,
+            objetivo_max=objetivo_max
+        )
+        
+    def _elegir_libre(self, estado: EstadoSolucion, inicio: int = 0, fin: Optional[int] = None) -> int:
+        """
+        Elige al azar un producto que no esté en la lista entre las
+        posiciones [inicio, fin) del orden por precio (muestreo con rechazo).
+        
+        Args:
+            estado: Estado actual de la solución
+            inicio: Primera posición en orden_precio
+            fin: Posición final exclusiva (None = todo el catálogo)
+            
+        Returns:
+            Índice del producto, o -1 si no se encontró ninguno
+        """
+        catalogo = estado.catalogo
+        if fin is None:
+            fin = len(catalogo)
+        if fin <= inicio:
+            return -1
+        
+        for _ in range(self.MAX_INTENTOS_LIBRE):
+            i = catalogo.orden_precio[self.rng.randrange(inicio, fin)]
+            if i not in estado.cantidades:
+                return i
+        return -1
+    
+    def _elegir_libre_dirigido(self, estado: EstadoSolucion, i: int, brecha: int) -> int:
+        """
+        Elige un producto que acerque el total al presupuesto.
+        
+        - Agregar (i = -1): un producto con precio <= brecha
+        - Reemplazar i: un producto cuyo precio esté entre el de i y el que
+          cerraría la brecha con la cantidad actual de i
+          
+        Args:
+            estado: Estado actual de la solución
+            i: Producto a reemplazar (-1 para agregar)
+            brecha: Centavos que faltan para el centro de la banda (negativo si sobra)
+            
+        Returns:
+            Índice del producto, o -1 si no se encontró ninguno
+        """
+        catalogo = estado.catalogo
+        
+        if i < 0:
+            if brecha <= 0:
+                return -1
+            return self._elegir_libre(estado, 0, catalogo.posicion_precio(brecha + 1))
+        
+        precio = catalogo.precios[i]
+        destino = precio + brecha // estado.cantidades[i]
+        inicio, fin = catalogo.rango_precios(min(precio, destino), max(precio, destino))
+        return self._elegir_libre(estado, inicio, fin)
+    
+    def _proponer_movimiento(
+        self,
+        estado: EstadoSolucion,
+        objetivo_centavos: Optional[int] = None
+    ) -> Optional[Tuple[str, int, int]]:
+        """
+        Elige una modificación aleatoria de la solución sin aplicarla (O(1)
+        respecto al tamaño del catálogo).
+        
+        Args:
+            estado: Estado actual de la solución
+            objetivo_centavos: Centro de la banda de presupuesto; si se
+                               indica, parte de los movimientos 'agregar' y
+                               'reemplazar' se dirigen a cerrar la brecha
+            
+        Returns:
+            Movimiento (operacion, producto, producto_nuevo) o None si la
+            operación elegida no es aplicable
+        """
+        usados = estado.usados
+        operacion = self.rng.choice(self.OPERACIONES)
+        if not usados:
+            operacion = 'agregar'
+        
+        if operacion in ('agregar', 'reemplazar'):
+            i = self.rng.choice(usados) if operacion == 'reemplazar' else -1
+            nuevo = -1
+            if objetivo_centavos is not None and self.rng.random() < self.PROBABILIDAD_DIRIGIDA:
+                nuevo = self._elegir_libre_dirigido(estado, i, objetivo_centavos - estado.total_centavos)
+            if nuevo < 0:
+                nuevo = self._elegir_libre(estado)
+            if nuevo < 0:
+                return None
+            return (operacion, i, nuevo)
+        
+        if operacion == 'quitar' and len(usados) <= 1:
+            return None
         
-        return costo
+        return (operacion, self.rng.choice(usados), -1)
     
     def generar_vecino(
         self,
@@ -499,120 +2273,643 @@ class TempleSimulado:
         if not solucion:
             return self.generar_solucion_inicial(productos, 100.0)
         
-        vecino = [tupla for tupla in solucion]  # Copiar
-        
-        # Elegir operación aleatoria
-        operacion = random.choice(['agregar', 'quitar', 'aumentar', 'disminuir', 'reemplazar'])
-        
-        if operacion == 'agregar' and len(productos) > len(vecino):
-            # Agregar un producto nuevo
-            ids_usados = {prod['id'] for prod, _ in vecino}
-            productos_disponibles = [p for p in productos if p['id'] not in ids_usados]
-            if productos_disponibles:
-                nuevo_producto = random.choice(productos_disponibles)
-                vecino.append((nuevo_producto, 1))
-        
-        elif operacion == 'quitar' and len(vecino) > 1:
-            # Quitar un producto aleatorio
-            idx = random.randint(0, len(vecino) - 1)
-            vecino.pop(idx)
-        
-        elif operacion == 'aumentar' and vecino:
-            # Aumentar cantidad de un producto
-            idx = random.randint(0, len(vecino) - 1)
-            producto, cantidad = vecino[idx]
-            vecino[idx] = (producto, cantidad + 1)
-        
-        elif operacion == 'disminuir' and vecino:
-            # Disminuir cantidad de un producto
-            idx = random.randint(0, len(vecino) - 1)
-            producto, cantidad = vecino[idx]
-            if cantidad > 1:
-                vecino[idx] = (producto, cantidad - 1)
-            else:
-                vecino.pop(idx)
-        
-        elif operacion == 'reemplazar' and vecino:
-            # Reemplazar un producto por otro
-            idx = random.randint(0, len(vecino) - 1)
-            ids_usados = {prod['id'] for prod, _ in vecino}
-            productos_disponibles = [p for p in productos if p['id'] not in ids_usados]
-            if productos_disponibles:
-                nuevo_producto = random.choice(productos_disponibles)
-                _, cantidad = vecino[idx]
-                vecino[idx] = (nuevo_producto, cantidad)
+        estado = EstadoSolucion(registro_catalogos_global.obtener(productos), solucion)
+        movimiento = self._proponer_movimiento(estado)
+        if movimiento is not None:
+            estado.aplicar(movimiento)
         
-        return vecino
+        return estado.a_lista()
     
     def optimizar(
         self,
         productos: List[Dict],
         presupuesto_objetivo: float,
-        tipo_lista: str = "exacta"
+        tipo_lista: str = "exacta",
+        limite_ms: Optional[float] = None
     ) -> Tuple[List[Tuple[Dict, int]], float, int]:
         """
         Ejecuta el algoritmo de Temple Simulado.
         
+        La solución se representa sobre el catálogo en arreglos
+        (EstadoSolucion): proponer, evaluar y aplicar un movimiento es O(1)
+        y la solución solo se modifica si el movimiento se acepta.
+        
+        Con limite_ms el algoritmo es "anytime": devuelve la mejor solución
+        encontrada al agotarse el tiempo y termina antes en cuanto la mejor
+        solución está en la banda sin penalización de variedad. Tras
+        ejecutarse, en_banda y motivo_parada describen el resultado.
+        
+        Con registrar_traza, traza guarda por cada nivel de temperatura la
+        tasa de aceptación, el costo actual y el mejor, y el tiempo empleado.
+        
         Args:
             productos: Lista de productos disponibles
             presupuesto_objetivo: Presupuesto objetivo
             tipo_lista: Tipo de lista a generar
+            limite_ms: Tiempo máximo en milisegundos (None = sin límite)
             
         Returns:
             Tupla (mejor_solucion, mejor_costo, iteraciones)
         """
-        # Generar solución inicial
-        solucion_actual = self.generar_solucion_inicial(productos, presupuesto_objetivo)
-        costo_actual = self.calcular_costo(solucion_actual, presupuesto_objetivo, tipo_lista)
+        instante_limite = self._instante_limite(limite_ms)
+        objetivo_min, objetivo_max = self._rango_presupuesto(presupuesto_objetivo, tipo_lista)
+        minimo_centavos, maximo_centavos = self._banda_centavos(presupuesto_objetivo, tipo_lista)
+        objetivo_centavos = (minimo_centavos + maximo_centavos) // 2
+        
+        def costo_de(agregados):
+            total_centavos, distintos, repeticion, num_categorias = agregados
+            return self._costo_agregados(
+                total_centavos / 100, distintos, repeticion, num_categorias,
+                objetivo_min, objetivo_max
+            )
+        
+        def en_banda_de(agregados):
+            return (minimo_centavos <= agregados[0] <= maximo_centavos
+                    and agregados[1] >= self.MIN_PRODUCTOS_VARIEDAD)
         
-        mejor_solucion = [tupla for tupla in solucion_actual]
+        # Generar solución inicial sobre el catálogo en arreglos
+        catalogo = registro_catalogos_global.obtener(productos)
+        estado = EstadoSolucion(catalogo, self._solucion_inicial(productos, presupuesto_objetivo, tipo_lista))
+        agregados = estado.agregados()
+        costo_actual = costo_de(agregados)
+        
+        mejor_solucion = estado.a_lista()
         mejor_costo = costo_actual
+        self.en_banda = en_banda_de(agregados)
         
         temperatura = self.temperatura_inicial
         self.iteraciones_totales = 0
         iteraciones_sin_mejora = 0
         max_iteraciones_sin_mejora = 50
+        self.traza.clear()
+        nivel = 0
+        
+        # Con límite de tiempo, una solución inicial en banda ya es suficiente
+        self.motivo_parada = "en_banda" if instante_limite is not None and self.en_banda else None
         
-        while temperatura > self.temperatura_minima:
+        while temperatura > self.temperatura_minima and self.motivo_parada is None:
+            inicio_nivel = time.perf_counter() if self.registrar_traza else 0.0
+            iteraciones_previas = self.iteraciones_totales
+            aceptados = 0
+            
             for _ in range(self.iteraciones_por_temperatura):
-                # Generar vecino
-                vecino = self.generar_vecino(solucion_actual, productos)
-                costo_vecino = self.calcular_costo(vecino, presupuesto_objetivo, tipo_lista)
+                # Proponer movimiento y evaluar su costo sin aplicarlo
+                movimiento = self._proponer_movimiento(estado, objetivo_centavos)
                 
-                # Calcular delta
-                delta = costo_vecino - costo_actual
+                if movimiento is None:
+                    # Operación no aplicable: el vecino es la misma solución
+                    delta = 0.0
+                else:
+                    agregados_vecino = estado.agregados_tras(movimiento)
+                    costo_vecino = costo_de(agregados_vecino)
+                    delta = costo_vecino - costo_actual
                 
                 # Decidir si aceptar el vecino
                 if delta < 0:
                     # Mejor solución, siempre aceptar
-                    solucion_actual = vecino
+                    estado.aplicar(movimiento)
                     costo_actual = costo_vecino
                     iteraciones_sin_mejora = 0
+                    aceptados += 1
                     
                     # Actualizar mejor solución global
                     if costo_actual < mejor_costo:
-                        mejor_solucion = [tupla for tupla in solucion_actual]
+                        mejor_solucion = estado.a_lista()
                         mejor_costo = costo_actual
+                        self.en_banda = en_banda_de(agregados_vecino)
+                        if self.en_banda and instante_limite is not None:
+                            self.motivo_parada = "en_banda"
                 else:
                     # Peor solución, aceptar con probabilidad
                     probabilidad = math.exp(-delta / temperatura)
-                    if random.random() < probabilidad:
-                        solucion_actual = vecino
+                    if self.rng.random() < probabilidad and movimiento is not None:
+                        estado.aplicar(movimiento)
                         costo_actual = costo_vecino
+                        aceptados += 1
                 
                 self.iteraciones_totales += 1
                 iteraciones_sin_mejora += 1
                 
-                # Criterio de parada adicional
-                if iteraciones_sin_mejora >= max_iteraciones_sin_mejora:
+                # Criterios de parada adicionales
+                if self.motivo_parada is not None or iteraciones_sin_mejora >= max_iteraciones_sin_mejora:
                     break
+                if (instante_limite is not None
+                        and self.iteraciones_totales % self.ITERACIONES_ENTRE_RELOJ == 0
+                        and time.perf_counter() >= instante_limite):
+                    self.motivo_parada = "limite_tiempo"
+                    break
+            
+            if self.registrar_traza:
+                self._registrar_muestra(
+                    nivel, temperatura, self.iteraciones_totales - iteraciones_previas, aceptados,
+                    costo_actual, mejor_costo, inicio_nivel
+                )
             
             # Enfriar
             temperatura *= self.factor_enfriamiento
+            nivel += 1
             
             # Parada anticipada si no hay mejoras
-            if iteraciones_sin_mejora >= max_iteraciones_sin_mejora:
+            if self.motivo_parada is None and iteraciones_sin_mejora >= max_iteraciones_sin_mejora:
+                self.motivo_parada = "estancamiento"
+        
+        if self.motivo_parada is None:
+            self.motivo_parada = "enfriamiento"
+        
+        self.mejor_costo = mejor_costo
+        return mejor_solucion, mejor_costo, self.iteraciones_totales
+
+
+class TempleMultiCadena(TempleSimulado):
+    """
+    Temple Simulado con varias cadenas simultáneas e intercambio de réplicas.
+    
+    Todas las cadenas parten de soluciones iniciales distintas y se
+    enfrían con el mismo calendario, pero cada una a una temperatura
+    escalada (escalera geométrica: la cadena 0 es la más fría). En cada
+    nivel de temperatura se propone un movimiento por cadena en cada paso
+    y, opcionalmente, cadenas vecinas intercambian sus soluciones con el
+    criterio de Metropolis del tempering paralelo, de modo que las buenas
+    soluciones descienden a las cadenas frías y las malas suben a
+    explorar. Devuelve la mejor solución encontrada entre todas las cadenas.
+    """
+    
+    def __init__(
+        self,
+        temperatura_inicial: float = 1000.0,
+        temperatura_minima: float = 1.0,
+        factor_enfriamiento: float = 0.95,
+        iteraciones_por_temperatura: int = 100,
+        semilla: Optional[int] = None,
+        num_cadenas: int = 8,
+        intercambio_replicas: bool = True,
+        razon_temperaturas: float = 10.0,
+        max_niveles_sin_mejora: int = 6,
+        sembrador: str = "aleatorio",
+        registrar_traza: bool = False,
+        observador: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Inicializa el motor multi-cadena.
+        
+        Args:
+            temperatura_inicial: Temperatura inicial de la cadena más fría
+            temperatura_minima: Temperatura mínima de parada
+            factor_enfriamiento: Factor de enfriamiento por nivel (0-1)
+            iteraciones_por_temperatura: Movimientos por nivel, repartidos
+                                         entre todas las cadenas
+            semilla: Semilla del generador aleatorio propio
+            num_cadenas: Número de cadenas simultáneas (se recorren una tras
+                         otra; ver benchmark_algoritmos.py cadenas)
+            intercambio_replicas: Si se intercambian soluciones entre cadenas
+            razon_temperaturas: Cociente entre la cadena más caliente y la más fría
+            max_niveles_sin_mejora: Niveles sin mejorar la mejor solución
+                                    antes de parar
+            sembrador: Generador de la solución inicial de cada cadena
+            registrar_traza, observador: Telemetría por nivel (ver TempleSimulado);
+                                         el costo actual es el de la cadena más fría
+        """
+        super().__init__(
+            temperatura_inicial, temperatura_minima, factor_enfriamiento,
+            iteraciones_por_temperatura, semilla, sembrador, registrar_traza, observador
+        )
+        if num_cadenas < 1:
+            raise ValueError("num_cadenas debe ser al menos 1")
+        
+        self.num_cadenas = num_cadenas
+        self.intercambio_replicas = intercambio_replicas and num_cadenas > 1
+        self.razon_temperaturas = razon_temperaturas
+        self.max_niveles_sin_mejora = max_niveles_sin_mejora
+        self.intercambios_aceptados = 0
+    
+    def optimizar(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float,
+        tipo_lista: str = "exacta",
+        limite_ms: Optional[float] = None
+    ) -> Tuple[List[Tuple[Dict, int]], float, int]:
+        """
+        Ejecuta todas las cadenas y devuelve la mejor solución.
+        
+        Args:
+            productos: Lista de productos disponibles
+            presupuesto_objetivo: Presupuesto objetivo
+            tipo_lista: Tipo de lista a generar
+            limite_ms: Tiempo máximo en milisegundos (ver TempleSimulado.optimizar)
+            
+        Returns:
+            Tupla (mejor_solucion, mejor_costo, iteraciones), como
+            TempleSimulado.optimizar
+        """
+        instante_limite = self._instante_limite(limite_ms)
+        objetivo_min, objetivo_max = self._rango_presupuesto(presupuesto_objetivo, tipo_lista)
+        minimo_centavos, maximo_centavos = self._banda_centavos(presupuesto_objetivo, tipo_lista)
+        objetivo_centavos = (minimo_centavos + maximo_centavos) // 2
+        
+        def costo_de(agregados):
+            total_centavos, distintos, repeticion, num_categorias = agregados
+            return self._costo_agregados(
+                total_centavos / 100, distintos, repeticion, num_categorias,
+                objetivo_min, objetivo_max
+            )
+        
+        def en_banda_de(agregados):
+            return (minimo_centavos <= agregados[0] <= maximo_centavos
+                    and agregados[1] >= self.MIN_PRODUCTOS_VARIEDAD)
+        
+        # Una solución inicial distinta por cadena
+        catalogo = registro_catalogos_global.obtener(productos)
+        cadenas = [
+            EstadoSolucion(catalogo, self._solucion_inicial(productos, presupuesto_objetivo, tipo_lista))
+            for _ in range(self.num_cadenas)
+        ]
+        costos = [costo_de(estado.agregados()) for estado in cadenas]
+        
+        # Escalera geométrica de temperaturas relativas (cadena 0 = la más fría)
+        if self.intercambio_replicas:
+            escalas = [
+                self.razon_temperaturas ** (k / (self.num_cadenas - 1))
+                for k in range(self.num_cadenas)
+            ]
+        else:
+            escalas = [1.0] * self.num_cadenas
+        
+        mejor_indice = min(range(self.num_cadenas), key=costos.__getitem__)
+        mejor_solucion = cadenas[mejor_indice].a_lista()
+        mejor_costo = costos[mejor_indice]
+        self.en_banda = en_banda_de(cadenas[mejor_indice].agregados())
+        
+        pasos_por_nivel = max(1, self.iteraciones_por_temperatura // self.num_cadenas)
+        temperatura = self.temperatura_inicial
+        self.iteraciones_totales = 0
+        self.intercambios_aceptados = 0
+        niveles_sin_mejora = 0
+        nivel = 0
+        self.traza.clear()
+        
+        # Con límite de tiempo, una solución inicial en banda ya es suficiente
+        self.motivo_parada = "en_banda" if instante_limite is not None and self.en_banda else None
+        
+        while temperatura > self.temperatura_minima and self.motivo_parada is None:
+            mejoro = False
+            temperaturas = [temperatura * escala for escala in escalas]
+            inicio_nivel = time.perf_counter() if self.registrar_traza else 0.0
+            iteraciones_previas = self.iteraciones_totales
+            intercambios_previos = self.intercambios_aceptados
+            aceptados = 0
+            
+            for _ in range(pasos_por_nivel):
+                # Con límite de tiempo, el reloj se consulta una vez por paso
+                if instante_limite is not None and time.perf_counter() >= instante_limite:
+                    self.motivo_parada = "limite_tiempo"
+                    break
+                
+                # Un movimiento propuesto por cadena
+                for k in range(self.num_cadenas):
+                    estado = cadenas[k]
+                    movimiento = self._proponer_movimiento(estado, objetivo_centavos)
+                    self.iteraciones_totales += 1
+                    if movimiento is None:
+                        continue
+                    
+                    agregados_vecino = estado.agregados_tras(movimiento)
+                    costo_vecino = costo_de(agregados_vecino)
+                    delta = costo_vecino - costos[k]
+                    
+                    # Criterio de Metropolis
+                    if delta < 0 or self.rng.random() < math.exp(-delta / temperaturas[k]):
+                        estado.aplicar(movimiento)
+                        costos[k] = costo_vecino
+                        aceptados += 1
+                        
+                        if costo_vecino < mejor_costo:
+                            mejor_solucion = estado.a_lista()
+                            mejor_costo = costo_vecino
+                            mejoro = True
+                            self.en_banda = en_banda_de(agregados_vecino)
+                            if self.en_banda and instante_limite is not None:
+                                self.motivo_parada = "en_banda"
+                                break
+                
+                if self.motivo_parada is not None:
+                    break
+            
+            # Intercambio de réplicas entre cadenas vecinas (pares alternos)
+            if self.intercambio_replicas and self.motivo_parada is None:
+                for k in range(nivel % 2, self.num_cadenas - 1, 2):
+                    diferencia = costos[k] - costos[k + 1]
+                    if not math.isfinite(diferencia):
+                        continue
+                    exponente = diferencia * (1 / temperaturas[k] - 1 / temperaturas[k + 1])
+                    if exponente >= 0 or self.rng.random() < math.exp(exponente):
+                        cadenas[k], cadenas[k + 1] = cadenas[k + 1], cadenas[k]
+                        costos[k], costos[k + 1] = costos[k + 1], costos[k]
+                        self.intercambios_aceptados += 1
+            
+            if self.registrar_traza:
+                self._registrar_muestra(
+                    nivel, temperatura, self.iteraciones_totales - iteraciones_previas, aceptados,
+                    costos[0], mejor_costo, inicio_nivel,
+                    intercambios=self.intercambios_aceptados - intercambios_previos
+                )
+            
+            if self.motivo_parada is not None:
                 break
+            
+            # Enfriar
+            temperatura *= self.factor_enfriamiento
+            nivel += 1
+            
+            # Parada anticipada si la mejor solución no mejora
+            niveles_sin_mejora = 0 if mejoro else niveles_sin_mejora + 1
+            if niveles_sin_mejora >= self.max_niveles_sin_mejora:
+                self.motivo_parada = "estancamiento"
+        
+        if self.motivo_parada is None:
+            self.motivo_parada = "enfriamiento"
         
         self.mejor_costo = mejor_costo
         return mejor_solucion, mejor_costo, self.iteraciones_totales
+
+
+class SolucionadorPresupuestoExacto:
+    """
+    Motor exacto de listas: programación dinámica de suma de subconjuntos
+    acotada sobre el precio en centavos.
+    
+    Los precios se dividen por su máximo común divisor (en los inventarios
+    habituales, 50 centavos), de modo que la tabla tiene una celda por
+    cada total alcanzable hasta el máximo de la banda. Cada celda guarda
+    la mejor lista que suma exactamente ese total según el orden:
+    1. más productos distintos
+    2. más categorías distintas
+    3. menos unidades repetidas
+    
+    Las categorías se cuentan exactamente procesando los productos por
+    categoría con dos tablas (categoría ya usada o no). Cada producto puede
+    llevar de 1 a max_unidades_por_producto unidades.
+    
+    Si la tabla supera max_celdas o no existe ningún total dentro de la
+    banda, se usa el motor de Temple Simulado de respaldo.
+    """
+    
+    def __init__(
+        self,
+        temperatura_inicial: float = 1000.0,
+        temperatura_minima: float = 1.0,
+        factor_enfriamiento: float = 0.95,
+        iteraciones_por_temperatura: int = 100,
+        semilla: Optional[int] = None,
+        max_celdas: int = 2000000,
+        max_unidades_por_producto: int = 3,
+        motor_respaldo: str = "multicadena",
+        sembrador: str = "aleatorio",
+        registrar_traza: bool = False,
+        observador: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Inicializa el solucionador.
+        
+        Args:
+            temperatura_inicial, temperatura_minima, factor_enfriamiento,
+            iteraciones_por_temperatura, semilla, sembrador, registrar_traza,
+            observador: Parámetros del motor de respaldo (la tabla de
+            programación dinámica no genera traza)
+            max_celdas: Máximo de celdas de tabla (productos x unidades x totales)
+            max_unidades_por_producto: Unidades máximas de un mismo producto
+            motor_respaldo: Motor de MOTORES_LISTAS usado como respaldo
+        """
+        self.parametros_respaldo = {
+            "temperatura_inicial": temperatura_inicial,
+            "temperatura_minima": temperatura_minima,
+            "factor_enfriamiento": factor_enfriamiento,
+            "iteraciones_por_temperatura": iteraciones_por_temperatura,
+            "sembrador": sembrador,
+            "registrar_traza": registrar_traza,
+            "observador": observador
+        }
+        self.semilla = semilla
+        self.max_celdas = max_celdas
+        self.max_unidades_por_producto = max_unidades_por_producto
+        self.motor_respaldo = motor_respaldo
+        self.metodo_utilizado = None  # "programacion_dinamica" o "respaldo"
+        self.mejor_costo = float('inf')
+        self.en_banda = False
+        self.motivo_parada = None
+        self.traza = deque()
+    
+    def _respaldo(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float,
+        tipo_lista: str,
+        limite_ms: Optional[float] = None
+    ) -> Tuple[List[Tuple[Dict, int]], float, int]:
+        """Resuelve con el motor de Temple Simulado de respaldo"""
+        self.metodo_utilizado = "respaldo"
+        optimizador = crear_motor_listas(self.motor_respaldo, semilla=self.semilla, **self.parametros_respaldo)
+        resultado = optimizador.optimizar(productos, presupuesto_objetivo, tipo_lista, limite_ms=limite_ms)
+        self.mejor_costo = resultado[1]
+        self.en_banda = optimizador.en_banda
+        self.motivo_parada = optimizador.motivo_parada
+        self.traza = optimizador.traza
+        return resultado
+    
+    def optimizar(
+        self,
+        productos: List[Dict],
+        presupuesto_objetivo: float,
+        tipo_lista: str = "exacta",
+        limite_ms: Optional[float] = None
+    ) -> Tuple[List[Tuple[Dict, int]], float, int]:
+        """
+        Calcula la mejor lista dentro de la banda de presupuesto.
+        
+        La tabla no se interrumpe (su tamaño está acotado por max_celdas);
+        limite_ms solo se aplica al motor de respaldo.
+        
+        Args:
+            productos: Lista de productos disponibles
+            presupuesto_objetivo: Presupuesto objetivo
+            tipo_lista: Tipo de lista ("exacta", "superior", "inferior")
+            limite_ms: Tiempo máximo del motor de respaldo en milisegundos
+            
+        Returns:
+            Tupla (mejor_solucion, mejor_costo, celdas_procesadas), con el
+            mismo formato que TempleSimulado.optimizar
+        """
+        evaluador = TempleSimulado()
+        instante_limite = evaluador._instante_limite(limite_ms)
+        objetivo_min, objetivo_max = evaluador._rango_presupuesto(presupuesto_objetivo, tipo_lista)
+        
+        catalogo = registro_catalogos_global.obtener(productos)
+        if not len(catalogo):
+            return [], float('inf'), 0
+        
+        # Escalar los precios por su máximo común divisor
+        unidad = 0
+        for precio in catalogo.precios:
+            unidad = math.gcd(unidad, precio)
+        unidad = unidad or 1
+        precios = [precio // unidad for precio in catalogo.precios]
+        
+        # Banda en unidades (con tolerancia para errores de redondeo)
+        minimo = math.ceil(objetivo_min * 100 / unidad - 1e-9)
+        maximo = math.floor(objetivo_max * 100 / unidad + 1e-9)
+        if maximo < max(minimo, 0):
+            return self._respaldo(productos, presupuesto_objetivo, tipo_lista, limite_ms)
+        
+        opciones = sum(
+            min(self.max_unidades_por_producto, maximo // precio) if precio > 0 else 0
+            for precio in precios
+        )
+        if opciones * (maximo + 1) > self.max_celdas:
+            return self._respaldo(productos, presupuesto_objetivo, tipo_lista, limite_ms)
+        
+        self.metodo_utilizado = "programacion_dinamica"
+        self.traza = deque()
+        celdas = 0
+        
+        # Valor de cada total codificado en un entero para comparar rápido:
+        # distintos * 2^20 + categorías * 2^10 - repeticiones. Los totales no
+        # alcanzables valen NO_ALCANZABLE (muy negativo, sigue siéndolo al sumar).
+        PESO_CATEGORIA = 1 << 10
+        PESO_DISTINTO = 1 << 20
+        NO_ALCANZABLE = -(1 << 40)
+        
+        valores = [NO_ALCANZABLE] * (maximo + 1)
+        valores[0] = 0
+        
+        # Agrupar productos por categoría
+        grupos = {}
+        for i, categoria in enumerate(catalogo.categorias):
+            grupos.setdefault(categoria, []).append(i)
+        
+        # Tablas intermedias para reconstruir la solución hacia atrás:
+        # por grupo (tabla sin la categoría, [(producto, base, tabla con la categoría)])
+        historial = []
+        
+        for indices in grupos.values():
+            sin_categoria = valores  # la categoría aún no aparece
+            con_categoria = [NO_ALCANZABLE] * (maximo + 1)
+            pasos = []
+            
+            for i in indices:
+                precio = precios[i]
+                if precio <= 0 or precio > maximo:
+                    continue
+                
+                # Mejor origen por total: agregar desde "sin categoría" suma una categoría
+                base = [
+                    con if con >= sin + PESO_CATEGORIA else sin + PESO_CATEGORIA
+                    for con, sin in zip(con_categoria, sin_categoria)
+                ]
+                nuevos = list(con_categoria)
+                
+                for cantidad in range(1, min(self.max_unidades_por_producto, maximo // precio) + 1):
+                    peso = precio * cantidad
+                    incremento = PESO_DISTINTO - (cantidad - 1)
+                    nuevos[peso:] = [
+                        actual if actual >= origen + incremento else origen + incremento
+                        for actual, origen in zip(nuevos[peso:], base)
+                    ]
+                    celdas += maximo + 1 - peso
+                
+                pasos.append((i, base, nuevos))
+                con_categoria = nuevos
+            
+            historial.append((sin_categoria, pasos))
+            
+            # Combinar: la mejor lista por total, con o sin la categoría
+            valores = [sin if sin >= con else con for sin, con in zip(sin_categoria, con_categoria)]
+        
+        # Mejor total dentro de la banda (desempate: más cerca del presupuesto)
+        centro = presupuesto_objetivo * 100 / unidad
+        mejor_total = None
+        for total in range(max(minimo, 0), maximo + 1):
+            if valores[total] < PESO_DISTINTO:
+                continue
+            if mejor_total is None or valores[total] > valores[mejor_total] or (
+                valores[total] == valores[mejor_total]
+                and abs(total - centro) < abs(mejor_total - centro)
+            ):
+                mejor_total = total
+        
+        if mejor_total is None:
+            # Dar al respaldo solo el tiempo que queda
+            restante = None
+            if instante_limite is not None:
+                restante = max(1.0, (instante_limite - time.perf_counter()) * 1000)
+            return self._respaldo(productos, presupuesto_objetivo, tipo_lista, restante)
+        
+        # Reconstruir hacia atrás: en cada tabla se busca de dónde viene el valor
+        solucion = []
+        total = mejor_total
+        objetivo = valores[total]
+        for sin_categoria, pasos in reversed(historial):
+            if sin_categoria[total] == objetivo:
+                continue  # la categoría no se usó
+            
+            # La categoría se usó: recorrer sus productos del último al primero
+            con_categoria = True
+            for j in range(len(pasos) - 1, -1, -1):
+                i, base, nuevos = pasos[j]
+                anterior = pasos[j - 1][2] if j > 0 else None
+                if not con_categoria:
+                    break
+                if anterior is not None and anterior[total] == objetivo:
+                    continue  # el producto no se usó
+                
+                # Buscar la cantidad que produce el valor
+                for cantidad in range(1, self.max_unidades_por_producto + 1):
+                    peso = precios[i] * cantidad
+                    if peso > total:
+                        break
+                    if base[total - peso] + PESO_DISTINTO - (cantidad - 1) == objetivo:
+                        solucion.append((catalogo.productos[i], cantidad))
+                        total -= peso
+                        objetivo = base[total]
+                        # ¿El origen ya tenía la categoría o venía de la tabla sin ella?
+                        con_categoria = anterior is not None and anterior[total] == objetivo
+                        if not con_categoria:
+                            objetivo -= PESO_CATEGORIA
+                        break
+        
+        solucion.reverse()
+        
+        self.mejor_costo = evaluador.calcular_costo(solucion, presupuesto_objetivo, tipo_lista)
+        self.en_banda = evaluador.esta_en_banda(solucion, presupuesto_objetivo, tipo_lista)
+        self.motivo_parada = "programacion_dinamica"
+        return solucion, self.mejor_costo, celdas
+
+
+# Motores de generación de listas disponibles (ver crear_motor_listas)
+MOTORES_LISTAS = {
+    "temple": TempleSimulado,
+    "multicadena": TempleMultiCadena,
+    "exacto": SolucionadorPresupuestoExacto,
+}
+
+
+def crear_motor_listas(motor: str = "temple", semilla: Optional[int] = None, **parametros) -> TempleSimulado:
+    """
+    Crea el motor de generación de listas indicado.
+    
+    Args:
+        motor: Nombre del motor (clave de MOTORES_LISTAS)
+        semilla: Semilla del generador aleatorio
+        **parametros: Parámetros del constructor (temperaturas, etc.)
+        
+    Returns:
+        Instancia con el método optimizar(productos, presupuesto, tipo_lista)
+    """
+    if motor not in MOTORES_LISTAS:
+        raise ValueError(f"Motor de listas desconocido: {motor} "
+                         f"(disponibles: {', '.join(MOTORES_LISTAS)})")
+    return MOTORES_LISTAS[motor](semilla=semilla, **parametros)
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Registro único de catálogos indexados para todo el proceso
+registro_catalogos_global = RegistroCatalogos()
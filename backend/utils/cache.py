@@ -0,0 +1,345 @@
+"""
+Cachés compartidas del sistema multi-agente
+Cachés acotadas y seguras entre hilos para reutilizar resultados de los
+algoritmos entre compradores de una misma sucursal.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class CacheLRU:
+    """
+    Caché acotada con política LRU (se descarta la entrada menos usada) y,
+    opcionalmente, tiempo de vida por entrada (TTL).
+    Todas las operaciones están protegidas por un lock.
+    """
+    
+    def __init__(self, capacidad: int = 1024, ttl_segundos: Optional[float] = None):
+        """
+        Inicializa la caché.
+        
+        Args:
+            capacidad: Número máximo de entradas
+            ttl_segundos: Tiempo de vida de cada entrada (None = sin caducidad)
+        """
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()  # {clave: (valor, instante de caducidad)}
+        self._lock = threading.Lock()
+        
+        # Estadísticas
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+        self.expiraciones = 0
+    
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """
+        Busca una entrada y la marca como usada recientemente.
+        
+        Args:
+            clave: Clave de la entrada
+            
+        Returns:
+            Valor almacenado o None si no existe
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            
+            valor, caducidad = entrada
+            if caducidad is not None and time.monotonic() >= caducidad:
+                del self._entradas[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+    
+    def guardar(self, clave: Hashable, valor: Any):
+        """
+        Guarda una entrada, desalojando la menos usada si la caché está llena.
+        
+        Args:
+            clave: Clave de la entrada
+            valor: Valor a almacenar (no puede ser None)
+        """
+        caducidad = None
+        if self.ttl_segundos is not None:
+            caducidad = time.monotonic() + self.ttl_segundos
+        
+        with self._lock:
+            self._entradas[clave] = (valor, caducidad)
+            self._entradas.move_to_end(clave)
+            
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+    
+    def invalidar(self, condicion: Callable[[Hashable], bool]) -> int:
+        """
+        Elimina todas las entradas cuya clave cumple la condición.
+        
+        Args:
+            condicion: Función que recibe la clave y devuelve True si se elimina
+            
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock:
+            return self._invalidar_sin_lock(condicion)
+    
+    def _invalidar_sin_lock(self, condicion: Callable[[Hashable], bool]) -> int:
+        """Igual que invalidar, para llamar con el lock ya tomado"""
+        claves = [clave for clave in self._entradas if condicion(clave)]
+        for clave in claves:
+            del self._entradas[clave]
+        self.invalidaciones += len(claves)
+        return len(claves)
+    
+    def limpiar(self):
+        """Elimina todas las entradas (las estadísticas se conservan)"""
+        with self._lock:
+            self.invalidaciones += len(self._entradas)
+            self._entradas.clear()
+    
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Obtiene estadísticas de uso de la caché.
+        
+        Returns:
+            Diccionario con estadísticas
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "capacidad": self.capacidad,
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones,
+                "expiraciones": self.expiraciones
+            }
+
+
+class CacheRutas(CacheLRU):
+    """
+    Caché de rutas compartida entre compradores.
+    
+    Clave: (sucursal_id, versión del mapa, origen, objetivo, heurística).
+    Como la versión es el hash del contenido del mapa, una ruta nunca se
+    reutiliza sobre un mapa distinto; además, al guardar un mapa se
+    eliminan explícitamente las rutas de esa sucursal.
+    """
+    
+    def obtener_ruta(
+        self,
+        sucursal_id: str,
+        version_mapa: str,
+        origen: Tuple[int, int],
+        objetivo: Tuple[int, int],
+        heuristica: str = "manhattan"
+    ) -> Optional[Tuple[List[Tuple[int, int]], float]]:
+        """
+        Busca una ruta calculada previamente.
+        
+        Returns:
+            Tupla (ruta, costo) o None si no está en caché
+        """
+        entrada = self.obtener((sucursal_id, version_mapa, origen, objetivo, heuristica))
+        if entrada is None:
+            return None
+        
+        ruta, costo = entrada
+        return list(ruta), costo
+    
+    def guardar_ruta(
+        self,
+        sucursal_id: str,
+        version_mapa: str,
+        origen: Tuple[int, int],
+        objetivo: Tuple[int, int],
+        ruta: List[Tuple[int, int]],
+        costo: float,
+        heuristica: str = "manhattan"
+    ):
+        """
+        Guarda una ruta calculada. Se almacena como tupla inmutable para que
+        ningún comprador pueda modificar la copia compartida.
+        """
+        self.guardar(
+            (sucursal_id, version_mapa, origen, objetivo, heuristica),
+            (tuple(ruta), costo)
+        )
+    
+    def invalidar_sucursal(self, sucursal_id: str) -> int:
+        """
+        Elimina todas las rutas de una sucursal (por ejemplo, al guardar su mapa).
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            
+        Returns:
+            Número de rutas eliminadas
+        """
+        return self.invalidar(lambda clave: clave[0] == sucursal_id)
+
+
+class CacheListas(CacheLRU):
+    """
+    Caché de listas de compras compartida entre compradores.
+    
+    Clave: (sucursal_id, versión del inventario, presupuesto, tipo de
+    lista, motor y parámetros del motor). La versión es el hash de los
+    productos, por lo que una lista nunca se reutiliza sobre un inventario
+    distinto; además, al ver una versión nueva de una sucursal se
+    eliminan las listas de la versión anterior.
+    
+    Para que una lista cacheada sea reproducible, las listas se generan en
+    modo determinista con la semilla de semilla_determinista.
+    """
+    
+    def __init__(self, capacidad: int = 1024, ttl_segundos: Optional[float] = 600.0):
+        """
+        Inicializa la caché de listas.
+        
+        Args:
+            capacidad: Número máximo de listas
+            ttl_segundos: Tiempo de vida de cada lista
+        """
+        super().__init__(capacidad, ttl_segundos)
+        self._versiones = {}  # {sucursal_id: versión de inventario vigente}
+    
+    @staticmethod
+    def _clave(
+        sucursal_id: str,
+        version_inventario: str,
+        presupuesto: float,
+        tipo_lista: str,
+        motor: str,
+        parametros: Dict
+    ) -> Tuple:
+        """Clave de caché de una lista"""
+        return (
+            sucursal_id, version_inventario, round(float(presupuesto), 2), tipo_lista,
+            motor, tuple(sorted(parametros.items()))
+        )
+    
+    def _registrar_version(self, sucursal_id: str, version_inventario: str):
+        """Descarta las listas de versiones anteriores del inventario de la sucursal"""
+        # Consulta, cambio de versión e invalidación en una sola sección crítica
+        with self._lock:
+            anterior = self._versiones.get(sucursal_id)
+            if anterior == version_inventario:
+                return
+            self._versiones[sucursal_id] = version_inventario
+            if anterior is not None:
+                self._invalidar_sin_lock(
+                    lambda clave: clave[0] == sucursal_id and clave[1] != version_inventario
+                )
+    
+    def obtener_lista(
+        self,
+        sucursal_id: str,
+        version_inventario: str,
+        presupuesto: float,
+        tipo_lista: str,
+        motor: str,
+        parametros: Dict
+    ) -> Optional[Tuple[List[Tuple[Dict, int]], float, int]]:
+        """
+        Busca una lista generada previamente.
+        
+        Returns:
+            Tupla (lista_raw, costo, iteraciones) o None si no está en caché
+        """
+        self._registrar_version(sucursal_id, version_inventario)
+        entrada = self.obtener(
+            self._clave(sucursal_id, version_inventario, presupuesto, tipo_lista, motor, parametros)
+        )
+        if entrada is None:
+            return None
+        
+        lista, costo, iteraciones = entrada
+        return list(lista), costo, iteraciones
+    
+    def guardar_lista(
+        self,
+        sucursal_id: str,
+        version_inventario: str,
+        presupuesto: float,
+        tipo_lista: str,
+        motor: str,
+        parametros: Dict,
+        resultado: Tuple[List[Tuple[Dict, int]], float, int]
+    ):
+        """
+        Guarda una lista generada (como tupla inmutable).
+        """
+        self._registrar_version(sucursal_id, version_inventario)
+        lista, costo, iteraciones = resultado
+        self.guardar(
+            self._clave(sucursal_id, version_inventario, presupuesto, tipo_lista, motor, parametros),
+            (tuple(lista), costo, iteraciones)
+        )
+    
+    def invalidar_sucursal(self, sucursal_id: str) -> int:
+        """
+        Elimina todas las listas de una sucursal (por ejemplo, al cambiar su inventario).
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            
+        Returns:
+            Número de listas eliminadas
+        """
+        with self._lock:
+            self._versiones.pop(sucursal_id, None)
+            return self._invalidar_sin_lock(lambda clave: clave[0] == sucursal_id)
+
+
+def semilla_determinista(*partes) -> int:
+    """
+    Deriva una semilla estable (igual entre procesos y reinicios) de los
+    datos que definen una generación.
+    
+    Args:
+        *partes: Valores que identifican la generación (versión, presupuesto, ...)
+        
+    Returns:
+        Entero de 64 bits
+    """
+    contenido = "|".join(repr(parte) for parte in partes)
+    return int(hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16], 16)
+
+
+def calcular_version_catalogo(productos: List[Dict]) -> str:
+    """
+    Calcula un hash estable de la lista de productos.
+    
+    Args:
+        productos: Lista de productos del inventario
+        
+    Returns:
+        Hash hexadecimal que cambia cuando cambia el catálogo
+    """
+    contenido = json.dumps(productos, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+# ========== INSTANCIAS GLOBALES ==========
+# Instancias únicas de las cachés para toda la aplicación
+cache_rutas_global = CacheRutas(capacidad=4096)
+cache_listas_global = CacheListas(capacidad=1024, ttl_segundos=600.0)
@@ -4,8 +4,201 @@ Implementa el canal de comunicación para que el comprador pueda
 hablar directamente con cajeros específicos.
 """
 
-from typing import Dict, Callable, Optional
-from collections import defaultdict
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict, Callable, List, Optional
+from collections import defaultdict, deque
+
+
+class HistorialMensajes:
+    """
+    Historial acotado de mensajes de un canal (buffer circular).
+    
+    - Guarda solo los últimos `capacidad` mensajes: la memoria no crece
+      con el tiempo de ejecución del servidor
+    - Índices por comprador y por cajero: la conversación de un comprador
+      se obtiene en O(k) sin recorrer todo el historial
+    - Opcionalmente, los mensajes que salen de memoria (por desalojo o al
+      cerrar) se anexan a un registro en disco (una línea JSON por mensaje,
+      ordenables por "secuencia"); la escritura se hace fuera del lock del
+      historial para no bloquear a los demás hilos
+    """
+    
+    def __init__(self, capacidad: int = 1000, ruta_volcado: Optional[str] = None):
+        """
+        Inicializa el historial vacío.
+        
+        Args:
+            capacidad: Máximo de mensajes en memoria
+            ruta_volcado: Archivo donde anexar los mensajes que salen de
+                          memoria (None = sin volcado)
+        """
+        if capacidad < 1:
+            raise ValueError("capacidad debe ser al menos 1")
+        
+        self.capacidad = capacidad
+        self.ruta_volcado = ruta_volcado
+        
+        self._mensajes = deque()
+        self._por_comprador = {}  # {comprador_id: deque de entradas}
+        self._por_cajero = {}  # {cajero_id: deque de entradas}
+        self._lock = threading.Lock()
+        self._lock_archivo = threading.Lock()
+        
+        self.registrados = 0
+        self.descartados = 0
+        
+        self._archivo = None
+        if ruta_volcado:
+            directorio = os.path.dirname(ruta_volcado)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            self._archivo = open(ruta_volcado, 'a', encoding='utf-8')
+    
+    def registrar(self, tipo: str, comprador_id: str, cajero_id: str, mensaje: Dict) -> Dict:
+        """
+        Agrega un mensaje al historial, descartando el más antiguo si está
+        lleno (se vuelca a disco si hay volcado configurado).
+        
+        Args:
+            tipo: "comprador_a_cajero" o "cajero_a_comprador"
+            comprador_id: ID del comprador
+            cajero_id: ID del cajero
+            mensaje: Contenido del mensaje
+            
+        Returns:
+            Entrada guardada
+        """
+        with self._lock:
+            self.registrados += 1
+            entrada = {
+                "secuencia": self.registrados,
+                "instante": time.time(),
+                "tipo": tipo,
+                "comprador_id": comprador_id,
+                "cajero_id": cajero_id,
+                "mensaje": mensaje
+            }
+            
+            self._mensajes.append(entrada)
+            self._por_comprador.setdefault(comprador_id, deque()).append(entrada)
+            self._por_cajero.setdefault(cajero_id, deque()).append(entrada)
+            
+            descartada = None
+            if len(self._mensajes) > self.capacidad:
+                descartada = self._descartar_mas_antiguo()
+            
+        if descartada is not None:
+            self._volcar([descartada])
+        
+        return entrada
+    
+    def _descartar_mas_antiguo(self) -> Dict:
+        """
+        Quita el mensaje más antiguo del buffer y de sus índices.
+        Es también el más antiguo de su comprador y de su cajero.
+        
+        Returns:
+            Entrada descartada
+        """
+        entrada = self._mensajes.popleft()
+        self.descartados += 1
+        
+        for indice, clave in ((self._por_comprador, entrada["comprador_id"]),
+                              (self._por_cajero, entrada["cajero_id"])):
+            mensajes = indice[clave]
+            mensajes.popleft()
+            if not mensajes:
+                del indice[clave]
+        
+        return entrada
+    
+    def _volcar(self, entradas: List[Dict]):
+        """
+        Anexa entradas al archivo de volcado, si lo hay. Usa su propio lock
+        para no retener el del historial durante la escritura.
+        
+        Args:
+            entradas: Entradas a escribir
+        """
+        with self._lock_archivo:
+            if self._archivo is None:
+                return
+            for entrada in entradas:
+                self._archivo.write(json.dumps(entrada, ensure_ascii=False, default=str) + "\n")
+            self._archivo.flush()
+    
+    def conversacion_comprador(self, comprador_id: str) -> List[Dict]:
+        """
+        Mensajes en memoria de un comprador, del más antiguo al más reciente.
+        
+        Args:
+            comprador_id: ID del comprador
+            
+        Returns:
+            Lista de entradas (vacía si no hay mensajes)
+        """
+        with self._lock:
+            return list(self._por_comprador.get(comprador_id, ()))
+    
+    def mensajes_cajero(self, cajero_id: str) -> List[Dict]:
+        """
+        Mensajes en memoria de un cajero, del más antiguo al más reciente.
+        
+        Args:
+            cajero_id: ID del cajero
+            
+        Returns:
+            Lista de entradas (vacía si no hay mensajes)
+        """
+        with self._lock:
+            return list(self._por_cajero.get(cajero_id, ()))
+    
+    def limpiar(self):
+        """Vacía el historial en memoria (el volcado en disco se conserva)"""
+        with self._lock:
+            self._mensajes.clear()
+            self._por_comprador.clear()
+            self._por_cajero.clear()
+    
+    def cerrar(self):
+        """
+        Vuelca los mensajes que siguen en memoria y cierra el archivo de
+        volcado, si lo hay. Los mensajes registrados después ya no se vuelcan.
+        """
+        with self._lock:
+            en_memoria = list(self._mensajes)
+        
+        self._volcar(en_memoria)
+        with self._lock_archivo:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+    
+    def __len__(self) -> int:
+        return len(self._mensajes)
+    
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Estadísticas del historial.
+        
+        Returns:
+            Diccionario con ocupación, totales e índices
+        """
+        with self._lock:
+            return {
+                "guardados": len(self._mensajes),
+                "capacidad": self.capacidad,
+                "registrados": self.registrados,
+                "descartados": self.descartados,
+                "compradores_indexados": len(self._por_comprador),
+                "cajeros_indexados": len(self._por_cajero),
+                "volcado": self.ruta_volcado
+            }
 
 
 class CanalComunicacion:
@@ -18,14 +211,24 @@ class CanalComunicacion:
     - Los cajeros se registran en el canal
     - El comprador envía mensaje a un cajero específico usando su ID
     - Solo el cajero con ese ID procesa el mensaje
+    - Cada envío devuelve un Future que se completa con la respuesta del cajero
+    - Expone la carga de cada cajero (su cola y su tiempo de servicio medio)
+      para elegir cajero según la espera esperada
     """
     
-    def __init__(self, sucursal_id: str):
+    def __init__(
+        self,
+        sucursal_id: str,
+        capacidad_historial: int = 1000,
+        ruta_volcado: Optional[str] = None
+    ):
         """
         Inicializa el canal de comunicación para una sucursal.
         
         Args:
             sucursal_id: ID de la sucursal
+            capacidad_historial: Máximo de mensajes del historial en memoria
+            ruta_volcado: Archivo donde anexar todos los mensajes (opcional)
         """
         self.sucursal_id = sucursal_id
         
@@ -35,8 +238,14 @@ class CanalComunicacion:
         # Callbacks para respuestas: {comprador_id: callback}
         self.callbacks_compradores = {}
         
-        # Historial de mensajes (para debugging)
-        self.historial_mensajes = []
+        # Respuestas pendientes: {pedido_id: (comprador_id, Future)}
+        self.respuestas_pendientes = {}
+        # Último pedido de cada comprador: {comprador_id: pedido_id}
+        self._pedido_vigente = {}
+        self._lock_pendientes = threading.Lock()
+        
+        # Historial acotado de mensajes (para debugging)
+        self.historial_mensajes = HistorialMensajes(capacidad_historial, ruta_volcado)
         
         print(f"[Canal Comunicación] Inicializado para sucursal {sucursal_id}")
     
@@ -94,17 +303,27 @@ class CanalComunicacion:
         self.callbacks_compradores[comprador_id] = callback_factura
         print(f"[Canal Comunicación] ✓ Comprador {comprador_id} registrado para respuestas")
     
-    def enviar_mensaje(self, cajero_id: str, mensaje: Dict) -> bool:
+    def enviar_mensaje(self, cajero_id: str, mensaje: Dict) -> Optional[Future]:
         """
         Envía un mensaje del comprador a un cajero específico.
         El mensaje se entrega directamente al cajero identificado.
         
+        Cada envío lleva un pedido_id nuevo que el cajero devuelve en su
+        respuesta. El Future devuelto se completa en _recibir_respuesta_cajero
+        con la factura (o el error) de ese pedido, de modo que el comprador
+        puede esperar la respuesta con future.result(timeout=...) en lugar de
+        dormir un tiempo fijo. Un nuevo envío del mismo comprador cancela
+        el pedido pendiente anterior; un pedido cancelado (por ejemplo, por
+        plazo agotado) deja de estar pendiente y su respuesta tardía se
+        descarta.
+        
         Args:
             cajero_id: ID del cajero destinatario
-            mensaje: Diccionario con el mensaje (debe incluir cajero_id)
+            mensaje: Diccionario con el mensaje (debe incluir cajero_id); se
+                     entrega una copia con el pedido_id añadido
             
         Returns:
-            True si el mensaje fue entregado
+            Future con la respuesta del cajero, o None si no fue entregado
         """
         comprador_id = mensaje.get('comprador_id', 'desconocido')
         
@@ -113,28 +332,41 @@ class CanalComunicacion:
         # Verificar que el cajero está registrado
         if cajero_id not in self.cajeros_registrados:
             print(f"  ✗ Cajero {cajero_id} no está registrado en el canal")
-            return False
+            return None
+        
+        pedido_id = uuid.uuid4().hex
+        mensaje = dict(mensaje, pedido_id=pedido_id)
+        
+        # Registrar la respuesta pendiente antes de entregar: el cajero
+        # puede responder durante la propia entrega
+        respuesta = Future()
+        respuesta.add_done_callback(
+            lambda futuro: self._descartar_pendiente(comprador_id, pedido_id)
+        )
+        with self._lock_pendientes:
+            anterior = self.respuestas_pendientes.get(self._pedido_vigente.get(comprador_id))
+            self.respuestas_pendientes[pedido_id] = (comprador_id, respuesta)
+            self._pedido_vigente[comprador_id] = pedido_id
+        if anterior is not None:
+            anterior[1].cancel()
         
         # Guardar en historial
-        self.historial_mensajes.append({
-            "tipo": "comprador_a_cajero",
-            "comprador_id": comprador_id,
-            "cajero_id": cajero_id,
-            "mensaje": mensaje
-        })
+        self.historial_mensajes.registrar("comprador_a_cajero", comprador_id, cajero_id, mensaje)
         
         # Entregar mensaje al cajero específico
         agente_cajero = self.cajeros_registrados[cajero_id]
         print(f"  ✓ Mensaje entregado a cajero {cajero_id}")
         
         # El cajero procesa el mensaje (ejecuta su tabla REAS)
-        factura = agente_cajero.escuchar_mensaje(mensaje)
+        agente_cajero.escuchar_mensaje(mensaje)
         
-        return True
+        return respuesta
     
     def _recibir_respuesta_cajero(self, comprador_id: str, factura: Dict):
         """
         Callback interno: recibe respuesta del cajero y la envía al comprador.
+        Solo se entregan las respuestas a pedidos pendientes (por su
+        pedido_id); las de pedidos vencidos o reemplazados se descartan.
         
         Args:
             comprador_id: ID del comprador destinatario
@@ -145,12 +377,13 @@ class CanalComunicacion:
         print(f"\n[Canal Comunicación] Respuesta de {cajero_id} → {comprador_id}")
         
         # Guardar en historial
-        self.historial_mensajes.append({
-            "tipo": "cajero_a_comprador",
-            "cajero_id": cajero_id,
-            "comprador_id": comprador_id,
-            "mensaje": factura
-        })
+        self.historial_mensajes.registrar("cajero_a_comprador", comprador_id, cajero_id, factura)
+        
+        with self._lock_pendientes:
+            pendiente = self.respuestas_pendientes.pop(factura.get('pedido_id'), None)
+        if pendiente is None or pendiente[0] != comprador_id:
+            print("  ⚠ Respuesta sin pedido pendiente, descartada")
+            return
         
         # Enviar al comprador si tiene callback registrado
         if comprador_id in self.callbacks_compradores:
@@ -160,6 +393,38 @@ class CanalComunicacion:
         else:
             print(f"  ⚠ Comprador {comprador_id} no tiene callback registrado")
     
+        # Completar la respuesta pendiente del pedido
+        respuesta = pendiente[1]
+        if respuesta.set_running_or_notify_cancel():
+            respuesta.set_result(factura)
+    
+    def _descartar_pendiente(self, comprador_id: str, pedido_id: str):
+        """
+        Callback del Future: al completarse o cancelarse, el pedido deja de
+        estar pendiente.
+        
+        Args:
+            comprador_id: ID del comprador
+            pedido_id: ID del pedido terminado
+        """
+        with self._lock_pendientes:
+            self.respuestas_pendientes.pop(pedido_id, None)
+            if self._pedido_vigente.get(comprador_id) == pedido_id:
+                del self._pedido_vigente[comprador_id]
+    
+    def obtener_carga_cajeros(self) -> Dict[str, tuple]:
+        """
+        Carga actual de los cajeros registrados, leída de cada cajero.
+        
+        Returns:
+            {cajero_id: (pedidos en cola o en atención, tiempo de servicio
+            simulado medio en s)}
+        """
+        return {
+            cajero_id: agente.obtener_carga()
+            for cajero_id, agente in list(self.cajeros_registrados.items())
+        }
+    
     def obtener_cajeros_disponibles(self) -> list:
         """
         Obtiene la lista de cajeros disponibles en el canal.
@@ -184,13 +449,19 @@ class CanalComunicacion:
             "sucursal_id": self.sucursal_id,
             "cajeros_registrados": len(self.cajeros_registrados),
             "cajeros_disponibles": len(self.obtener_cajeros_disponibles()),
-            "mensajes_totales": len(self.historial_mensajes),
-            "compradores_registrados": len(self.callbacks_compradores)
+            "mensajes_totales": self.historial_mensajes.registrados,
+            "historial": self.historial_mensajes.obtener_estadisticas(),
+            "compradores_registrados": len(self.callbacks_compradores),
+            "respuestas_pendientes": len(self.respuestas_pendientes),
+            "carga_cajeros": {
+                cajero_id: {"en_cola": en_cola, "servicio_s": round(servicio, 3)}
+                for cajero_id, (en_cola, servicio) in self.obtener_carga_cajeros().items()
+            }
         }
     
     def limpiar_historial(self):
         """Limpia el historial de mensajes"""
-        self.historial_mensajes = []
+        self.historial_mensajes.limpiar()
         print(f"[Canal Comunicación] Historial limpiado")
 
 
@@ -200,10 +471,19 @@ class GestorCanales:
     Mantiene un canal por sucursal y facilita el acceso a ellos.
     """
     
-    def __init__(self):
-        """Inicializa el gestor de canales"""
+    def __init__(self, capacidad_historial: int = 1000, directorio_historial: Optional[str] = None):
+        """
+        Inicializa el gestor de canales.
+        
+        Args:
+            capacidad_historial: Máximo de mensajes en memoria por canal
+            directorio_historial: Directorio para el volcado en disco del historial
+                                  ({sucursal_id}.ndjson); None = sin volcado
+        """
         # Diccionario: {sucursal_id: CanalComunicacion}
         self.canales = {}
+        self.capacidad_historial = capacidad_historial
+        self.directorio_historial = directorio_historial
         print("[Gestor Canales] Inicializado")
     
     def obtener_canal(self, sucursal_id: str) -> CanalComunicacion:
@@ -218,12 +498,47 @@ class GestorCanales:
             Canal de comunicación de la sucursal
         """
         if sucursal_id not in self.canales:
-            canal = CanalComunicacion(sucursal_id)
+            ruta_volcado = None
+            if self.directorio_historial:
+                ruta_volcado = os.path.join(self.directorio_historial, f"{sucursal_id}.ndjson")
+            
+            canal = CanalComunicacion(sucursal_id, self.capacidad_historial, ruta_volcado)
             self.canales[sucursal_id] = canal
             print(f"[Gestor Canales] Nuevo canal creado para {sucursal_id}")
         
         return self.canales[sucursal_id]
     
+    def configurar_historial(self, capacidad: Optional[int] = None, directorio: Optional[str] = None):
+        """
+        Configura el historial de los canales que se creen a partir de ahora.
+        
+        Args:
+            capacidad: Máximo de mensajes en memoria por canal (None = sin cambio)
+            directorio: Directorio para el volcado en disco del historial
+                        (None = sin volcado)
+                        
+        Raises:
+            ValueError: Si la capacidad no es positiva
+        """
+        if capacidad is not None:
+            if capacidad < 1:
+                raise ValueError("La capacidad del historial debe ser al menos 1")
+            self.capacidad_historial = capacidad
+        
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.directorio_historial = directorio or None
+        
+        if self.canales:
+            print("[Gestor Canales] ⚠ Configuración de historial aplicada solo a canales nuevos")
+        print(f"[Gestor Canales] Historial: {self.capacidad_historial} mensajes por canal, "
+              f"volcado en disco: {self.directorio_historial or 'desactivado'}")
+    
+    def cerrar(self):
+        """Cierra el historial de todos los canales (vuelca lo que queda en memoria)"""
+        for canal in list(self.canales.values()):
+            canal.historial_mensajes.cerrar()
+    
     def registrar_cajero_en_sucursal(self, sucursal_id: str, agente_cajero) -> bool:
         """
         Registra un cajero en el canal de su sucursal.
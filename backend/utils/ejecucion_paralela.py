@@ -0,0 +1,400 @@
+"""
+Ejecución Paralela de Búsquedas
+Reparte trabajo de CPU entre varios procesos:
+- Lotes de consultas de ruta: un pool persistente cuyos procesos cargan el
+  grid una sola vez (en su inicializador) y luego solo reciben pares
+  (origen, destino); el pool se recrea cuando cambia la versión del mapa.
+- Generación de listas: las tres listas del Temple Simulado se generan a
+  la vez en un pool persistente con los catálogos precargados.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.algoritmos_busqueda import (
+    BusquedaAEstrella, GridOcupacion, crear_motor_listas, registro_catalogos_global
+)
+from utils.cache import calcular_version_catalogo
+
+# Por debajo de este número de consultas no compensa levantar procesos
+MIN_CONSULTAS_PARALELO = 64
+
+# Tipos de lista que genera el agente comprador
+TIPOS_LISTA = ("exacta", "superior", "inferior")
+
+DIRECTORIO_INVENTARIO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'inventario'
+)
+
+# Catálogos que conserva cada proceso de listas
+MAX_CATALOGOS_TRABAJADOR = 16
+
+# Estado de cada proceso trabajador (se fija en _inicializar_trabajador)
+_grid_trabajador = None
+_busquedas_trabajador = {}  # {motor: BusquedaAEstrella}
+
+# Estado de cada proceso de listas: {version: (productos, {id: posición})}
+_catalogos_trabajador = {}
+
+
+def _inicializar_trabajador(filas: int, columnas: int, obstaculos: List[Tuple[int, int]]):
+    """Construye el grid una vez por proceso"""
+    global _grid_trabajador
+    _grid_trabajador = GridOcupacion(filas, columnas, obstaculos)
+    _busquedas_trabajador.clear()
+
+
+def _resolver_lote(
+    pares: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+    motor: str
+) -> List[Tuple[List[Tuple[int, int]], float]]:
+    """Resuelve un lote de consultas con el grid del proceso trabajador"""
+    busqueda = _busquedas_trabajador.get(motor)
+    if busqueda is None:
+        busqueda = _busquedas_trabajador[motor] = BusquedaAEstrella(motor=motor)
+    return [
+        busqueda.buscar(origen, destino, None, None, grid=_grid_trabajador)
+        for origen, destino in pares
+    ]
+
+
+def calcular_version_grid(grid: GridOcupacion) -> str:
+    """
+    Calcula un hash de las dimensiones y celdas bloqueadas del grid.
+    
+    Args:
+        grid: Grid de ocupación
+        
+    Returns:
+        Hash hexadecimal que cambia cuando cambia el mapa
+    """
+    contenido = hashlib.sha1(f"{grid.filas}x{grid.columnas}:".encode('utf-8'))
+    contenido.update(bytes(grid.bloqueado))
+    return contenido.hexdigest()
+
+
+class BuscadorRutasLote:
+    """
+    Resuelve muchas consultas de ruta sobre un mismo grid usando un pool de
+    procesos (las búsquedas son CPU puro, por lo que los hilos no escalan
+    por el GIL). Los resultados se devuelven en el orden de entrada.
+    
+    El pool es persistente y sus procesos tienen cargado el grid de la
+    última versión de mapa consultada; si llega otra versión, el pool se
+    recrea con el grid nuevo.
+    """
+    
+    def __init__(self, procesos: Optional[int] = None, motor: str = "a_estrella"):
+        """
+        Inicializa el buscador por lotes (el pool se crea en el primer uso).
+        
+        Args:
+            procesos: Número de procesos (por defecto, número de núcleos)
+            motor: Motor de BusquedaAEstrella por defecto ("a_estrella" o "jps")
+        """
+        if motor not in BusquedaAEstrella.MOTORES:
+            raise ValueError(f"Motor de búsqueda desconocido: {motor}")
+        
+        self.procesos = procesos or os.cpu_count() or 1
+        self.motor = motor
+        self._pool = None
+        self._version_pool = None
+        self._lock = threading.Lock()
+    
+    def _crear_pool(self, grid: GridOcupacion, version: str):
+        """Sustituye el pool por uno cargado con el grid indicado (con el lock tomado)"""
+        if self._pool is not None:
+            # Los lotes ya enviados al pool anterior terminan igualmente
+            self._pool.shutdown(wait=False)
+        
+        obstaculos = [grid.posicion(i) for i in range(grid.total_celdas) if grid.bloqueado[i]]
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.procesos,
+            initializer=_inicializar_trabajador,
+            initargs=(grid.filas, grid.columnas, obstaculos)
+        )
+        self._version_pool = version
+    
+    def buscar_lote(
+        self,
+        grid: GridOcupacion,
+        pares: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+        motor: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> List[Tuple[List[Tuple[int, int]], float]]:
+        """
+        Calcula las rutas de todos los pares.
+        
+        Args:
+            grid: Grid de ocupación del mapa
+            pares: Lista de (origen, destino)
+            motor: Motor de búsqueda (por defecto, el del buscador)
+            version: Versión del mapa si ya se conoce (ver calcular_version_grid)
+            
+        Returns:
+            Lista de (camino, costo) en el mismo orden que pares
+        """
+        motor = motor or self.motor
+        if motor not in BusquedaAEstrella.MOTORES:
+            raise ValueError(f"Motor de búsqueda desconocido: {motor}")
+        
+        pares = [(tuple(origen), tuple(destino)) for origen, destino in pares]
+        
+        if self.procesos <= 1 or len(pares) < MIN_CONSULTAS_PARALELO:
+            busqueda = BusquedaAEstrella(motor=motor)
+            return [busqueda.buscar(origen, destino, None, None, grid=grid) for origen, destino in pares]
+        
+        version = version or calcular_version_grid(grid)
+        
+        # Varios lotes por proceso para repartir bien la carga
+        tamano_lote = max(1, len(pares) // (self.procesos * 4))
+        lotes = [pares[i:i + tamano_lote] for i in range(0, len(pares), tamano_lote)]
+        
+        # Los lotes se envían con el lock tomado para que otra versión de mapa
+        # no cierre el pool entre la consulta de la versión y el envío
+        with self._lock:
+            if self._pool is None or self._version_pool != version:
+                self._crear_pool(grid, version)
+            futuros = [self._pool.submit(_resolver_lote, lote, motor) for lote in lotes]
+        
+        resultados = []
+        for futuro in futuros:
+            resultados.extend(futuro.result())
+        
+        return resultados
+    
+    def cerrar(self):
+        """Detiene el pool de procesos"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+                self._version_pool = None
+
+
+def _guardar_catalogo_trabajador(version: str, productos: List[Dict]):
+    """Guarda un catálogo en el proceso trabajador (acotado) y construye sus índices"""
+    if len(_catalogos_trabajador) >= MAX_CATALOGOS_TRABAJADOR:
+        _catalogos_trabajador.pop(next(iter(_catalogos_trabajador)))
+    productos = registro_catalogos_global.obtener(productos, version).productos
+    _catalogos_trabajador[version] = (productos, {p['id']: i for i, p in enumerate(productos)})
+
+
+def _inicializar_trabajador_listas(directorio_inventario: str):
+    """Precarga en el proceso los catálogos de todas las sucursales"""
+    if not os.path.isdir(directorio_inventario):
+        return
+    
+    for nombre in sorted(os.listdir(directorio_inventario)):
+        if not nombre.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directorio_inventario, nombre), 'r', encoding='utf-8') as archivo:
+                productos = json.load(archivo).get('productos', [])
+            _guardar_catalogo_trabajador(calcular_version_catalogo(productos), productos)
+        except (OSError, ValueError):
+            continue
+
+
+def _generar_lista_trabajador(
+    version: str,
+    productos: Optional[List[Dict]],
+    tipo_lista: str,
+    presupuesto: float,
+    semilla: int,
+    parametros: Dict,
+    motor: str,
+    limite_ms: Optional[float] = None
+) -> Optional[Tuple[List[Tuple[int, int]], float, int, List[Dict]]]:
+    """
+    Genera una lista con el catálogo del proceso.
+    
+    Returns:
+        Tupla ([(posición en el catálogo, cantidad)], costo, iteraciones,
+        traza), o None si el proceso no tiene el catálogo y no se envió
+    """
+    if productos is not None:
+        _guardar_catalogo_trabajador(version, productos)
+    elif version not in _catalogos_trabajador:
+        return None
+    
+    productos, posiciones = _catalogos_trabajador[version]
+    optimizador = crear_motor_listas(motor, semilla=semilla, **parametros)
+    solucion, costo, iteraciones = optimizador.optimizar(productos, presupuesto, tipo_lista, limite_ms=limite_ms)
+    
+    return (
+        [(posiciones[p['id']], cantidad) for p, cantidad in solucion],
+        costo,
+        iteraciones,
+        list(optimizador.traza)
+    )
+
+
+class GeneradorListasParalelo:
+    """
+    Genera las listas exacta, superior e inferior a la vez en un pool de
+    procesos persistente.
+    
+    Cada proceso precarga los catálogos de las sucursales al arrancar y
+    solo recibe la versión del catálogo (hash de los productos); si no la
+    tiene, se le reenvía el catálogo una vez. Cada lista usa su propio
+    generador aleatorio con una semilla distinta, así las cadenas son
+    independientes y, con semilla fija, reproducibles: la semilla de cada
+    lista depende solo de la semilla común y del tipo, de modo que generar
+    un subconjunto de los tipos da las mismas listas que generarlos todos.
+    """
+    
+    def __init__(self, procesos: Optional[int] = None):
+        """
+        Inicializa el generador (el pool se crea en el primer uso).
+        
+        Args:
+            procesos: Número de procesos (por defecto, uno por tipo de lista
+                      sin superar el número de núcleos)
+        """
+        self.procesos = procesos or min(len(TIPOS_LISTA), os.cpu_count() or 1)
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        """Crea el pool de procesos si todavía no existe"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    initializer=_inicializar_trabajador_listas,
+                    initargs=(DIRECTORIO_INVENTARIO,)
+                )
+            return self._pool
+    
+    def generar(
+        self,
+        productos: List[Dict],
+        presupuesto: float,
+        tipos: Tuple[str, ...] = TIPOS_LISTA,
+        parametros: Optional[Dict] = None,
+        semilla: Optional[int] = None,
+        motor: str = "temple",
+        limite_ms: Optional[float] = None,
+        version: Optional[str] = None,
+        trazas: Optional[Dict[str, List[Dict]]] = None,
+        observador: Optional[Callable[[str, Dict], None]] = None
+    ) -> Dict[str, Tuple[List[Tuple[Dict, int]], float, int]]:
+        """
+        Genera una lista por tipo con el motor de listas indicado.
+        
+        Args:
+            productos: Lista de productos del inventario
+            presupuesto: Presupuesto objetivo
+            tipos: Tipos de lista a generar
+            parametros: Parámetros de TempleSimulado (temperaturas, etc.)
+            semilla: Semilla para resultados reproducibles (None = aleatorio)
+            motor: Motor de listas (ver MOTORES_LISTAS)
+            limite_ms: Tiempo máximo de la generación en milisegundos (None =
+                       sin límite); en un solo proceso se reparte entre las listas
+            version: Hash del catálogo si ya se conoce (ver calcular_version_catalogo)
+            trazas: Diccionario que, si se indica, se rellena con la traza de
+                    convergencia de cada lista {tipo_lista: muestras}
+            observador: Función observador(tipo_lista, muestra) llamada por cada
+                        nivel de temperatura mientras se genera; las listas se
+                        generan entonces en este proceso, una tras otra
+            
+        Returns:
+            Diccionario {tipo_lista: (mejor_solucion, mejor_costo, iteraciones)},
+            con el mismo formato que TempleSimulado.optimizar
+        """
+        parametros = dict(parametros or {})
+        if trazas is not None:
+            parametros["registrar_traza"] = True
+        crear_motor_listas(motor)  # Validar el motor antes de repartir trabajo
+        if semilla is not None:
+            semillas = {tipo: random.Random(f"{semilla}:{tipo}").getrandbits(64) for tipo in tipos}
+        else:
+            generador_semillas = random.SystemRandom()
+            semillas = {tipo: generador_semillas.getrandbits(64) for tipo in tipos}
+        
+        if self.procesos <= 1 or observador is not None:
+            # Compartir el catálogo indexado entre todos los compradores de la sucursal
+            if version is not None:
+                productos = registro_catalogos_global.obtener(productos, version).productos
+            
+            instante_limite = None if limite_ms is None else time.perf_counter() + limite_ms / 1000
+            resultados = {}
+            for numero, tipo in enumerate(tipos):
+                limite_lista = None
+                if instante_limite is not None:
+                    # Repartir el tiempo restante entre las listas que faltan
+                    restante = (instante_limite - time.perf_counter()) * 1000
+                    limite_lista = max(1.0, restante / (len(tipos) - numero))
+                
+                parametros_lista = parametros
+                if observador is not None:
+                    parametros_lista = dict(
+                        parametros, observador=lambda muestra, tipo=tipo: observador(tipo, muestra)
+                    )
+                
+                optimizador = crear_motor_listas(motor, semilla=semillas[tipo], **parametros_lista)
+                resultados[tipo] = optimizador.optimizar(productos, presupuesto, tipo, limite_ms=limite_lista)
+                if trazas is not None:
+                    trazas[tipo] = list(optimizador.traza)
+            return resultados
+        
+        version = version or calcular_version_catalogo(productos)
+        pool = self._obtener_pool()
+        instante_limite = None if limite_ms is None else time.perf_counter() + limite_ms / 1000
+        
+        futuros = {
+            tipo: pool.submit(_generar_lista_trabajador, version, None, tipo,
+                              presupuesto, semillas[tipo], parametros, motor, limite_ms)
+            for tipo in tipos
+        }
+        generados = {tipo: futuro.result() for tipo, futuro in futuros.items()}
+        
+        faltantes = [tipo for tipo, resultado in generados.items() if resultado is None]
+        if faltantes:
+            # Los procesos no tenían el catálogo: reenviarlo para todas las
+            # listas a la vez, con el tiempo que queda del límite
+            limite_restante = None
+            if instante_limite is not None:
+                limite_restante = max(1.0, (instante_limite - time.perf_counter()) * 1000)
+            reenvios = {
+                tipo: pool.submit(_generar_lista_trabajador, version, productos, tipo,
+                                  presupuesto, semillas[tipo], parametros, motor, limite_restante)
+                for tipo in faltantes
+            }
+            for tipo, futuro in reenvios.items():
+                generados[tipo] = futuro.result()
+        
+        resultados = {}
+        for tipo in tipos:
+            posiciones, costo, iteraciones, traza = generados[tipo]
+            if trazas is not None:
+                trazas[tipo] = traza
+            resultados[tipo] = (
+                [(productos[posicion], cantidad) for posicion, cantidad in posiciones],
+                costo,
+                iteraciones
+            )
+        
+        return resultados
+    
+    def cerrar(self):
+        """Detiene el pool de procesos"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Instancia única del generador de listas para toda la aplicación
+generador_listas_global = GeneradorListasParalelo()
+
+# Instancia única del buscador de rutas por lotes para toda la aplicación
+buscador_rutas_global = BuscadorRutasLote()
@@ -0,0 +1,458 @@
+"""
+Modelo de Sucursal con Distancias Precalculadas
+Precalcula, al cargar un mapa, las distancias y tablas de siguiente paso
+entre los puntos de interés de la sucursal (entrada, zonas de productos
+y cajeros) para que planificar un recorrido sea solo consultar tablas.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from utils.algoritmos_busqueda import GridOcupacion, BusquedaJerarquica
+
+# A partir de este número de celdas se construye el grafo jerárquico (HPA*)
+UMBRAL_CELDAS_JERARQUICO = 20000
+
+DIRECTORIO_MAPAS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data', 'mapas'
+)
+
+
+class ModeloSucursal:
+    """
+    Modelo precalculado de una sucursal.
+    
+    Al construirse ejecuta una búsqueda en anchura (BFS) desde cada punto
+    de interés. Cada BFS guarda, para todas las celdas del mapa:
+    - distancia: número de pasos hasta el punto de interés
+    - siguiente: índice de la celda vecina que acerca al punto de interés
+    
+    Con estas tablas la distancia entre dos puntos de interés es una
+    consulta directa y la ruta se obtiene siguiendo los siguientes pasos.
+    
+    Además mantiene un campo de distancias multi-origen desde todos los
+    cajeros, que responde "¿cuál es el cajero más cercano?" para cualquier
+    celda sin ejecutar búsqueda. En mapas muy grandes también construye el
+    grafo jerárquico de HPA* para las rutas entre celdas arbitrarias.
+    """
+    
+    def __init__(self, mapa: Dict):
+        """
+        Construye el modelo a partir del JSON del mapa.
+        
+        Args:
+            mapa: Diccionario del mapa (dimensiones, entrada, cajeros,
+                  obstaculos, zonas_productos)
+        """
+        self.sucursal_id = mapa.get('sucursal_id')
+        self.version = calcular_version_mapa(mapa)
+        
+        # Grid de ocupación compartido con los algoritmos de búsqueda
+        self.grid = GridOcupacion.desde_mapa(mapa)
+        
+        # Puntos de interés
+        entrada = mapa['entrada']
+        self.entrada = (entrada['fila'], entrada['columna'])
+        self.cajeros = {
+            c['id']: (c['fila'], c['columna']) for c in mapa.get('cajeros', [])
+        }
+        self.zonas = {
+            nombre: (zona['fila'], zona['columna'])
+            for nombre, zona in mapa.get('zonas_productos', {}).items()
+        }
+        
+        puntos = [self.entrada] + list(self.zonas.values()) + list(self.cajeros.values())
+        
+        # Tablas BFS por punto de interés: {posicion: (distancias, siguiente)}
+        self.tablas = {}
+        for punto in puntos:
+            if punto not in self.tablas and self.grid.es_transitable(punto):
+                self.tablas[punto] = self._bfs_desde(punto)
+    
+        # Campo multi-origen desde todos los cajeros
+        self.ids_cajeros = list(self.cajeros.keys())
+        (
+            self.distancia_cajero,
+            self.cajero_cercano,
+            self.siguiente_cajero
+        ) = self._bfs_multi_origen_cajeros()
+        
+        # Planificador jerárquico para mapas grandes (None en mapas pequeños)
+        self.busqueda_jerarquica = None
+        if self.grid.total_celdas >= UMBRAL_CELDAS_JERARQUICO:
+            self.busqueda_jerarquica = BusquedaJerarquica(self.grid)
+    
+    # ========== CONSTRUCCIÓN ==========
+    
+    def _bfs_desde(self, origen: Tuple[int, int]) -> Tuple[List[int], List[int]]:
+        """
+        Ejecuta BFS desde un punto de interés sobre todo el mapa.
+        
+        Args:
+            origen: Punto de interés (fila, columna)
+            
+        Returns:
+            Tupla (distancias, siguiente). distancias[i] es -1 si la celda
+            es inalcanzable; siguiente[i] es la celda vecina de i más
+            cercana al origen (-1 en el propio origen o si es inalcanzable).
+        """
+        vecinos = self.grid.vecinos
+        
+        distancias = [-1] * self.grid.total_celdas
+        siguiente = [-1] * self.grid.total_celdas
+        
+        inicio = self.grid.indice(origen)
+        distancias[inicio] = 0
+        cola = deque([inicio])
+        
+        while cola:
+            actual = cola.popleft()
+            d = distancias[actual] + 1
+            
+            for vecino in vecinos[actual]:
+                if distancias[vecino] < 0:
+                    distancias[vecino] = d
+                    siguiente[vecino] = actual
+                    cola.append(vecino)
+        
+        return distancias, siguiente
+    
+    def _bfs_multi_origen_cajeros(self) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Ejecuta un único BFS que parte simultáneamente de todos los cajeros.
+        
+        Returns:
+            Tupla (distancias, cajero, siguiente). Para cada celda:
+            distancia al cajero más cercano (-1 si inalcanzable), índice en
+            ids_cajeros de ese cajero (-1 si inalcanzable) y celda vecina que
+            desciende hacia él (-1 en el propio cajero).
+        """
+        vecinos = self.grid.vecinos
+        
+        distancias = [-1] * self.grid.total_celdas
+        cajero = [-1] * self.grid.total_celdas
+        siguiente = [-1] * self.grid.total_celdas
+        cola = deque()
+        
+        for numero, cajero_id in enumerate(self.ids_cajeros):
+            posicion = self.cajeros[cajero_id]
+            if not self.grid.es_transitable(posicion):
+                continue
+            inicio = self.grid.indice(posicion)
+            if distancias[inicio] < 0:
+                distancias[inicio] = 0
+                cajero[inicio] = numero
+                cola.append(inicio)
+        
+        while cola:
+            actual = cola.popleft()
+            d = distancias[actual] + 1
+            
+            for vecino in vecinos[actual]:
+                if distancias[vecino] < 0:
+                    distancias[vecino] = d
+                    cajero[vecino] = cajero[actual]
+                    siguiente[vecino] = actual
+                    cola.append(vecino)
+        
+        return distancias, cajero, siguiente
+    
+    # ========== CONSULTAS ==========
+    
+    def tiene_tabla(self, posicion: Tuple[int, int]) -> bool:
+        """Indica si existe tabla precalculada hacia la posición"""
+        return posicion in self.tablas
+    
+    def distancia(self, origen: Tuple[int, int], destino: Tuple[int, int]) -> float:
+        """
+        Distancia en pasos entre una celda cualquiera y un punto de interés.
+        
+        Args:
+            origen: Posición de partida (fila, columna)
+            destino: Punto de interés con tabla precalculada
+            
+        Returns:
+            Número de pasos, o infinito si no hay ruta
+        """
+        tabla = self.tablas.get(destino)
+        if tabla is None or not self.grid.es_transitable(origen):
+            return float('inf')
+        
+        d = tabla[0][self.grid.indice(origen)]
+        return d if d >= 0 else float('inf')
+    
+    def ruta(
+        self,
+        origen: Tuple[int, int],
+        destino: Tuple[int, int]
+    ) -> Tuple[List[Tuple[int, int]], float]:
+        """
+        Reconstruye la ruta más corta siguiendo la tabla de siguiente paso.
+        
+        Args:
+            origen: Posición de partida (fila, columna)
+            destino: Punto de interés con tabla precalculada
+            
+        Returns:
+            Tupla (camino, costo) con el mismo formato que BusquedaAEstrella.buscar
+        """
+        costo = self.distancia(origen, destino)
+        if costo == float('inf'):
+            return [], float('inf')
+        
+        siguiente = self.tablas[destino][1]
+        actual = self.grid.indice(origen)
+        camino = [origen]
+        
+        while siguiente[actual] >= 0:
+            actual = siguiente[actual]
+            camino.append(self.grid.posicion(actual))
+        
+        return camino, costo
+    
+    def cajero_mas_cercano(self, origen: Tuple[int, int]) -> Tuple[Optional[str], float]:
+        """
+        Consulta el cajero más cercano a una celda en el campo multi-origen.
+        
+        Args:
+            origen: Posición (fila, columna)
+            
+        Returns:
+            Tupla (cajero_id, distancia); (None, infinito) si no hay
+            cajero alcanzable
+        """
+        if not self.grid.es_transitable(origen):
+            return None, float('inf')
+        
+        indice = self.grid.indice(origen)
+        if self.distancia_cajero[indice] < 0:
+            return None, float('inf')
+        
+        return self.ids_cajeros[self.cajero_cercano[indice]], self.distancia_cajero[indice]
+    
+    def cajero_menor_espera(
+        self,
+        origen: Tuple[int, int],
+        carga: Dict[str, Tuple[int, float]],
+        segundos_por_paso: float,
+        candidatos: Optional[List[str]] = None
+    ) -> Tuple[Optional[str], float, float]:
+        """
+        Elige el cajero con menor tiempo esperado hasta terminar de pagar:
+        caminar hasta él, esperar a los que ya están en su cola y ser atendido.
+        
+            tiempo = distancia * segundos_por_paso + (en_cola + 1) * servicio_s
+            
+        Con todas las colas vacías y el mismo tiempo de servicio equivale a
+        cajero_mas_cercano. Los empates se resuelven por distancia.
+        
+        Args:
+            origen: Posición (fila, columna)
+            carga: {cajero_id: (en_cola, servicio_s)}; un cajero sin entrada
+                   cuenta como vacío y sin tiempo de servicio
+            segundos_por_paso: Tiempo de caminar una celda
+            candidatos: IDs de cajero permitidos (None = todos)
+            
+        Returns:
+            Tupla (cajero_id, distancia, tiempo_estimado); (None, infinito,
+            infinito) si no hay cajero alcanzable
+        """
+        mejor = (float('inf'), float('inf'), None)
+        
+        for cajero_id, posicion in self.cajeros.items():
+            if candidatos is not None and cajero_id not in candidatos:
+                continue
+            
+            distancia = self.distancia(origen, posicion)
+            if distancia == float('inf'):
+                continue
+            
+            en_cola, servicio_s = carga.get(cajero_id, (0, 0.0))
+            tiempo = distancia * segundos_por_paso + (en_cola + 1) * servicio_s
+            if (tiempo, distancia) < mejor[:2]:
+                mejor = (tiempo, distancia, cajero_id)
+        
+        tiempo, distancia, cajero_id = mejor
+        return cajero_id, distancia, tiempo
+    
+    def ruta_a_cajero_mas_cercano(
+        self,
+        origen: Tuple[int, int]
+    ) -> Tuple[Optional[str], List[Tuple[int, int]], float]:
+        """
+        Reconstruye la ruta al cajero más cercano descendiendo por el campo
+        multi-origen (O(longitud de la ruta), sin cola de prioridad).
+        
+        Args:
+            origen: Posición (fila, columna)
+            
+        Returns:
+            Tupla (cajero_id, camino, costo); (None, [], infinito) si no hay
+            cajero alcanzable
+        """
+        cajero_id, costo = self.cajero_mas_cercano(origen)
+        if cajero_id is None:
+            return None, [], float('inf')
+        
+        actual = self.grid.indice(origen)
+        camino = [origen]
+        
+        while self.siguiente_cajero[actual] >= 0:
+            actual = self.siguiente_cajero[actual]
+            camino.append(self.grid.posicion(actual))
+        
+        return cajero_id, camino, costo
+
+
+def calcular_version_mapa(mapa: Dict) -> str:
+    """
+    Calcula un hash estable del contenido del mapa.
+    
+    Args:
+        mapa: Diccionario del mapa
+        
+    Returns:
+        Hash hexadecimal que cambia cuando cambia el mapa
+    """
+    contenido = json.dumps(mapa, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+class RegistroModelos:
+    """
+    Registro global de modelos precalculados, uno por sucursal.
+    Comprueba la fecha de modificación y el tamaño del archivo del mapa; solo
+    si cambiaron calcula el hash del contenido y reconstruye el modelo cuando
+    el contenido es distinto. La reconstrucción usa un lock por sucursal: no
+    bloquea las consultas de las demás sucursales.
+    """
+    
+    def __init__(self, directorio: str = DIRECTORIO_MAPAS):
+        """
+        Inicializa el registro vacío.
+        
+        Args:
+            directorio: Directorio con los archivos {sucursal_id}.json
+        """
+        self.directorio = directorio
+        # Diccionario: {sucursal_id: ModeloSucursal}
+        self.modelos = {}
+        # Diccionario: {sucursal_id: (mtime_ns, tamaño) del mapa del modelo}
+        self.firmas = {}
+        # Diccionario: {sucursal_id: Lock que serializa su construcción}
+        self._locks_construccion = {}
+        self._lock = threading.Lock()
+    
+    def _firma(self, sucursal_id: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, tamaño) del archivo del mapa, o None si no existe"""
+        try:
+            estado = os.stat(os.path.join(self.directorio, f'{sucursal_id}.json'))
+        except OSError:
+            return None
+        return estado.st_mtime_ns, estado.st_size
+    
+    def obtener_modelo(self, sucursal_id: str, mapa: Optional[Dict] = None) -> ModeloSucursal:
+        """
+        Obtiene el modelo de la sucursal, construyéndolo si no existe
+        o si el mapa cambió desde la última construcción.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            mapa: Diccionario del mapa actual (None = leerlo del archivo)
+            
+        Returns:
+            Modelo precalculado de la sucursal
+            
+        Raises:
+            ValueError: Si no se pasa mapa y el archivo no existe o no se puede decodificar
+        """
+        firma = self._firma(sucursal_id)
+        construido = None
+        
+        with self._lock:
+            modelo = self._modelo_vigente(sucursal_id, firma)
+            if modelo is not None:
+                return modelo
+            lock_construccion = self._locks_construccion.setdefault(sucursal_id, threading.Lock())
+        
+        # Leer y construir fuera del lock del registro; otro hilo que pida la
+        # misma sucursal espera aquí y reutiliza el modelo ya publicado
+        with lock_construccion:
+            with self._lock:
+                modelo = self._modelo_vigente(sucursal_id, firma)
+                if modelo is not None:
+                    return modelo
+                modelo = self.modelos.get(sucursal_id)
+            
+            if mapa is None:
+                mapa = self._leer_mapa(sucursal_id)
+            
+            version = calcular_version_mapa(mapa)
+            if modelo is None or modelo.version != version:
+                modelo = ModeloSucursal(mapa)
+                construido = modelo
+            
+            with self._lock:
+                self.modelos[sucursal_id] = modelo
+                self.firmas[sucursal_id] = firma
+        
+        if construido is not None:
+            print(f"[Registro Modelos] Modelo precalculado para {sucursal_id} "
+                  f"({len(construido.tablas)} puntos de interés)")
+        return modelo
+    
+    def _modelo_vigente(self, sucursal_id: str, firma: Optional[Tuple[int, int]]) -> Optional[ModeloSucursal]:
+        """
+        Modelo registrado si su firma coincide con la del archivo (llamar con
+        el lock del registro tomado).
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            firma: Firma actual del archivo del mapa
+            
+        Returns:
+            Modelo vigente, o None si hay que (re)construirlo
+        """
+        modelo = self.modelos.get(sucursal_id)
+        if modelo is not None and firma is not None and self.firmas.get(sucursal_id) == firma:
+            return modelo
+        return None
+    
+    def _leer_mapa(self, sucursal_id: str) -> Dict:
+        """
+        Lee el archivo del mapa de una sucursal.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            
+        Returns:
+            Diccionario del mapa
+        """
+        try:
+            with open(os.path.join(self.directorio, f'{sucursal_id}.json'), 'r', encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except FileNotFoundError:
+            raise ValueError(f"Mapa no encontrado para sucursal {sucursal_id}")
+        except json.JSONDecodeError:
+            raise ValueError(f"Error al decodificar mapa de {sucursal_id}")
+    
+    def invalidar(self, sucursal_id: str):
+        """
+        Descarta el modelo de una sucursal (por ejemplo, al guardar su mapa).
+        
+        Args:
+            sucursal_id: ID de la sucursal
+        """
+        with self._lock:
+            self.modelos.pop(sucursal_id, None)
+            self.firmas.pop(sucursal_id, None)
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Instancia única del registro de modelos para toda la aplicación
+registro_modelos_global = RegistroModelos()
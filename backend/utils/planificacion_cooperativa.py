@@ -0,0 +1,430 @@
+"""
+Planificación Cooperativa Multi-Agente
+Coordina las rutas de todos los compradores de una sucursal mediante una
+tabla de reservas espacio-temporal (celda, instante) compartida, de modo
+que las rutas comprometidas puedan ejecutarse a la vez sin colisiones.
+"""
+
+import heapq
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from utils.modelo_sucursal import ModeloSucursal
+
+
+class TablaReservas:
+    """
+    Tabla de reservas espacio-temporal de una sucursal.
+    
+    Registra qué agente ocupa cada celda en cada instante y qué
+    movimientos se realizan entre instantes, para detectar tanto choques
+    en una misma celda como intercambios de posición entre dos agentes.
+    """
+    
+    def __init__(self):
+        """Inicializa la tabla vacía"""
+        # {(celda, t): agente_id}
+        self.celdas = {}
+        # {(desde, hacia, t): agente_id} movimiento de desde (en t) a hacia (en t+1)
+        self.movimientos = {}
+        # {agente_id: ([claves de celdas], [claves de movimientos])}
+        self.por_agente = {}
+    
+    def ocupada(self, celda: int, t: int, agente_id: Optional[str] = None) -> bool:
+        """Indica si otro agente tiene reservada la celda en el instante t"""
+        titular = self.celdas.get((celda, t))
+        return titular is not None and titular != agente_id
+    
+    def intercambio(self, desde: int, hacia: int, t: int, agente_id: Optional[str] = None) -> bool:
+        """Indica si moverse de desde a hacia en t cruza a otro agente en sentido contrario"""
+        titular = self.movimientos.get((hacia, desde, t))
+        return titular is not None and titular != agente_id
+    
+    def libre_durante(self, celda: int, t: int, duracion: int, agente_id: Optional[str] = None) -> bool:
+        """Indica si la celda está libre desde t hasta t + duracion (inclusive)"""
+        return not any(self.ocupada(celda, t + i, agente_id) for i in range(duracion + 1))
+    
+    def reservar(self, agente_id: str, camino: List[int], t_inicio: int):
+        """
+        Reserva un camino temporal (una celda por instante).
+        
+        Args:
+            agente_id: Agente titular de la reserva
+            camino: Celdas ocupadas en t_inicio, t_inicio + 1, ...
+            t_inicio: Instante de la primera celda
+        """
+        claves_celdas, claves_movimientos = self.por_agente.setdefault(agente_id, ([], []))
+        
+        for paso, celda in enumerate(camino):
+            clave = (celda, t_inicio + paso)
+            self.celdas[clave] = agente_id
+            claves_celdas.append(clave)
+            
+            if paso > 0 and camino[paso - 1] != celda:
+                clave = (camino[paso - 1], celda, t_inicio + paso - 1)
+                self.movimientos[clave] = agente_id
+                claves_movimientos.append(clave)
+    
+    def liberar(self, agente_id: str) -> int:
+        """
+        Elimina todas las reservas de un agente.
+        
+        Returns:
+            Número de celdas liberadas
+        """
+        claves_celdas, claves_movimientos = self.por_agente.pop(agente_id, ([], []))
+        for clave in claves_celdas:
+            if self.celdas.get(clave) == agente_id:
+                del self.celdas[clave]
+        for clave in claves_movimientos:
+            if self.movimientos.get(clave) == agente_id:
+                del self.movimientos[clave]
+        return len(claves_celdas)
+    
+    def podar(self, t_actual: int) -> int:
+        """
+        Descarta las reservas de instantes ya pasados.
+        
+        Args:
+            t_actual: Instante actual de la simulación
+            
+        Returns:
+            Número de reservas eliminadas
+        """
+        vencidas = [clave for clave in self.celdas if clave[1] < t_actual]
+        for clave in vencidas:
+            del self.celdas[clave]
+        for clave in [clave for clave in self.movimientos if clave[2] < t_actual]:
+            del self.movimientos[clave]
+        
+        for agente_id, (claves_celdas, claves_movimientos) in list(self.por_agente.items()):
+            claves_celdas[:] = [clave for clave in claves_celdas if clave[1] >= t_actual]
+            claves_movimientos[:] = [clave for clave in claves_movimientos if clave[2] >= t_actual]
+            if not claves_celdas:
+                del self.por_agente[agente_id]
+        
+        return len(vencidas)
+
+
+class PlanificadorCooperativo:
+    """
+    Planificador cooperativo tipo HCA* (Hierarchical Cooperative A*).
+    
+    Cada comprador se planifica con A* en el espacio (celda, instante),
+    con la acción adicional de esperar en su celda, evitando las reservas
+    de los compradores ya comprometidos. La heurística es la distancia
+    real al destino (tablas BFS del modelo de la sucursal), que guía la
+    búsqueda directamente y deja como único trabajo extra las esperas.
+    
+    Un recorrido completo (productos y cajero) se planifica tramo a tramo:
+    cada parada se ocupa durante `pasos_permanencia` instantes y al
+    terminar en el cajero el comprador sale del mapa.
+    """
+    
+    def __init__(
+        self,
+        modelo: ModeloSucursal,
+        pasos_permanencia: int = 2,
+        max_espera: int = 60,
+        segundos_por_paso: float = 1.0
+    ):
+        """
+        Inicializa el planificador de una sucursal.
+        
+        Args:
+            modelo: Modelo precalculado de la sucursal
+            pasos_permanencia: Instantes que el comprador ocupa cada parada
+            max_espera: Máximo de instantes de espera por tramo antes de
+                        declarar el tramo imposible
+            segundos_por_paso: Duración simulada de un instante
+        """
+        self.modelo = modelo
+        self.grid = modelo.grid
+        self.pasos_permanencia = pasos_permanencia
+        self.max_espera = max_espera
+        self.segundos_por_paso = segundos_por_paso
+        
+        self.reservas = TablaReservas()
+        self._distancias = {}  # Tablas BFS hacia destinos sin tabla en el modelo
+        self._lock = threading.Lock()
+        
+        # Recorridos comprometidos: {agente_id: {"t_inicio", "t_fin", "esperas", ...}}
+        self.recorridos = {}
+        self.nodos_expandidos = 0
+    
+    # ========== FUNCIONES AUXILIARES ==========
+    
+    def _distancias_hacia(self, destino: Tuple[int, int]) -> List[int]:
+        """
+        Distancias reales de todas las celdas al destino (-1 si inalcanzable).
+        Usa la tabla del modelo si el destino es un punto de interés.
+        """
+        tabla = self.modelo.tablas.get(destino)
+        if tabla is not None:
+            return tabla[0]
+        
+        distancias = self._distancias.get(destino)
+        if distancias is None:
+            vecinos = self.grid.vecinos
+            distancias = [-1] * self.grid.total_celdas
+            inicio = self.grid.indice(destino)
+            distancias[inicio] = 0
+            cola = deque([inicio])
+            while cola:
+                actual = cola.popleft()
+                for vecino in vecinos[actual]:
+                    if distancias[vecino] < 0:
+                        distancias[vecino] = distancias[actual] + 1
+                        cola.append(vecino)
+            self._distancias[destino] = distancias
+        
+        return distancias
+    
+    def _buscar_tramo(
+        self,
+        agente_id: str,
+        inicio: int,
+        objetivo: Tuple[int, int],
+        t_inicio: int
+    ) -> Optional[List[int]]:
+        """
+        A* espacio-temporal de un tramo contra las reservas existentes.
+        
+        Args:
+            agente_id: Agente que planifica
+            inicio: Celda de partida (ocupada en t_inicio)
+            objetivo: Posición destino
+            t_inicio: Instante de partida
+            
+        Returns:
+            Celdas ocupadas en t_inicio, t_inicio + 1, ... hasta la llegada,
+            o None si no hay ruta dentro del máximo de espera
+        """
+        distancias = self._distancias_hacia(objetivo)
+        if distancias[inicio] < 0:
+            return None
+        
+        celda_objetivo = self.grid.indice(objetivo)
+        limite = t_inicio + distancias[inicio] + self.max_espera
+        vecinos = self.grid.vecinos
+        reservas = self.reservas
+        
+        padres = {(inicio, t_inicio): None}
+        abiertos = [(t_inicio + distancias[inicio], t_inicio, inicio)]
+        
+        while abiertos:
+            _, t, celda = heapq.heappop(abiertos)
+            self.nodos_expandidos += 1
+            
+            if celda == celda_objetivo and reservas.libre_durante(
+                celda, t, self.pasos_permanencia, agente_id
+            ):
+                camino = []
+                estado = (celda, t)
+                while estado is not None:
+                    camino.append(estado[0])
+                    estado = padres[estado]
+                camino.reverse()
+                return camino
+            
+            if t >= limite:
+                continue
+            
+            siguiente_t = t + 1
+            for siguiente in vecinos[celda] + (celda,):
+                estado = (siguiente, siguiente_t)
+                if estado in padres:
+                    continue
+                if reservas.ocupada(siguiente, siguiente_t, agente_id):
+                    continue
+                if siguiente != celda and reservas.intercambio(celda, siguiente, t, agente_id):
+                    continue
+                
+                padres[estado] = (celda, t)
+                heapq.heappush(abiertos, (siguiente_t + distancias[siguiente], siguiente_t, siguiente))
+        
+        return None
+    
+    # ========== PLANIFICACIÓN ==========
+    
+    def planificar_recorrido(
+        self,
+        agente_id: str,
+        inicio: Tuple[int, int],
+        paradas: List[Tuple[int, int]],
+        t_inicio: int = 0
+    ) -> Dict:
+        """
+        Planifica y reserva el recorrido completo de un comprador.
+        
+        Si el comprador ya tenía un recorrido comprometido, se reemplaza.
+        Las reservas se hacen solo cuando todos los tramos tienen ruta: si
+        alguna parada es inalcanzable la tabla queda como estaba.
+        
+        Args:
+            agente_id: ID del comprador
+            inicio: Posición de entrada (fila, columna)
+            paradas: Posiciones a visitar en orden (la última suele ser el cajero)
+            t_inicio: Instante en que el comprador quiere empezar
+            
+        Returns:
+            Diccionario con la ruta temporal (una posición por instante),
+            instante de inicio real, instante de fin, pasos de espera y
+            distancia recorrida
+            
+        Raises:
+            ValueError: Si alguna parada no tiene ruta libre de colisiones
+        """
+        with self._lock:
+            # Las reservas propias no bloquean al agente, así que el recorrido
+            # anterior puede seguir en la tabla mientras se busca el nuevo
+            celda = self.grid.indice(inicio)
+            
+            # Si la entrada está ocupada, el comprador espera fuera del mapa
+            t_real = t_inicio
+            while self.reservas.ocupada(celda, t_real, agente_id):
+                t_real += 1
+            espera_entrada = t_real - t_inicio
+            
+            camino = [celda]
+            t = t_real
+            for parada in paradas:
+                tramo = self._buscar_tramo(agente_id, celda, parada, t)
+                if tramo is None:
+                    raise ValueError(f"No hay ruta libre de colisiones hacia {parada}")
+                
+                # Permanencia en la parada
+                tramo.extend([tramo[-1]] * self.pasos_permanencia)
+                
+                camino.extend(tramo[1:])
+                t += len(tramo) - 1
+                celda = tramo[-1]
+            
+            # Todos los tramos tienen ruta: se sustituye el recorrido anterior
+            self.reservas.liberar(agente_id)
+            self.reservas.reservar(agente_id, camino, t_real)
+            
+            movimientos = sum(1 for a, b in zip(camino, camino[1:]) if a != b)
+            esperas = len(camino) - 1 - movimientos - self.pasos_permanencia * len(paradas)
+            
+            recorrido = {
+                "t_inicio": t_real,
+                "t_fin": t,
+                "esperas": esperas + espera_entrada,
+                "distancia": movimientos
+            }
+            self.recorridos[agente_id] = recorrido
+            
+            return {
+                "agente_id": agente_id,
+                "ruta_temporal": [self.grid.posicion(c) for c in camino],
+                **recorrido
+            }
+    
+    def cancelar_recorrido(self, agente_id: str):
+        """
+        Libera las reservas de un comprador (por ejemplo, si abandona la sucursal).
+        
+        Args:
+            agente_id: ID del comprador
+        """
+        with self._lock:
+            self.reservas.liberar(agente_id)
+            self.recorridos.pop(agente_id, None)
+    
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Obtiene estadísticas de los recorridos comprometidos.
+        
+        Returns:
+            Diccionario con compradores planificados, pasos de espera
+            insertados y throughput (compradores por minuto simulado)
+        """
+        with self._lock:
+            recorridos = list(self.recorridos.values())
+            reservas = len(self.reservas.celdas)
+        
+        if not recorridos:
+            return {
+                "compradores": 0,
+                "esperas_totales": 0,
+                "reservas_activas": reservas,
+                "throughput_por_minuto": 0.0
+            }
+        
+        t_min = min(r["t_inicio"] for r in recorridos)
+        t_max = max(r["t_fin"] + self.pasos_permanencia for r in recorridos)
+        minutos = (t_max - t_min) * self.segundos_por_paso / 60
+        
+        return {
+            "compradores": len(recorridos),
+            "esperas_totales": sum(r["esperas"] for r in recorridos),
+            "distancia_total": sum(r["distancia"] for r in recorridos),
+            "instantes_simulados": t_max - t_min,
+            "reservas_activas": reservas,
+            "throughput_por_minuto": round(len(recorridos) / minutos, 2) if minutos else 0.0
+        }
+
+
+class GestorReservas:
+    """
+    Gestor global de planificadores cooperativos, uno por sucursal.
+    Crea un planificador nuevo (tabla vacía) si cambia el mapa de la sucursal.
+    """
+    
+    def __init__(self):
+        """Inicializa el gestor vacío"""
+        # Diccionario: {sucursal_id: PlanificadorCooperativo}
+        self.planificadores = {}
+        self._lock = threading.Lock()
+    
+    def obtener_planificador(self, sucursal_id: str, modelo: ModeloSucursal) -> PlanificadorCooperativo:
+        """
+        Obtiene el planificador de la sucursal para la versión actual del mapa.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            modelo: Modelo precalculado vigente de la sucursal
+            
+        Returns:
+            Planificador cooperativo de la sucursal
+        """
+        with self._lock:
+            planificador = self.planificadores.get(sucursal_id)
+            if planificador is None or planificador.modelo.version != modelo.version:
+                planificador = PlanificadorCooperativo(modelo)
+                self.planificadores[sucursal_id] = planificador
+                print(f"[Gestor Reservas] Nueva tabla de reservas para {sucursal_id}")
+            return planificador
+    
+    def invalidar(self, sucursal_id: str):
+        """
+        Descarta el planificador (y sus reservas) de una sucursal.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+        """
+        with self._lock:
+            self.planificadores.pop(sucursal_id, None)
+    
+    def obtener_estadisticas(self, sucursal_id: str) -> Dict:
+        """
+        Obtiene las estadísticas de reservas de una sucursal.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            
+        Returns:
+            Estadísticas del planificador (vacías si no existe)
+        """
+        planificador = self.planificadores.get(sucursal_id)
+        if planificador is None:
+            return {"compradores": 0, "esperas_totales": 0, "reservas_activas": 0,
+                    "throughput_por_minuto": 0.0}
+        return planificador.obtener_estadisticas()
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Instancia única del gestor de reservas para toda la aplicación
+gestor_reservas_global = GestorReservas()
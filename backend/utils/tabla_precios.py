@@ -0,0 +1,259 @@
+"""
+Tablas de Precios Compartidas por Sucursal
+Carga una sola vez el inventario de cada sucursal y lo comparte, en modo
+solo lectura, entre todos los cajeros y compradores de esa sucursal.
+Cuando cambia el archivo de inventario se construye una tabla nueva y se
+sustituye la referencia de forma atómica: quien ya tenía la anterior la
+sigue usando completa hasta que pida la tabla otra vez.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+from utils.cache import calcular_version_catalogo
+
+DIRECTORIO_INVENTARIO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data', 'inventario'
+)
+
+
+def _solo_lectura(*args, **kwargs):
+    raise TypeError("El inventario compartido es de solo lectura")
+
+
+class DiccionarioSoloLectura(dict):
+    """
+    Diccionario que no admite modificaciones. Sigue siendo un dict, así que
+    se serializa a JSON y se envía a otros procesos sin convertirlo.
+    """
+    
+    __slots__ = ()
+    
+    __setitem__ = __delitem__ = __ior__ = _solo_lectura
+    clear = pop = popitem = setdefault = update = _solo_lectura
+    
+    def __reduce__(self):
+        return (DiccionarioSoloLectura, (dict(self),))
+
+
+class ListaSoloLectura(list):
+    """
+    Lista que no admite modificaciones. Sigue siendo una list, así que el
+    catálogo indexado la comparte sin copiarla (ver RegistroCatalogos).
+    """
+    
+    __slots__ = ()
+    
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _solo_lectura
+    append = extend = insert = pop = remove = clear = sort = reverse = _solo_lectura
+    
+    def __reduce__(self):
+        return (ListaSoloLectura, (list(self),))
+
+
+def congelar(valor):
+    """
+    Copia un valor decodificado de JSON con todos sus dict y list de solo lectura.
+    
+    Args:
+        valor: Valor a congelar (los ya congelados se devuelven tal cual)
+        
+    Returns:
+        Valor equivalente de solo lectura
+    """
+    if isinstance(valor, (DiccionarioSoloLectura, ListaSoloLectura)):
+        return valor
+    if isinstance(valor, dict):
+        return DiccionarioSoloLectura({clave: congelar(v) for clave, v in valor.items()})
+    if isinstance(valor, list):
+        return ListaSoloLectura(congelar(v) for v in valor)
+    return valor
+
+
+class TablaPrecios:
+    """
+    Instantánea inmutable del inventario de una sucursal.
+    
+    - inventario: contenido del archivo, de solo lectura
+    - precios: {producto_id: {"nombre", "precio", "categoria"}} de solo lectura
+    - version: hash del catálogo (clave de la caché de listas)
+    
+    Una tabla publicada no se modifica: si cambia la firma del archivo se
+    publica otra (ver con_firma).
+    """
+    
+    __slots__ = ("sucursal_id", "inventario", "precios", "version", "firma")
+    
+    def __init__(
+        self,
+        sucursal_id: str,
+        inventario: Dict,
+        firma: Tuple[int, int],
+        version: Optional[str] = None
+    ):
+        """
+        Construye la tabla a partir del inventario ya decodificado.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            inventario: Diccionario del archivo de inventario (se congela)
+            firma: (mtime_ns, tamaño) del archivo leído
+            version: Hash del catálogo si ya se calculó
+        """
+        inventario = congelar(inventario)
+        productos = inventario.get('productos', [])
+        
+        self.sucursal_id = sucursal_id
+        self.inventario = inventario
+        self.version = version or calcular_version_catalogo(productos)
+        self.firma = firma
+        self.precios = MappingProxyType({
+            producto['id']: MappingProxyType({
+                'nombre': producto['nombre'],
+                'precio': producto['precio'],
+                'categoria': producto['categoria']
+            })
+            for producto in productos
+        })
+    
+    def __len__(self) -> int:
+        return len(self.precios)
+    
+    def con_firma(self, firma: Tuple[int, int]) -> 'TablaPrecios':
+        """
+        Crea una tabla con el mismo catálogo (compartido, sin copiarlo) y otra firma.
+        
+        Args:
+            firma: (mtime_ns, tamaño) del archivo leído
+            
+        Returns:
+            Nueva tabla de precios
+        """
+        nueva = TablaPrecios.__new__(TablaPrecios)
+        nueva.sucursal_id = self.sucursal_id
+        nueva.inventario = self.inventario
+        nueva.precios = self.precios
+        nueva.version = self.version
+        nueva.firma = firma
+        return nueva
+
+
+class RegistroTablasPrecios:
+    """
+    Registro global de tablas de precios, una por sucursal.
+    Relee el archivo solo cuando cambia su fecha de modificación o tamaño.
+    """
+    
+    def __init__(self, directorio: str = DIRECTORIO_INVENTARIO):
+        """
+        Inicializa el registro vacío.
+        
+        Args:
+            directorio: Directorio con los archivos {sucursal_id}.json
+        """
+        self.directorio = directorio
+        # Diccionario: {sucursal_id: TablaPrecios}
+        self.tablas = {}
+        self._lock = threading.Lock()
+        self.cargas = 0
+        self.sustituciones = 0
+    
+    def _ruta(self, sucursal_id: str) -> str:
+        return os.path.join(self.directorio, f'{sucursal_id}.json')
+    
+    def obtener(self, sucursal_id: str) -> TablaPrecios:
+        """
+        Obtiene la tabla de precios vigente de la sucursal, cargándola si no
+        existe o si el archivo cambió desde la última carga.
+        
+        Args:
+            sucursal_id: ID de la sucursal
+            
+        Returns:
+            Tabla de precios compartida (no modificar)
+            
+        Raises:
+            ValueError: Si no hay inventario o no se puede decodificar
+        """
+        ruta = self._ruta(sucursal_id)
+        
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            raise ValueError(f"Inventario no encontrado para sucursal {sucursal_id}")
+        firma = (estado.st_mtime_ns, estado.st_size)
+        
+        tabla = self.tablas.get(sucursal_id)
+        if tabla is not None and tabla.firma == firma:
+            return tabla
+        
+        with self._lock:
+            tabla = self.tablas.get(sucursal_id)
+            if tabla is not None and tabla.firma == firma:
+                return tabla
+            
+            try:
+                with open(ruta, 'r', encoding='utf-8') as archivo:
+                    inventario = json.load(archivo)
+            except FileNotFoundError:
+                raise ValueError(f"Inventario no encontrado para sucursal {sucursal_id}")
+            except json.JSONDecodeError:
+                if tabla is not None:
+                    # Archivo a medio escribir: se sigue sirviendo la tabla anterior
+                    print(f"[Tablas Precios] ⚠ Inventario de {sucursal_id} ilegible, se mantiene la versión anterior")
+                    return tabla
+                raise ValueError(f"Error al decodificar inventario de {sucursal_id}")
+            
+            self.cargas += 1
+            version = calcular_version_catalogo(inventario.get('productos', []))
+            
+            if tabla is not None and tabla.version == version:
+                # Mismo catálogo (solo cambió la fecha): se publica el mismo
+                # contenido con la firma nueva, sin tocar la tabla anterior
+                nueva = tabla.con_firma(firma)
+                self.tablas[sucursal_id] = nueva
+                return nueva
+            
+            nueva = TablaPrecios(sucursal_id, inventario, firma, version)
+            if tabla is not None:
+                self.sustituciones += 1
+                print(f"[Tablas Precios] ✓ Inventario de {sucursal_id} actualizado ({len(nueva)} productos)")
+            else:
+                print(f"[Tablas Precios] ✓ Inventario de {sucursal_id} cargado ({len(nueva)} productos)")
+            
+            # Sustitución atómica de la referencia
+            self.tablas[sucursal_id] = nueva
+            return nueva
+    
+    def invalidar(self, sucursal_id: str):
+        """
+        Descarta la tabla de una sucursal (la siguiente consulta relee el archivo).
+        
+        Args:
+            sucursal_id: ID de la sucursal
+        """
+        with self._lock:
+            self.tablas.pop(sucursal_id, None)
+    
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Estadísticas del registro.
+        
+        Returns:
+            Diccionario con tablas cargadas, lecturas y sustituciones
+        """
+        return {
+            "tablas": {suc: {"version": tabla.version, "productos": len(tabla)}
+                       for suc, tabla in list(self.tablas.items())},
+            "cargas": self.cargas,
+            "sustituciones": self.sustituciones
+        }
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Instancia única del registro de tablas de precios para toda la aplicación
+registro_precios_global = RegistroTablasPrecios()
@@ -0,0 +1,127 @@
+"""
+Telemetría del Temple Simulado
+Guarda las trazas de convergencia (una muestra por nivel de temperatura)
+de las últimas generaciones de listas para consultarlas desde la API de
+depuración y ajustar el calendario de enfriamiento por sucursal.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def resumir_traza(muestras: List[Dict]) -> Dict:
+    """
+    Resume una traza de convergencia.
+    
+    Args:
+        muestras: Muestras por nivel de temperatura (ver TempleSimulado)
+        
+    Returns:
+        Diccionario con niveles, iteraciones, tiempo total, tasa de
+        aceptación media y mejor costo final
+    """
+    if not muestras:
+        return {"niveles": 0, "iteraciones": 0, "ms_total": 0.0,
+                "aceptacion_media": None, "mejor_costo": None}
+    
+    iteraciones = sum(muestra["iteraciones"] for muestra in muestras)
+    aceptados = sum(muestra["aceptacion"] * muestra["iteraciones"] for muestra in muestras)
+    
+    return {
+        "niveles": len(muestras),
+        "iteraciones": iteraciones,
+        "ms_total": round(sum(muestra["ms"] for muestra in muestras), 3),
+        "aceptacion_media": round(aceptados / iteraciones, 4) if iteraciones else None,
+        "mejor_costo": muestras[-1]["mejor_costo"]
+    }
+
+
+class RegistroTrazas:
+    """
+    Registro acotado de las últimas trazas de generación de listas, una
+    entrada por comprador (política LRU).
+    """
+    
+    def __init__(self, max_compradores: int = 64):
+        """
+        Inicializa el registro vacío.
+        
+        Args:
+            max_compradores: Número máximo de compradores con traza guardada
+        """
+        self.max_compradores = max_compradores
+        self._trazas = OrderedDict()  # {comprador_id: entrada}
+        self._lock = threading.Lock()
+        self.registradas = 0
+    
+    def registrar(self, comprador_id: str, trazas: Dict[str, List[Dict]], **metadatos):
+        """
+        Guarda las trazas de una generación (reemplaza la anterior del comprador).
+        
+        Args:
+            comprador_id: ID del comprador
+            trazas: {tipo_lista: muestras}
+            **metadatos: Datos de la generación (sucursal, presupuesto, motor, ...)
+        """
+        entrada = {
+            "comprador_id": comprador_id,
+            "instante": time.time(),
+            **metadatos,
+            "resumen": {tipo: resumir_traza(muestras) for tipo, muestras in trazas.items()},
+            "trazas": {tipo: list(muestras) for tipo, muestras in trazas.items()}
+        }
+        
+        with self._lock:
+            self._trazas[comprador_id] = entrada
+            self._trazas.move_to_end(comprador_id)
+            self.registradas += 1
+            
+            while len(self._trazas) > self.max_compradores:
+                self._trazas.popitem(last=False)
+    
+    def obtener(self, comprador_id: str) -> Optional[Dict]:
+        """
+        Obtiene la última traza de un comprador.
+        
+        Args:
+            comprador_id: ID del comprador
+            
+        Returns:
+            Entrada con metadatos, resumen y muestras, o None si no hay traza
+        """
+        with self._lock:
+            return self._trazas.get(comprador_id)
+    
+    def listar(self) -> List[Dict]:
+        """
+        Lista las trazas guardadas sin las muestras (solo metadatos y resumen).
+        
+        Returns:
+            Lista de entradas, de la más antigua a la más reciente
+        """
+        with self._lock:
+            return [
+                {clave: valor for clave, valor in entrada.items() if clave != "trazas"}
+                for entrada in self._trazas.values()
+            ]
+    
+    def obtener_estadisticas(self) -> Dict:
+        """
+        Estadísticas del registro.
+        
+        Returns:
+            Diccionario con trazas guardadas y registradas en total
+        """
+        with self._lock:
+            return {
+                "trazas_guardadas": len(self._trazas),
+                "max_compradores": self.max_compradores,
+                "registradas": self.registradas
+            }
+
+
+# ========== INSTANCIA GLOBAL ==========
+# Instancia única del registro de trazas para toda la aplicación
+registro_trazas_global = RegistroTrazas()